@@ -1,8 +1,10 @@
 from ._version import __version__, __version_tuple__
 
 # Hint: set COOLNAME_DATA_DIR and/or COOLNAME_DATA_MODULE
-# before `import coolname` to change the default generator.
+# before first use of coolname to change the default generator.
+# (The default generator is created on first use, or by warmup())
 
 from .exceptions import InitializationError
-from .impl import generate, generate_slug, get_combinations_count,\
-    RandomGenerator, replace_random
+from .impl import generate, generate_slug, generate_many, generate_slug_many,\
+    get_combinations_count, RandomGenerator, replace_random, warmup,\
+    ThreadLocalRandom, use_random
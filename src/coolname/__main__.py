@@ -1,21 +1,127 @@
 import argparse
+import csv
+import json
+import os
 import sys
 
-from coolname import generate
+from coolname import RandomGenerator, InitializationError
+
+
+# Number of slugs generated and written at once
+CHUNK_SIZE = 100000
 
 
 def parse_args(argv):
-    parser = argparse.ArgumentParser(description='Generate slug to stdout')
-    parser.add_argument('pattern', nargs='?', type=int, choices=[2, 3, 4], default=None)
-    parser.add_argument('-s', '--separator', default='-')
+    parser = argparse.ArgumentParser(description='Generate slugs to stdout')
+    parser.add_argument('pattern', nargs='?', default=None,
+                        help='number of words (2, 3 or 4) or other pattern defined in config')
+    parser.add_argument('-s', '--separator', default='-', help='separator between words (default: -)')
     parser.add_argument('-n', '--number', type=int, default=1, help='how many slugs to generate (default: 1)')
-    return parser.parse_args(argv)
+    parser.add_argument('-j', '--jobs', '-w', '--workers', type=int, default=None,
+                        help='generate in parallel using this many processes')
+    parser.add_argument('--seed', default=None,
+                        help='random seed (same seed gives the same output, regardless of --jobs)')
+    parser.add_argument('-u', '--unique', action='store_true',
+                        help='never repeat slugs (only until all combinations are exhausted)')
+    parser.add_argument('-c', '--config', default=None,
+                        help='config file or directory, or snapshot file (*.cnsnap)')
+    parser.add_argument('-f', '--format', choices=['text', 'json', 'ndjson', 'csv'], default='text',
+                        help='output format (default: text)')
+    parser.add_argument('-0', '--null', action='store_true',
+                        help='end each slug with NUL instead of newline (text format only)')
+    args = parser.parse_args(argv)
+    if args.null and args.format != 'text':
+        parser.error('--null can be used only with text format')
+    if args.unique and args.jobs and args.jobs > 1:
+        parser.error('--unique can not be used with --jobs')
+    if args.number < 0:
+        parser.error('--number must be non-negative')
+    if args.pattern is not None and args.pattern.isdigit():
+        args.pattern = int(args.pattern)
+    return args
+
+
+def load_generator(path):
+    """Returns generator for path to config or snapshot, or default generator if path is None."""
+    if path is None:
+        from coolname.impl import _get_default
+        return _get_default()
+    from coolname.snapshot import SNAPSHOT_EXTENSION, load_cached
+    if path.endswith(SNAPSHOT_EXTENSION):
+        return RandomGenerator.from_snapshot(path)
+    # Uses COOLNAME_CACHE_DIR (if set)
+    return load_cached(path)
+
+
+def generate_chunks(generator, args):
+    """Yields lists of slugs."""
+    if args.unique:
+        key = os.urandom(16) if args.seed is None else args.seed
+        sequence = generator.unique_sequence(key, args.pattern)
+        next_slug = sequence.next_slug
+        separator = args.separator
+        for start in range(0, args.number, CHUNK_SIZE):
+            chunk = []
+            try:
+                for _ in range(min(CHUNK_SIZE, args.number - start)):
+                    chunk.append(next_slug(separator))
+            except StopIteration:
+                yield chunk
+                raise ValueError('Only {} unique slugs can be generated'.format(start + len(chunk)))
+            yield chunk
+    elif args.jobs or args.seed is not None:
+        yield from generator.generate_parallel(args.number, args.pattern, args.separator,
+                                               workers=args.jobs or 1, seed=args.seed, chunk_size=CHUNK_SIZE)
+    else:
+        for start in range(0, args.number, CHUNK_SIZE):
+            yield generator.generate_slug_many(min(CHUNK_SIZE, args.number - start), args.pattern, args.separator)
+
+
+def write_chunks(chunks, output_format, null, file):
+    """Writes chunks of slugs to file in given format."""
+    if output_format == 'text':
+        end = '\0' if null else '\n'
+        for chunk in chunks:
+            if chunk:
+                file.write(end.join(chunk) + end)
+    elif output_format == 'ndjson':
+        dumps = json.dumps
+        for chunk in chunks:
+            if chunk:
+                file.write('\n'.join(map(dumps, chunk)) + '\n')
+    elif output_format == 'json':
+        file.write('[')
+        prefix = ''
+        for chunk in chunks:
+            if chunk:
+                # List without brackets
+                file.write(prefix + json.dumps(chunk, separators=(',', ':'))[1:-1])
+                prefix = ','
+        file.write(']\n')
+    elif output_format == 'csv':
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['slug'])
+        for chunk in chunks:
+            writer.writerows([x] for x in chunk)
 
 
-def main():
-    args = parse_args(sys.argv[1:])
-    for _ in range(args.number):
-        print(args.separator.join(generate(args.pattern)))
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        generator = load_generator(args.config)
+        if args.pattern not in generator._lists:
+            raise ValueError('Invalid pattern: {}'.format(args.pattern))
+        write_chunks(generate_chunks(generator, args), args.format, args.null, sys.stdout)
+        sys.stdout.flush()
+    except (InitializationError, ValueError) as ex:
+        sys.stdout.flush()
+        sys.stderr.write('coolname: error: {}\n'.format(ex))
+        sys.exit(1)
+    except BrokenPipeError:  # pragma: no cover
+        # Output is piped to a command which exited early (e.g. head).
+        # Redirect the rest of output to devnull, to avoid another error at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,28 @@
+"""
+Helpers for writing files.
+"""
+
+
+from contextlib import contextmanager
+import os
+from typing import BinaryIO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """
+    Opens a temporary file for binary writing, and replaces path with it on exit.
+    Readers see either old or new version of the file.
+    If an exception is raised, path is not changed.
+    """
+    # tempfile is imported on demand, it's slow to import
+    import tempfile
+    path = os.path.abspath(path)
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path), suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
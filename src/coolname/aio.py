@@ -0,0 +1,177 @@
+"""
+This module provides asyncio interface for generating names.
+
+Names are generated in executor (by default, in the thread pool of the event loop),
+so the event loop is never blocked, even if generate() has to retry many times
+because of ensure_unique or other constraints.
+
+Random number generator set by use_random() is respected.
+"""
+
+
+import asyncio
+from bisect import bisect_left
+from collections import deque
+import contextvars
+from functools import partial
+import time
+
+from .impl import _get_default
+
+
+async def _run(executor, func, *args):
+    # run_in_executor doesn't pass context (i.e. use_random) to the executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(contextvars.copy_context().run, func, *args))
+
+
+async def generate(pattern=None, generator=None, executor=None):
+    """
+    Generates and returns random name as a list of strings.
+
+    If generator is not given, the default generator is used.
+    """
+    return await _run(executor, (generator or _get_default()).generate, pattern)
+
+
+async def generate_slug(pattern=None, generator=None, executor=None):
+    """
+    Generates and returns random name as a slug.
+
+    If generator is not given, the default generator is used.
+    """
+    return await _run(executor, (generator or _get_default()).generate_slug, pattern)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies (in seconds).
+
+    Bucket i counts latencies in range (bounds[i - 1], bounds[i]],
+    the last bucket counts latencies greater than bounds[-1].
+    """
+
+    # 1 microsecond, 10 microseconds, ..., 1 second
+    bounds = (0.000001, 0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        self.counts[bisect_left(self.bounds, latency)] += 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def quantile(self, q):
+        """
+        Returns upper bound of the bucket which contains q-quantile (0 <= q <= 1),
+        or max if it's in the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def __repr__(self):
+        return '<{} count={} mean={:.6f} max={:.6f}>'.format(
+            self.__class__.__name__, self.count, self.total / self.count if self.count else 0.0, self.max)
+
+
+class SlugStream:
+    """
+    Asynchronous iterator of random slugs.
+
+    Slugs are generated by batches of batch_size in executor and kept in a buffer.
+    When buffer holds buffer_size slugs, generation pauses until they are consumed (backpressure).
+
+    latency is LatencyHistogram of time each consumer waited for the next slug;
+    it stays near zero as long as the buffer keeps up with consumers.
+
+        async with SlugStream() as stream:
+            async for slug in stream:
+                ...
+    """
+
+    def __init__(self, generator=None, pattern=None, separator='-',
+                 buffer_size=1000, batch_size=100, executor=None):
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+        if buffer_size < batch_size:
+            raise ValueError('buffer_size must be greater or equal to batch_size')
+        self._generator = generator
+        self._pattern = pattern
+        self._separator = separator
+        self._batch_size = batch_size
+        self._executor = executor
+        self._batches = asyncio.Queue(maxsize=buffer_size // batch_size)
+        self._current = deque()
+        self._task = None
+        self._error = None
+        self._closed = False
+        self.latency = LatencyHistogram()
+
+    async def _fill(self):
+        generator = self._generator or _get_default()
+        while True:
+            try:
+                batch = await _run(self._executor, generator.generate_slug_many,
+                                   self._batch_size, self._pattern, self._separator)
+            except Exception as ex:
+                # Re-raise in consumer
+                await self._batches.put(ex)
+                return
+            # Waits if buffer is full
+            await self._batches.put(batch)
+
+    async def next(self):
+        """Returns next slug."""
+        if self._closed:
+            raise RuntimeError('Stream is closed')
+        start = time.perf_counter()
+        if not self._current:
+            if self._task is None:
+                # Task is created on first use, because it needs running event loop
+                self._task = asyncio.create_task(self._fill())
+            if self._error is not None:
+                raise self._error
+            batch = await self._batches.get()
+            if isinstance(batch, Exception):
+                self._error = batch
+                raise batch
+            self._current.extend(batch)
+        slug = self._current.popleft()
+        self.latency.add(time.perf_counter() - start)
+        return slug
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        return await self.next()
+
+    async def aclose(self):
+        """Stops generation. Batch which is being generated in executor is discarded."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
@@ -0,0 +1,596 @@
+"""
+Benchmark suite for coolname.
+
+Usage:
+
+    python -m coolname.bench -o baseline.json
+    # ... change something ...
+    python -m coolname.bench --compare baseline.json
+
+Results are printed as JSON (to stdout or to file), summary is printed to stderr.
+With --compare, exit code is 1 if any metric is worse than in the baseline by more than --threshold.
+
+Metrics are grouped (see GROUPS); use --group to run only some of them,
+and --quick to use smaller sample sizes.
+"""
+
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import string
+import subprocess
+import sys
+import threading
+import time
+
+
+# Executed in a separate process to measure memory of one generator
+_MEMORY_SCRIPT = '''
+import gc, os, sys, tracemalloc
+from coolname import RandomGenerator
+from coolname.loader import load_config
+
+
+def rss():
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+dataset, mode, metric, size, data_dir = sys.argv[1:]
+if metric == 'allocated':
+    tracemalloc.start()
+base = rss()
+if dataset == 'default':
+    config = load_config(data_dir)
+    config['all']['__nocheck'] = True  # same as the default generator
+else:
+    config = {
+        'all': {'type': 'cartesian', 'lists': ['adjective', 'noun']},
+        'adjective': {'type': 'words', 'words': ['adj%d' % i for i in range(1000)]},
+        'noun': {'type': 'words', 'words': ['noun%07d' % i for i in range(int(size))]},
+    }
+    if dataset == 'mapped':
+        # Same nouns in a word file (data_dir is path to the file)
+        config['noun'] = {'type': 'words', 'file': data_dir}
+generator = RandomGenerator(config, compact=mode == 'compact')
+del config
+gc.collect()
+if metric == 'allocated':
+    print(tracemalloc.get_traced_memory()[0])
+else:
+    print(rss() - base)
+'''
+
+
+# Executed in a separate process to measure time of creating one generator (total and by phase)
+_CONSTRUCT_SCRIPT = '''
+import json, sys, time
+from coolname import RandomGenerator
+from coolname.bench import _nested_config, _synthetic_config
+from coolname.loader import load_config
+from coolname.profile import ConstructionProfile
+dataset, mode, size, data_dir = sys.argv[1:]
+with ConstructionProfile() as profile:
+    if dataset == 'default':
+        config = load_config(data_dir)
+        config['all']['__nocheck'] = True  # same as the default generator
+    elif dataset == 'nested':
+        config = _nested_config(int(size), int(size) * 400)
+    else:
+        config = _synthetic_config(int(size))
+    start = time.perf_counter()
+    RandomGenerator(config, compact=mode == 'compact')
+    total = time.perf_counter() - start
+print(json.dumps(dict(profile.phases(), total=total)))
+'''
+
+
+# Executed in a separate process to measure time of creating the default generator
+_WARMUP_SCRIPT = '''
+import time
+import coolname
+start = time.perf_counter()
+coolname.warmup()
+print(time.perf_counter() - start)
+'''
+
+
+def _metric(value, unit, better='lower'):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _run_python(code, *args, env=None):
+    """Runs Python code in a clean process (with the same coolname), returns its stdout."""
+    import coolname
+    env = dict(os.environ, **(env or {}))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(coolname.__file__)))] +
+        ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    return subprocess.check_output([sys.executable, '-c', code, *args], env=env, text=True)
+
+
+def _synthetic_nouns(size):
+    """Returns size distinct sorted words ('nounaaaaaa', 'nounaaaaab', ...), valid for word files too."""
+    return ['noun' + ''.join(x) for x in itertools.islice(itertools.product(string.ascii_lowercase, repeat=6), size)]
+
+
+def _synthetic_config(size):
+    return {
+        'all': {'type': 'cartesian', 'lists': ['adjective', 'noun']},
+        'adjective': {'type': 'words', 'words': ['adj{}'.format(i) for i in range(1000)]},
+        'noun': {'type': 'words', 'words': _synthetic_nouns(size)},
+    }
+
+
+def _write_synthetic_word_file(path, size):
+    """Writes nouns of _synthetic_config to a word file (see coolname.mapped) and builds its index."""
+    from coolname.mapped import build_index
+    with open(path, 'w') as file:
+        file.write(''.join(x + '\n' for x in _synthetic_nouns(size)))
+    build_index(path)
+
+
+def _write_synthetic_data_dir(path, size, phrases=False):
+    """
+    Same as _synthetic_config, but as *.txt files (words can contain only letters).
+    If phrases is True, nouns are two-word phrases.
+    """
+    def letters(i):
+        return ''.join(chr(ord('a') + int(x)) for x in '{:07d}'.format(i))
+
+    os.mkdir(path)
+    with open(os.path.join(path, 'config.json'), 'w') as file:
+        json.dump({'all': {'type': 'cartesian', 'lists': ['adjective', 'noun']}}, file)
+    for name, count in (('adjective', 1000), ('noun', size)):
+        separator = ' ' if phrases and name == 'noun' else ''
+        with open(os.path.join(path, name + '.txt'), 'w') as file:
+            file.write('\n'.join(name + separator + letters(i) for i in range(count)) + '\n')
+
+
+def _nested_config(nodes, words, depth=8):
+    """
+    Config with many nested lists over overlapping vocabularies, in depth layers.
+    Each nested list has its own word list (taken from a common vocabulary of words // 4 words)
+    and two nested lists of the previous layer, so most nested lists are shared by two parents.
+    """
+    import random
+    rand = random.Random(0)
+    vocabulary = ['w{}'.format(i) for i in range(max(1000, words // 4))]
+    size = max(1, words // nodes)
+    width = max(2, nodes // depth)
+    config = {}
+    for i in range(width * depth):
+        layer, j = divmod(i, width)
+        lists = ['words{}'.format(i)]
+        if layer:
+            lists += ['nested{}'.format((layer - 1) * width + (j + k) % width) for k in (0, 1)]
+        config['words{}'.format(i)] = {'type': 'words', 'words': rand.sample(vocabulary, size)}
+        config['nested{}'.format(i)] = {'type': 'nested', 'lists': lists}
+    top = ['nested{}'.format((depth - 1) * width + j) for j in range(width)]
+    config['left'] = {'type': 'nested', 'lists': top[:width // 2]}
+    config['right'] = {'type': 'nested', 'lists': top[width // 2:]}
+    config['all'] = {'type': 'cartesian', 'lists': ['left', 'right']}
+    return config
+
+
+def _default_data_dir():
+    import coolname
+    return os.path.join(os.path.dirname(os.path.abspath(coolname.__file__)), 'data')
+
+
+def bench_import(quick):
+    """Time of import and of creating the default generator, in a clean process."""
+    code = ('import time; start = time.perf_counter(); import coolname; imported = time.perf_counter(); '
+            'coolname.warmup(); print(imported - start, time.perf_counter() - imported)')
+    runs = sorted((tuple(map(float, _run_python(code).split())) for _ in range(3 if quick else 7)))
+    median = runs[len(runs) // 2]
+    return {
+        'import.time': _metric(median[0], 's'),
+        'import.warmup_time': _metric(median[1], 's'),
+    }
+
+
+def bench_construct(quick):
+    """
+    Time of creating generators from config (in a clean process, so that nothing is cached),
+    from snapshot and from compile cache (see COOLNAME_CACHE_DIR).
+    """
+    import tempfile
+    from coolname import RandomGenerator
+    from coolname.impl import _compile
+    from coolname.loader import load_config
+    results = {}
+    size = 100000 if quick else 1000000
+    for dataset in ('default', 'synthetic'):
+        name = dataset if dataset == 'default' else 'synthetic_{}'.format(size)
+        for mode in ('normal', 'compact'):
+            runs = [json.loads(_run_python(_CONSTRUCT_SCRIPT, dataset, mode, str(size), _default_data_dir()))
+                    for _ in range(3)]
+            prefix = 'construct.{}{}'.format(name, '_compact' if mode == 'compact' else '')
+            results[prefix] = _metric(sorted(x['total'] for x in runs)[1], 's')
+            # Each phase separately (see coolname.profile)
+            for phase in runs[0]:
+                if phase not in ('total', 'RandomGenerator'):
+                    results['{}.phase.{}'.format(prefix, phase)] = _metric(sorted(x[phase] for x in runs)[1], 's')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'default.cnsnap')
+        RandomGenerator(load_config(_default_data_dir())).save_snapshot(path)
+        times = []
+        for _ in range(20):
+            start = time.perf_counter()
+            RandomGenerator.from_snapshot(path)
+            times.append(time.perf_counter() - start)
+        results['construct.default_snapshot'] = _metric(min(times), 's')
+        # Cold and warm start of the default generator with COOLNAME_CACHE_DIR
+        synthetic_dir = os.path.join(temp_dir, 'synthetic')
+        _write_synthetic_data_dir(synthetic_dir, size)
+        for name, data_dir in (('default', _default_data_dir()), ('synthetic_txt_{}'.format(size), synthetic_dir)):
+            env = {'COOLNAME_DATA_DIR': data_dir}
+            results['construct.{}.uncached'.format(name)] = _metric(
+                sorted(float(_run_python(_WARMUP_SCRIPT, env=env)) for _ in range(3))[1], 's')
+            cold, warm = [], []
+            for i in range(3):
+                env['COOLNAME_CACHE_DIR'] = os.path.join(temp_dir, 'cache_{}_{}'.format(name, i))
+                cold.append(float(_run_python(_WARMUP_SCRIPT, env=env)))
+                warm.append(float(_run_python(_WARMUP_SCRIPT, env=env)))
+            results['construct.{}.cache_cold'.format(name)] = _metric(sorted(cold)[1], 's')
+            results['construct.{}.cache_warm'.format(name)] = _metric(sorted(warm)[1], 's')
+        # Large *.txt files: load_config + RandomGenerator vs. single-pass compile (used by the default generator)
+        phrases_dir = os.path.join(temp_dir, 'synthetic_phrases')
+        _write_synthetic_data_dir(phrases_dir, size, phrases=True)
+        for name, data_dir in (('synthetic_txt_{}'.format(size), synthetic_dir),
+                               ('synthetic_phrases_txt_{}'.format(size), phrases_dir)):
+            for method, func in (('load_config', lambda: RandomGenerator(load_config(data_dir))),
+                                 ('compile', lambda: _compile(data_dir))):
+                times = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    func()
+                    times.append(time.perf_counter() - start)
+                results['construct.{}.{}'.format(name, method)] = _metric(min(times), 's')
+        # Word file (see coolname.mapped): building index once, then opening with the existing index
+        word_file = os.path.join(temp_dir, 'noun.words')
+        start = time.perf_counter()
+        _write_synthetic_word_file(word_file, size)
+        results['construct.synthetic_{}_mapped.index'.format(size)] = _metric(time.perf_counter() - start, 's')
+        config = _synthetic_config(size)
+        config['noun'] = {'type': 'words', 'file': word_file}
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            RandomGenerator(config)
+            times.append(time.perf_counter() - start)
+        results['construct.synthetic_{}_mapped'.format(size)] = _metric(min(times), 's')
+    return results
+
+
+def bench_latency(quick):
+    """Percentiles of generate() and generate_slug() latency, for each pattern of the default generator."""
+    from coolname.impl import _get_default
+    generator = _get_default()
+    number = 2000 if quick else 20000
+    perf_counter_ns = time.perf_counter_ns
+    results = {}
+    for pattern in (None, 2, 3, 4):
+        for method in ('generate', 'generate_slug'):
+            func = getattr(generator, method)
+            latencies = []
+            for _ in range(number):
+                start = perf_counter_ns()
+                func(pattern)
+                latencies.append(perf_counter_ns() - start)
+            latencies.sort()
+            for q in (0.5, 0.9, 0.99):
+                name = 'latency.{}.{}.p{}'.format(method, pattern or 'default', int(q * 100))
+                results[name] = _metric(_percentile(latencies, q) / 1000, 'us')
+    return results
+
+
+def bench_throughput(quick):
+    """Number of slugs per second, in a loop and in batches."""
+    from coolname.impl import _get_default
+    generator = _get_default()
+    number = 20000 if quick else 200000
+    results = {}
+    # First call of each method takes longer
+    generator.generate_slug()
+    generator.generate_slug_many(1000)
+    start = time.perf_counter()
+    for _ in range(number):
+        generator.generate_slug()
+    results['throughput.generate_slug'] = _metric(number / (time.perf_counter() - start), 'slugs/s', 'higher')
+    start = time.perf_counter()
+    generator.generate_slug_many(number)
+    results['throughput.generate_slug_many'] = _metric(number / (time.perf_counter() - start), 'slugs/s', 'higher')
+    try:
+        import numpy
+    except ImportError:
+        pass
+    else:
+        rand = generator.random
+        generator.random = numpy.random.default_rng()
+        try:
+            generator.generate_slug_many(1000)
+            start = time.perf_counter()
+            generator.generate_slug_many(number)
+            results['throughput.generate_slug_many_numpy'] = _metric(
+                number / (time.perf_counter() - start), 'slugs/s', 'higher')
+        finally:
+            generator.random = rand
+    return results
+
+
+def bench_memory(quick):
+    """Memory used by one generator (RSS growth and allocated by Python objects), in a separate process."""
+    import tempfile
+    size = 100000 if quick else 1000000
+    results = {}
+    for dataset in ('default', 'synthetic'):
+        name = dataset if dataset == 'default' else 'synthetic_{}'.format(size)
+        for mode in ('normal', 'compact'):
+            for metric in ('rss', 'allocated'):
+                value = int(_run_python(_MEMORY_SCRIPT, dataset, mode, metric, str(size), _default_data_dir()))
+                results['memory.{}.{}{}'.format(metric, name, '_compact' if mode == 'compact' else '')] = \
+                    _metric(value // 1024, 'KiB')
+    # Nouns in a word file (see coolname.mapped), with index built in advance
+    with tempfile.TemporaryDirectory() as temp_dir:
+        word_file = os.path.join(temp_dir, 'noun.words')
+        _write_synthetic_word_file(word_file, size)
+        for metric in ('rss', 'allocated'):
+            value = int(_run_python(_MEMORY_SCRIPT, 'mapped', 'normal', metric, str(size), word_file))
+            results['memory.{}.synthetic_{}_mapped'.format(metric, size)] = _metric(value // 1024, 'KiB')
+    return results
+
+
+def bench_threads(quick):
+    """
+    Throughput with several threads, with shared random and with ThreadLocalRandom.
+    Scaling is near-linear only on free-threaded builds of CPython.
+    """
+    from coolname import RandomGenerator, ThreadLocalRandom
+    from coolname.impl import _get_default
+    number = 5000 if quick else 50000
+    results = {'threads.gil_enabled': _metric(int(getattr(sys, '_is_gil_enabled', lambda: True)()), 'bool', 'none')}
+    for rand_name, rand in (('shared', None), ('thread_local', ThreadLocalRandom())):
+        generator = RandomGenerator.__new__(RandomGenerator)
+        generator.__dict__.update(_get_default().__dict__)
+        generator.random = rand
+
+        def target():
+            for _ in range(number):
+                generator.generate_slug()
+
+        single = None
+        for thread_count in (1, 2, 4, 8):
+            threads = [threading.Thread(target=target) for _ in range(thread_count)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            throughput = thread_count * number / (time.perf_counter() - start)
+            single = single or throughput
+            results['threads.{}.{}'.format(rand_name, thread_count)] = _metric(throughput, 'slugs/s', 'higher')
+            if thread_count > 1:
+                results['threads.{}.{}.scaling'.format(rand_name, thread_count)] = \
+                    _metric(throughput / single, 'x', 'higher')
+    return results
+
+
+def bench_fanout(quick):
+    """generate() latency depending on fan-out of NestedList."""
+    from coolname import RandomGenerator
+    number = 2000 if quick else 20000
+    results = {}
+    for fanout in (5, 50, 500, 5000):
+        config = {'all': {'type': 'nested', 'lists': ['team{}'.format(i) for i in range(fanout)]}}
+        for i in range(fanout):
+            config['team{}'.format(i)] = {'type': 'cartesian', 'lists': ['adj{}'.format(i), 'noun{}'.format(i)]}
+            config['adj{}'.format(i)] = {'type': 'words', 'words': ['adj{}x{}'.format(i, j) for j in range(i % 7 + 1)]}
+            config['noun{}'.format(i)] = {'type': 'words', 'words': ['noun{}x{}'.format(i, j) for j in range(10)]}
+        generator = RandomGenerator(config)
+        start = time.perf_counter()
+        for _ in range(number):
+            generator.generate()
+        results['fanout.{}'.format(fanout)] = _metric((time.perf_counter() - start) / number * 1000000, 'us')
+    return results
+
+
+def bench_scaling(quick):
+    """
+    Time of creating generators from configs with many nested lists (up to 5000 lists and 2M words),
+    in a clean process. Growth is time per nested list of the biggest config relative to the smallest one,
+    so it's close to 1 if construction time is linear.
+    """
+    sizes = (156, 312, 625) if quick else (625, 1250, 2500, 5000)
+    results = {}
+    for size in sizes:
+        phases = json.loads(_run_python(_CONSTRUCT_SCRIPT, 'nested', 'normal', str(size), _default_data_dir()))
+        results['scaling.nested_{}'.format(size)] = _metric(phases['total'], 's')
+        results['scaling.nested_{}.phase.squash'.format(size)] = _metric(phases['squash'], 's')
+    first, last = [results['scaling.nested_{}'.format(x)]['value'] for x in (sizes[0], sizes[-1])]
+    results['scaling.growth'] = _metric(last / first * sizes[0] / sizes[-1], 'x')
+    return results
+
+
+REGISTRY_ROWS = (0, 10 ** 6, 10 ** 7, 10 ** 8)
+
+
+def bench_registry(quick, rows=None):
+    """
+    SlugRegistry throughput depending on number of names issued before.
+
+    rows is a sequence of table sizes (REGISTRY_ROWS by default, or (0, 100000) if quick).
+    """
+    import tempfile
+    from coolname.impl import _get_default
+    from coolname.registry import SlugRegistry
+    generator = _get_default()
+    number = 10000 if quick else 100000
+    results = {}
+    if rows is None:
+        rows = (0, 100000) if quick else REGISTRY_ROWS
+    for count in rows:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            registry = SlugRegistry(generator, os.path.join(temp_dir, 'registry.db'), block_size=10000)
+            # Fill the table with random ids, without generating names
+            registry._connection.execute(
+                'INSERT OR IGNORE INTO coolname_issued (id) '
+                'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT ?) '
+                'SELECT abs(random()) % ? FROM c', (count, generator._lists[None].length))
+            start = time.perf_counter()
+            registry.generate_slug_many(number)
+            results['registry.{}'.format(count)] = _metric(number / (time.perf_counter() - start), 'slugs/s', 'higher')
+            registry.close()
+    return results
+
+
+GROUPS = {
+    'import': bench_import,
+    'construct': bench_construct,
+    'latency': bench_latency,
+    'throughput': bench_throughput,
+    'memory': bench_memory,
+    'threads': bench_threads,
+    'fanout': bench_fanout,
+    'scaling': bench_scaling,
+    'registry': bench_registry,
+}
+
+
+def run(groups=None, quick=False, log=None, registry_rows=None):
+    """
+    Runs benchmark groups (all by default), returns results as JSON-serializable dict.
+
+    registry_rows overrides table sizes for the registry group.
+    """
+    from coolname import __version__
+    metrics = {}
+    for group in groups or GROUPS:
+        if log:
+            log('Running {}...'.format(group))
+        if group == 'registry':
+            metrics.update(bench_registry(quick, registry_rows))
+        else:
+            metrics.update(GROUPS[group](quick))
+    return {
+        'coolname': __version__,
+        'python': sys.version,
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'metrics': metrics,
+    }
+
+
+def compare(baseline, results, threshold):
+    """
+    Compares results with baseline.
+
+    Returns list of tuples (name, baseline value, value, relative change, regressed),
+    where relative change is positive if metric got worse.
+    Metrics which are missing in either of results are skipped.
+    """
+    rows = []
+    baseline_metrics = baseline['metrics']
+    for name, metric in sorted(results['metrics'].items()):
+        if name not in baseline_metrics or metric['better'] not in ('lower', 'higher'):
+            continue
+        old, new = baseline_metrics[name]['value'], metric['value']
+        worse = new - old if metric['better'] == 'lower' else old - new
+        if old:
+            change = worse / abs(old)
+        else:
+            change = 0.0 if new == old else float('inf') if worse > 0 else float('-inf')
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+
+def format_results(results):
+    lines = []
+    for name, metric in sorted(results['metrics'].items()):
+        lines.append('{:<60} {:>16,.3f} {}'.format(name, metric['value'], metric['unit']))
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for name, old, new, change, regressed in rows:
+        lines.append('{:<60} {:>14,.3f} -> {:>14,.3f} {:>+8.1%}{}'.format(
+            name, old, new, change, '  REGRESSION' if regressed else ''))
+    return '\n'.join(lines)
+
+
+def _parse_rows(value):
+    try:
+        rows = tuple(int(float(x)) for x in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected comma-separated numbers: {!r}'.format(value))
+    if any(x < 0 for x in rows):
+        raise argparse.ArgumentTypeError('negative number of rows: {!r}'.format(value))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m coolname.bench', description='Benchmark coolname')
+    parser.add_argument('-g', '--group', action='append', choices=list(GROUPS),
+                        help='run only this group of metrics (can be repeated)')
+    parser.add_argument('-q', '--quick', action='store_true', help='use smaller sample sizes')
+    parser.add_argument('--registry-rows', type=_parse_rows, metavar='N,N,...',
+                        help='table sizes for registry group, e.g. 0,1e6 (default: {})'.format(
+                            ','.join('{:g}'.format(x) for x in REGISTRY_ROWS)))
+    parser.add_argument('-o', '--output', help='save results to this file instead of printing them')
+    parser.add_argument('-r', '--results', help="don't run benchmarks, load results from this file")
+    parser.add_argument('-c', '--compare', metavar='BASELINE', help='compare results with baseline file')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help='with --compare, fail if any metric is worse by more than this fraction (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    def log(message):
+        sys.stderr.write(message + '\n')
+        sys.stderr.flush()
+
+    if args.results:
+        with open(args.results) as file:
+            results = json.load(file)
+    else:
+        results = run(args.group, args.quick, log, args.registry_rows)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compare(baseline, results, args.threshold)
+        log(format_comparison(rows))
+        regressions = sum(x[4] for x in rows)
+        if regressions:
+            log('{} metric(s) regressed by more than {:.0%}'.format(regressions, args.threshold))
+            return 1
+    else:
+        log(format_results(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,6 +14,7 @@ class _CONF:
         TYPE = 'type'
         LISTS = 'lists'
         WORDS = 'words'
+        FILE = 'file'
         PHRASES = 'phrases'
         NUMBER_OF_WORDS = 'number_of_words'
         VALUE = 'value'
@@ -1,19 +1,26 @@
 """
 Do not import anything directly from this module.
 """
-from functools import partial
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, cache, lru_cache
 import hashlib
 import itertools
+import json
 import os
 import os.path as op
 import random
-from random import randrange, Random
+from random import Random
 import re
+import threading
 import typing
-from typing import Mapping, Callable, Any
+from typing import Mapping, Callable, Any, Iterable, Iterator, Sequence, TypeVar
 
 from .config import _CONF
 from .exceptions import ConfigurationError, InitializationError
+from .profile import _profile
 
 if typing.TYPE_CHECKING:
     HashType = hashlib._Hash  # pragma: no cover
@@ -30,10 +37,115 @@ except TypeError:  # pragma: no cover
     _md5 = hashlib.md5
 
 
+# Largest index which fits into int64 (used for NumPy arrays)
+_INT64_MAX = 2**63 - 1
+
+
+@cache
+def _import_numpy():
+    """Returns numpy module if it's installed, otherwise None."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:  # pragma: no cover
+        return None
+
+
+def _numpy_randrange(rand, stop: int) -> int:
+    """randrange() implementation for numpy.random.Generator."""
+    if stop <= _INT64_MAX:
+        return int(rand.integers(stop))
+    # Too big for int64, build a random number from bytes
+    n_bits = stop.bit_length()
+    while True:
+        value = int.from_bytes(rand.bytes((n_bits + 7) // 8), 'little') >> (-n_bits % 8)
+        if value < stop:
+            return value
+
+
+def _is_numpy_random(rand: Any) -> bool:
+    """Returns True if rand is numpy.random.Generator."""
+    return hasattr(rand, 'integers') and not hasattr(rand, 'randrange')
+
+
+def _get_randrange(rand: Any) -> Callable[[int], int]:
+    """Returns randrange(stop) function of the random number generator."""
+    if _is_numpy_random(rand):
+        return partial(_numpy_randrange, rand)
+    return rand.randrange  # type: ignore
+
+
+class ThreadLocalRandom:
+    """
+    Random number generator which has separate state in each thread.
+
+    Threads don't compete for the same state, so generation scales with the number of threads.
+    Each thread gets its own random.Random instance on first use.
+    If seed is given, thread states are seeded with (seed, n),
+    where n is the number of thread in order of first use.
+    """
+
+    def __init__(self, seed: int | str | bytes | None = None):
+        self._seed = seed
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _create(self) -> Random:
+        with self._lock:
+            n = self._count
+            self._count += 1
+        rand = Random(None if self._seed is None else '{!r}/{}'.format(self._seed, n))
+        self._local.random = rand
+        self._local.randrange = rand.randrange
+        return rand
+
+    def randrange(self, *args: int) -> int:
+        try:
+            randrange = self._local.randrange
+        except AttributeError:
+            randrange = self._create().randrange
+        return randrange(*args)  # type: ignore
+
+    def __getattr__(self, name: str) -> Any:
+        # Other methods of random.Random (random(), choice() etc.)
+        if not hasattr(Random, name):
+            raise AttributeError('{!r} object has no attribute {!r}'.format(self.__class__.__name__, name))
+        try:
+            rand = self._local.random
+        except AttributeError:
+            rand = self._create()
+        return getattr(rand, name)
+
+    def __reduce__(self) -> tuple:
+        # Thread states are not pickled, they are created anew
+        return self.__class__, (self._seed,)
+
+
+# Random number generator set by use_random() for the current context (thread or asyncio task)
+_context_random: ContextVar[Any] = ContextVar('coolname_random', default=None)
+
+
+@contextmanager
+def use_random(rand: Any) -> Iterator[None]:
+    """
+    Context manager which makes all generators use rand in the current context
+    (thread or asyncio task), unless rand is given explicitly.
+    """
+    token = _context_random.set(rand)
+    try:
+        yield
+    finally:
+        _context_random.reset(token)
+
+
 class AbstractNestedList:
 
     length: int  # pragma: no cover
 
+    # True if items are unique single words in code point order (see _SortedKeyCounts)
+    _sorted = False
+
     def __init__(self, lists):
         super().__init__()
         self._lists = [WordList(x) if x.__class__ is list else x
@@ -51,6 +163,33 @@ class AbstractNestedList:
     def __getitem__(self, item: int) -> str | list[str]:
         raise NotImplementedError  # pragma: no cover
 
+    def get_many(self, indices: Sequence[int]) -> list:
+        """Returns a list of items at given indices."""
+        return [self[i] for i in _to_list(indices)]
+
+    def _parse(self, words: Sequence[str], pos: int) -> Iterator[tuple[int, int]]:
+        """
+        Matches words[pos:] against the list.
+
+        Yields (index, end) for each item which is equal to words[pos:end],
+        in ascending order of index.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def _cost_counts(self, limit: int) -> list[int]:
+        """
+        Returns list of limit + 1 numbers: how many items have cost 0, 1, ..., limit.
+        Cost of item is the length of its slug plus one (i.e. each word costs len(word) + 1).
+        Items with cost greater than limit are not counted.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def _exact_index(self, a: int, cost: int, limit: int) -> int:
+        """
+        Returns index of a-th item (in some fixed order) among items with given cost.
+        """
+        raise NotImplementedError  # pragma: no cover
+
     def squash(self, hard, cache):
         if len(self._lists) == 1:
             return self._lists[0].squash(hard, cache)
@@ -67,6 +206,28 @@ class AbstractNestedList:
             sublist._dump(stream, indent, object_ids=object_ids)  # noqa
 
 
+# Convert NumPy array to list of Python integers
+def _to_list(indices):
+    try:
+        return indices.tolist()
+    except AttributeError:
+        return indices
+
+
+# Convert key to bytes, for hashing
+# (used for keyed permutations and key-to-slug mapping).
+# First byte is the type, so that int keys never give the same bytes as bytes or str keys.
+# str is the same key as its UTF-8 encoding.
+def _to_key_bytes(key: bytes | str | int) -> bytes:
+    if isinstance(key, bytes):
+        return b'b' + key
+    elif isinstance(key, str):
+        return b'b' + key.encode('utf-8')
+    elif isinstance(key, int):
+        return b'i' + key.to_bytes((key.bit_length() + 8) // 8, 'little', signed=True)
+    raise TypeError('Key must be bytes, str or int, got {}'.format(key.__class__.__name__))
+
+
 # Convert value to bytes, for hashing
 # (used to calculate WordList or PhraseList hash)
 def _to_bytes(value):
@@ -78,6 +239,90 @@ def _to_bytes(value):
         return value
 
 
+def _parse_flat(lst, words: Sequence[str], pos: int) -> Iterator[tuple[int, int]]:
+    """
+    Implementation of _parse() for word and phrase lists.
+    Reverse index is created on first call.
+    """
+    try:
+        reverse, phrase_lengths = lst._reverse
+    except AttributeError:
+        reverse = {}
+        for i, x in enumerate(lst):
+            reverse.setdefault(x, i)
+        phrase_lengths = sorted({len(x) for x in reverse}) if lst.multiword else []
+        lst._reverse = reverse, phrase_lengths
+    if not lst.multiword:
+        if pos < len(words):
+            i = reverse.get(words[pos])
+            if i is not None:
+                yield i, pos + 1
+    else:
+        matches = []
+        for n in phrase_lengths:
+            if pos + n > len(words):
+                break
+            i = reverse.get(tuple(words[pos:pos + n]))
+            if i is not None:
+                matches.append((i, pos + n))
+        yield from sorted(matches)
+
+
+def _flat_cost_table(lst) -> tuple[list[int], list[int], list[int]]:
+    """
+    Returns (order, counts, starts) for word or phrase list:
+    order is the list of indices sorted by cost,
+    counts[c] is the number of items with cost c,
+    items with cost c are order[starts[c]:starts[c + 1]].
+    """
+    table: tuple[list[int], list[int], list[int]]
+    try:
+        table = lst._cost_table
+        return table
+    except AttributeError:
+        pass
+    if lst.multiword:
+        costs = [sum(len(x) + 1 for x in phrase) for phrase in lst]
+    else:
+        costs = [len(x) + 1 for x in lst]
+    order = sorted(range(len(costs)), key=costs.__getitem__)
+    counts = [0] * (max(costs, default=0) + 1)
+    for cost in costs:
+        counts[cost] += 1
+    table = order, counts, [0, *itertools.accumulate(counts)]
+    lst._cost_table = table
+    return table
+
+
+def _flat_cost_counts(lst, limit: int) -> list[int]:
+    counts = _flat_cost_table(lst)[1]
+    return counts[:limit + 1] + [0] * (limit + 1 - len(counts))
+
+
+def _flat_exact_index(lst, a: int, cost: int, limit: int) -> int:
+    order, _, starts = _flat_cost_table(lst)
+    return order[starts[cost] + a]
+
+
+def _convolve(x: list[int], y: list[int], limit: int) -> list[int]:
+    """
+    If x[c] and y[c] are numbers of items with cost c in two lists,
+    returns numbers of pairs with cost c (up to limit).
+    """
+    result = [0] * (limit + 1)
+    y_nonzero = [(j, yj) for j, yj in enumerate(y) if yj]
+    for i, xi in enumerate(x):
+        if xi:
+            for j, yj in y_nonzero:
+                if i + j > limit:
+                    break
+                result[i + j] += xi * yj
+    return result
+
+
+_BasicListT = TypeVar('_BasicListT', bound='_BasicList')
+
+
 class _BasicList(list, AbstractNestedList):
 
     length: int  # pragma: no cover
@@ -87,6 +332,14 @@ class _BasicList(list, AbstractNestedList):
         AbstractNestedList.__init__(self, [])
         self.length = len(self)
         self.__hash = None
+        self._merged_parts: frozenset[bytes] | None = None
+
+    @classmethod
+    def _from_items(cls: type[_BasicListT], items: Iterable) -> _BasicListT:
+        """Creates list from items which are already validated and converted (e.g. phrases are tuples)."""
+        result = cls.__new__(cls)
+        _BasicList.__init__(result, items)
+        return result
 
     def __str__(self):
         ls = [repr(x) for x in self[:4]]
@@ -97,6 +350,13 @@ class _BasicList(list, AbstractNestedList):
     def __repr__(self):
         return self.__str__()
 
+    def get_many(self, indices: Sequence[int]) -> list:
+        return list(map(self.__getitem__, _to_list(indices)))
+
+    _parse = _parse_flat
+    _cost_counts = _flat_cost_counts
+    _exact_index = _flat_exact_index
+
     def squash(self, hard, cache):
         return self
 
@@ -111,6 +371,31 @@ class _BasicList(list, AbstractNestedList):
         self.__hash = md5.digest()
         return self.__hash
 
+    @property
+    def _parts(self) -> frozenset[bytes]:
+        # Hashes of the original lists this list was merged from (see _merge_lists)
+        return self._merged_parts or frozenset([self._hash])
+
+
+def _merge_lists(cls: type[_BasicList], lists: list, cache: dict) -> Any:
+    """
+    Returns list of sorted unique items of lists, or the same list from cache.
+
+    Merged list is identified by hashes of the original lists it consists of,
+    so that each word is hashed only once, no matter how many times it is merged.
+    """
+    parts = frozenset().union(*(x._parts for x in lists))
+    try:
+        return cache[parts]
+    except KeyError:
+        pass
+    # Merged lists are already sorted, and sorting a sequence of sorted runs is much faster
+    # than sorting a set. Duplicates are adjacent after sorting, dict.fromkeys removes them.
+    result = cls._from_items(dict.fromkeys(sorted(itertools.chain.from_iterable(lists))))
+    result._merged_parts = parts
+    cache[parts] = result
+    return result
+
 
 class WordList(_BasicList):
     """List of single words."""
@@ -125,6 +410,128 @@ class PhraseList(_BasicList):
         super().__init__(tuple(_split_phrase(x)) for x in sequence)
 
 
+def _pack_strings(strings) -> tuple[bytes, array]:
+    """
+    Packs strings into one UTF-8 blob and array of offsets (len(strings) + 1 items).
+    String i is blob[offsets[i]:offsets[i + 1]].
+    """
+    encoded = [x.encode('utf-8') for x in strings]
+    offsets = array('Q', [0, *itertools.accumulate(map(len, encoded))])
+    if offsets[-1] < 2**32:
+        offsets = array('I', offsets)
+    return b''.join(encoded), offsets
+
+
+class _PackedList(AbstractNestedList):
+    """
+    Base class for lists stored as one blob of UTF-8 bytes plus an array of offsets.
+
+    Blob and offsets can be anything that supports slicing / indexing:
+    bytes and array, or memoryview of mmap.
+    Strings are created only when an item is accessed.
+    """
+
+    length: int  # pragma: no cover
+
+    def __init__(self, blob, offsets):
+        super().__init__([])
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return map(self.__getitem__, range(self.length))
+
+    def __str__(self):
+        ls = [repr(self[i]) for i in range(min(self.length, 4))]
+        if len(ls) == 4:
+            ls[3] = '...'
+        return '{}([{}], len={})'.format(self.__class__.__name__, ', '.join(ls), self.length)
+
+    def _word(self, i: int) -> str:
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def _words(self) -> list[str]:
+        """Returns all strings at once (much faster than one by one)."""
+        blob = bytes(self._blob)
+        offsets = self._offsets.tolist()
+        text = blob.decode('utf-8')
+        if len(text) == len(blob):
+            # ASCII: byte offsets are the same as character offsets
+            return [text[a:b] for a, b in zip(offsets, offsets[1:])]
+        return [blob[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+
+    def __getstate__(self) -> dict:
+        # Data loaded from snapshot is memoryview of mmap, which can't be pickled
+        state = dict(self.__dict__)
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                state[name] = value.tobytes() if value.format == 'B' else array(value.format, value)
+        return state
+
+    _parse = _parse_flat
+    _cost_counts = _flat_cost_counts
+    _exact_index = _flat_exact_index
+
+    def squash(self, hard, cache):
+        return self
+
+
+class PackedWordList(_PackedList):
+    """List of single words, stored as a blob."""
+
+    def __init__(self, blob, offsets):
+        super().__init__(blob, offsets)
+        self.length = len(offsets) - 1
+
+    @classmethod
+    def pack(cls, words) -> 'PackedWordList':
+        return cls(*_pack_strings(words))
+
+    def unpack(self) -> WordList:
+        return WordList._from_items(self._words())
+
+    def __getitem__(self, i: int) -> str:
+        if i >= self.length:
+            raise IndexError('list index out of range')
+        return self._word(i)
+
+
+class PackedPhraseList(_PackedList):
+    """
+    List of phrases, stored as a blob.
+    Phrase i consists of words with numbers phrase_offsets[i]...phrase_offsets[i + 1] - 1.
+    """
+
+    multiword = True
+
+    def __init__(self, blob, offsets, phrase_offsets):
+        super().__init__(blob, offsets)
+        self._phrase_offsets = phrase_offsets
+        self.length = len(phrase_offsets) - 1
+
+    @classmethod
+    def pack(cls, phrases) -> 'PackedPhraseList':
+        blob, offsets = _pack_strings(itertools.chain.from_iterable(phrases))
+        phrase_offsets = array('Q', [0, *itertools.accumulate(map(len, phrases))])
+        if phrase_offsets[-1] < 2**32:
+            phrase_offsets = array('I', phrase_offsets)
+        return cls(blob, offsets, phrase_offsets)
+
+    def unpack(self) -> PhraseList:
+        words = self._words()
+        offsets = self._phrase_offsets.tolist()
+        return PhraseList._from_items([tuple(words[a:b]) for a, b in zip(offsets, offsets[1:])])
+
+    def __getitem__(self, i: int) -> tuple[str, ...]:  # type: ignore
+        if i >= self.length:
+            raise IndexError('list index out of range')
+        word = self._word
+        return tuple(word(j) for j in range(self._phrase_offsets[i], self._phrase_offsets[i + 1]))
+
+
 class WordAsPhraseWrapper:
 
     length: int  # pragma: no cover
@@ -140,6 +547,18 @@ class WordAsPhraseWrapper:
     def __getitem__(self, i: int) -> str | list[str]:
         return [self._list[i]]
 
+    def get_many(self, indices: Sequence[int]) -> list:
+        return [[x] for x in self._list.get_many(indices)]
+
+    def _parse(self, words: Sequence[str], pos: int) -> Iterator[tuple[int, int]]:
+        yield from self._list._parse(words, pos)
+
+    def _cost_counts(self, limit: int) -> list[int]:
+        return self._list._cost_counts(limit)  # type: ignore
+
+    def _exact_index(self, a: int, cost: int, limit: int) -> int:
+        return self._list._exact_index(a, cost, limit)  # type: ignore
+
     def squash(self, hard, cache):  # noqa
         return self
 
@@ -149,6 +568,11 @@ class WordAsPhraseWrapper:
     def __repr__(self):
         return f'{self.__class__.__name__}({self._list!r})'
 
+    def _dump(self, stream, indent='', object_ids=False):
+        stream.write(indent + str(self) +
+                     (f' [id={id(self)}]' if object_ids else '') +
+                     '\n')
+
 
 class TopLevelMultiWrapper(WordAsPhraseWrapper):
     """
@@ -168,67 +592,167 @@ class NestedList(AbstractNestedList):
 
     length: int  # pragma: no cover
     _lists: list[AbstractNestedList]  # pragma: no cover
+    _starts: list[int]  # pragma: no cover
+    # Cost counts for each limit (see _cost_counts)
+    _cost_cache: dict[int, tuple[list[int], list[list[int]]]]  # pragma: no cover
+    # Sublists of all levels, see _get_leaves
+    _leaves: tuple[list[int], list[Any]] | None  # pragma: no cover
 
     def __init__(self, lists):
         super().__init__(lists)
         # If user mixes WordList and PhraseList in the same NestedList,
         # we need to make sure that __getitem__ always returns tuple.
-        # For that, we wrap WordList instances.
+        # For that, we wrap WordList instances (and word files, see coolname.mapped).
         # Note that such mixing decreases performance somewhat, and it is avoided in default config.
-        if any(isinstance(x, WordList) for x in self._lists) and any(x.multiword for x in self._lists):
-            self._lists = [WordAsPhraseWrapper(x) if isinstance(x, WordList) else x for x in self._lists]
-        # Fattest lists first (to reduce average __getitem__ time)
+        if any(_is_words(x) for x in self._lists) and any(x.multiword for x in self._lists):
+            self._lists = [WordAsPhraseWrapper(x) if _is_words(x) else x for x in self._lists]
+        # Fattest lists first (historically, to reduce average __getitem__ time;
+        # now it only defines the order of items)
         self._lists.sort(key=lambda x: -x.length)
         self.length = sum(x.length for x in self._lists)
+        self._update_starts()
+        self._cost_cache = {}
+
+    def _update_starts(self):
+        # Start offset of each sublist, for binary search in __getitem__
+        self._starts = [0, *itertools.accumulate(x.length for x in self._lists[:-1])]
+        # Created on demand, see _get_leaves
+        self._leaves = None
+
+    def _get_leaves(self) -> tuple[list[int], list[Any]]:
+        """
+        Returns (starts, leaves): sublists of all nested levels which are not NestedList,
+        and their start offsets (plus the end of the list).
+        """
+        if self._leaves is None:
+            starts: list[int] = []
+            leaves: list[Any] = []
+            for start, sublist in zip(self._starts, self._lists):
+                if isinstance(sublist, NestedList):
+                    sublist_starts, sublist_leaves = sublist._get_leaves()
+                    starts.extend(start + x for x in sublist_starts[:-1])
+                    leaves.extend(sublist_leaves)
+                else:
+                    starts.append(start)
+                    leaves.append(sublist)
+            starts.append(self.length)
+            self._leaves = starts, leaves
+        return self._leaves
 
     def __getitem__(self, i: int) -> str | list[str]:
+        if i >= self.length:
+            raise IndexError('list index out of range')
         # Retrieve item from appropriate list
-        for x in self._lists:
-            n = x.length  # type: ignore
-            if i < n:
-                return x[i]
-            else:
-                i -= n
-        raise IndexError('list index out of range')
+        k = bisect_right(self._starts, i) - 1
+        return self._lists[k][i - self._starts[k]]
+
+    def get_many(self, indices: Sequence[int]) -> list:
+        if not len(indices):
+            return []
+        # Split indices between sublists of all levels at once, so that each one handles its share in one call.
+        # Indices are sorted, so each share is a slice (found by one binary search per sublist, not per index).
+        starts, leaves = self._get_leaves()
+        vectorized = hasattr(indices, 'argsort')
+        if vectorized:
+            # NumPy array (see RandomGenerator._randrange_many)
+            order = indices.argsort()  # type: ignore
+            ordered = indices[order]
+            bounds = ordered.searchsorted(starts).tolist()
+            order = order.tolist()
+        else:
+            order = sorted(range(len(indices)), key=indices.__getitem__)
+            ordered = [indices[position] for position in order]
+            bounds = [bisect_left(ordered, x) for x in starts]
+        # The last start is the end of the list
+        if bounds[-1] < len(indices):
+            raise IndexError('list index out of range')
+        items = []
+        for start, a, b, sublist in zip(starts, bounds, bounds[1:], leaves):
+            if b > a:
+                share = ordered[a:b]
+                items.extend(sublist.get_many(share - start if vectorized else [i - start for i in share]))
+        result = [None] * len(indices)
+        for position, x in zip(order, items):
+            result[position] = x
+        return result
+
+    def _parse(self, words: Sequence[str], pos: int) -> Iterator[tuple[int, int]]:
+        for start, sublist in zip(self._starts, self._lists):
+            for i, end in sublist._parse(words, pos):
+                yield start + i, end
+
+    def _costs(self, limit: int) -> tuple[list[int], list[list[int]]]:
+        # counts[c] - number of items with cost c
+        # cumulative[c][k] - number of items with cost c in sublists 0, 1, ..., k
+        try:
+            return self._cost_cache[limit]
+        except KeyError:
+            pass
+        sublist_counts = [x._cost_counts(limit) for x in self._lists]
+        cumulative = [list(itertools.accumulate(x)) for x in zip(*sublist_counts)]
+        self._cost_cache[limit] = [x[-1] for x in cumulative], cumulative
+        return self._cost_cache[limit]
+
+    def _cost_counts(self, limit: int) -> list[int]:
+        return self._costs(limit)[0]
+
+    def _exact_index(self, a: int, cost: int, limit: int) -> int:
+        cumulative = self._costs(limit)[1][cost]
+        k = bisect_right(cumulative, a)
+        if k:
+            a -= cumulative[k - 1]
+        return self._starts[k] + self._lists[k]._exact_index(a, cost, limit)
 
     def squash(self, hard, cache):
         # Cache is used to avoid data duplication.
         # If we have 4 branches which finally point to the same list of nouns,
         # why not using the same WordList instance for all 4 branches?
         # This optimization is also applied to PhraseLists, just in case.
+        # Nested list can be shared by many branches too, so it's squashed only once.
+        try:
+            return cache[id(self)][1]
+        except KeyError:
+            pass
         result = super().squash(hard, cache)
+        if result is self:
+            # Sublists might have been replaced, and they might have become shorter
+            # (if they had common items which were merged)
+            self.length = sum(x.length for x in self._lists)
+            self._update_starts()
+            self._cost_cache = {}
         if result is self and hard:
             for cls in (WordList, PhraseList):
                 if all(isinstance(x, cls) for x in self._lists):
-                    # Creating combined WordList/PhraseList and then checking cache
-                    # is a little wasteful, but it has no long-term consequences.
-                    # And it's simple!
-                    result = cls(sorted(set(itertools.chain.from_iterable(self._lists))))
-                    if result._hash in cache:  # noqa
-                        result = cache.get(result._hash)  # noqa
-                    else:
-                        cache[result._hash] = result  # noqa
+                    result = _merge_lists(cls, self._lists, cache)
+        # Keep reference to the original list, so that its id is not reused while we're working
+        cache[id(self)] = (self, result)
         return result
 
 
 class CartesianList(AbstractNestedList):
 
     length: int  # pragma: no cover
+    # Cost counts for each limit (see _cost_counts)
+    _cost_cache: dict[int, tuple[list[list[int]], list[list[int]], dict]]  # pragma: no cover
 
     def __init__(self, lists):
         super().__init__(lists)
+        self._update_divs(self._lists)
+        self.multiword = True
+
+    def _update_divs(self, lists):
         self.length = 1
-        for x in self._lists:
+        for x in lists:
             self.length *= x.length
         # Let's say list lengths are 5, 7, 11, 13.
         # divs = [7*11*13, 11*13, 13, 1]
         divs = [1]
         prod = 1
-        for x in reversed(self._lists[1:]):
+        for x in reversed(lists[1:]):
             prod *= x.length
             divs.append(prod)
-        self._list_divs = tuple(zip(self._lists, reversed(divs)))
-        self.multiword = True
+        self._list_divs = tuple(zip(lists, reversed(divs)))
+        self._cost_cache = {}
 
     def __getitem__(self, i: int) -> str | list[str]:
         result = []
@@ -241,6 +765,90 @@ class CartesianList(AbstractNestedList):
             i %= n
         return result
 
+    def decode_many(self, indices: Sequence[int]) -> Any:
+        """
+        Translates indices into word ids, one column per sublist.
+
+        Returns 2-D NumPy array if NumPy is installed, otherwise a list of lists.
+        """
+        numpy = _import_numpy()
+        if numpy is not None and self.length <= _INT64_MAX:
+            divs = numpy.array([n for _, n in self._list_divs], dtype=numpy.int64)
+            lengths = numpy.array([x.length for x, _ in self._list_divs], dtype=numpy.int64)
+            return (numpy.asarray(indices, dtype=numpy.int64)[:, None] // divs) % lengths
+        divs_lengths = [(n, x.length) for x, n in self._list_divs]
+        return [[i // n % length for n, length in divs_lengths] for i in _to_list(indices)]
+
+    def get_many(self, indices: Sequence[int]) -> list:
+        ids = self.decode_many(indices)
+        try:
+            id_columns = ids.T
+        except AttributeError:
+            id_columns = zip(*ids) if ids else [[] for _ in self._list_divs]
+        # Words are materialized only here, one column at a time.
+        # Note that we use the same sublists as __getitem__ does (not squashed self._lists).
+        columns = [sublist.get_many(column) for (sublist, _), column in zip(self._list_divs, id_columns)]
+        if not any(sublist.multiword for sublist, _ in self._list_divs):
+            return list(map(list, zip(*columns)))
+        columns = [x if sublist.multiword else [(word, ) for word in x]
+                   for (sublist, _), x in zip(self._list_divs, columns)]
+        return [list(itertools.chain.from_iterable(x)) for x in zip(*columns)]
+
+    def _parse(self, words: Sequence[str], pos: int, k: int = 0) -> Iterator[tuple[int, int]]:
+        # Match k-th sublist, then recursively match the rest
+        if k == len(self._list_divs):
+            yield 0, pos
+            return
+        sublist, n = self._list_divs[k]
+        for i, end in sublist._parse(words, pos):
+            for j, rest_end in self._parse(words, end, k + 1):
+                yield i * n + j, rest_end
+
+    def _costs(self, limit: int) -> tuple[list[list[int]], list[list[int]], dict]:
+        # suffix_counts[k][c] - number of combinations of sublists k, k + 1, ... with cost c
+        try:
+            return self._cost_cache[limit]
+        except KeyError:
+            pass
+        sublist_counts = [x._cost_counts(limit) for x, _ in self._list_divs]
+        suffix_counts = [[1] + [0] * limit]
+        for counts in reversed(sublist_counts):
+            suffix_counts.insert(0, _convolve(counts, suffix_counts[0], limit))
+        # Cumulative counts are calculated on demand, see _exact_index
+        self._cost_cache[limit] = sublist_counts, suffix_counts, {}
+        return self._cost_cache[limit]
+
+    def _cost_counts(self, limit: int) -> list[int]:
+        return self._costs(limit)[1][0]
+
+    def _exact_index(self, a: int, cost: int, limit: int) -> int:
+        sublist_counts, suffix_counts, cumulative_cache = self._costs(limit)
+        result = 0
+        for k, (sublist, n) in enumerate(self._list_divs):
+            # Combinations are ordered by cost of k-th word, then by index of k-th word,
+            # then by the rest of the combination
+            rest_counts = suffix_counts[k + 1]
+            try:
+                cumulative = cumulative_cache[k, cost]
+            except KeyError:
+                counts = sublist_counts[k]
+                cumulative = list(itertools.accumulate(counts[c] * rest_counts[cost - c] for c in range(cost + 1)))
+                cumulative_cache[k, cost] = cumulative
+            c = bisect_right(cumulative, a)
+            if c:
+                a -= cumulative[c - 1]
+            i, a = divmod(a, rest_counts[cost - c])
+            result += sublist._exact_index(i, c, limit) * n
+            cost -= c
+        return result
+
+    def squash(self, hard, cache):
+        result = super().squash(hard, cache)
+        if result is self:
+            # Sublists (which are still used for generation) might have become shorter
+            self._update_divs([x for x, _ in self._list_divs])
+        return result
+
 
 class Scalar(AbstractNestedList):
 
@@ -254,6 +862,22 @@ class Scalar(AbstractNestedList):
     def __getitem__(self, i):
         return self.value
 
+    def get_many(self, indices: Sequence[int]) -> list:
+        return [self.value] * len(_to_list(indices))
+
+    def _parse(self, words: Sequence[str], pos: int) -> Iterator[tuple[int, int]]:
+        if pos < len(words) and words[pos] == self.value:
+            yield 0, pos + 1
+
+    def _cost_counts(self, limit: int) -> list[int]:
+        counts = [0] * (limit + 1)
+        if len(self.value) + 1 <= limit:
+            counts[len(self.value) + 1] = 1
+        return counts
+
+    def _exact_index(self, a: int, cost: int, limit: int) -> int:
+        return 0
+
     def __str__(self):
         return f'{self.__class__.__name__}(value={self.value!r})'
 
@@ -261,6 +885,104 @@ class Scalar(AbstractNestedList):
         return self.value
 
 
+# Constrained count of combinations is calculated exactly (by checking every combination)
+# if there are not more than this number of combinations
+_EXACT_COUNT_LIMIT = 10000
+
+# Warn if generate() has to retry at least this often
+_RETRY_RATE_WARNING_THRESHOLD = 0.2
+
+# Combinations are drawn only from those which fit into max_slug_length (see _LengthLimit)
+# if it excludes at least this fraction of them. Such a draw takes about 4 times longer
+# than a plain one, so a few retries are cheaper.
+_LENGTH_LIMIT_THRESHOLD = 0.2
+
+# Constraints which can reject a combination, in order of checking (see RandomGenerator.stats)
+_CONSTRAINTS = (_CONF.FIELD.ENSURE_UNIQUE, _CONF.FIELD.ENSURE_UNIQUE_PREFIX, _CONF.FIELD.MAX_SLUG_LENGTH)
+
+# Results of RandomGenerator._check_not_hanging (retry rates), by config hash
+_retry_rates_cache: dict[bytes, dict[str | int | None, float]] = {}
+_RETRY_RATES_CACHE_SIZE = 256
+
+
+def _config_hash(config: Mapping[str, dict]) -> bytes:
+    md5 = _md5()
+    md5.update(json.dumps(config, sort_keys=True, default=repr).encode('utf-8'))
+    # Word files (see coolname.mapped) can change while config stays the same
+    for key, listdef in sorted(config.items()):
+        if isinstance(listdef, dict) and _CONF.FIELD.FILE in listdef:
+            stat = os.stat(listdef[_CONF.FIELD.FILE])
+            md5.update(repr((key, stat.st_size, stat.st_mtime_ns)).encode('utf-8'))
+    return md5.digest()
+
+
+class _LengthLimit:
+    """
+    Numbers combinations which fit into the cost limit as 0, 1, ..., count - 1,
+    so that random combination can be picked without retries.
+    """
+
+    def __init__(self, lst: AbstractNestedList, limit: int):
+        self._list = lst
+        self._limit = limit
+        self._cumulative = list(itertools.accumulate(lst._cost_counts(limit)))
+        self.count = self._cumulative[-1]
+
+    def __call__(self, r: int) -> int:
+        """Returns index of r-th combination."""
+        cost = bisect_right(self._cumulative, r)
+        if cost:
+            r -= self._cumulative[cost - 1]
+        return self._list._exact_index(r, cost, self._limit)
+
+
+class _GeneratorStats:
+    """
+    Counters of RandomGenerator calls, see RandomGenerator.enable_stats().
+    """
+
+    def __init__(self, hook: Callable | None = None):
+        self._hook = hook
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.calls = 0
+        self.names = 0
+        self.attempts = 0
+        self.rejections = dict.fromkeys(_CONSTRAINTS, 0)
+        self.patterns: dict[str | int | None, int] = {}
+        self.attempts_histogram: dict[int, int] = {}
+
+    def record(self, pattern: str | int | None, names: int, attempts: int, rejections: dict[str, int]) -> None:
+        """Records one call which generated given number of names in given number of attempts."""
+        with self._lock:
+            self.calls += 1
+            self.names += names
+            self.attempts += attempts
+            for constraint, count in rejections.items():
+                self.rejections[constraint] += count
+            self.patterns[pattern] = self.patterns.get(pattern, 0) + names
+            if names == 1:
+                self.attempts_histogram[attempts] = self.attempts_histogram.get(attempts, 0) + 1
+        if self._hook is not None:
+            self._hook(pattern, names, attempts, rejections)
+
+    def as_dict(self, reset: bool = False) -> dict:
+        with self._lock:
+            result = {
+                'calls': self.calls,
+                'names': self.names,
+                'attempts': self.attempts,
+                'rejections': dict(self.rejections),
+                'patterns': dict(self.patterns),
+                'attempts_histogram': dict(sorted(self.attempts_histogram.items())),
+            }
+            if reset:
+                self._reset()
+            return result
+
+
 class RandomGenerator:
     """
     This class provides random name generation interface.
@@ -276,38 +998,63 @@ class RandomGenerator:
     # Custom random (if any)
     _random: Random | None  # pragma: no cover
     _randrange: Callable  # pragma: no cover
+    # numpy.random.Generator can draw many indices in one call
+    _numpy_random: bool  # pragma: no cover
+    # Cached slug_for() (if enabled)
+    _slug_cache: Callable | None = None
+    # Counters of generate() calls (if enabled)
+    _stats: _GeneratorStats | None = None
     # ENSURE_UNIQUE_PREFIX - don't output combinations with two words having N same first letters
     _check_prefix: int | None  # pragma: no cover
     # MAX_SLUG_LENGTH - don't output slugs with more than N characters, including hyphens
     _max_slug_length: int | None  # pragma: no cover
-
-    def __init__(self, config: Mapping[str, dict], rand: Random | None = None):
+    # Created on demand for each pattern, see _get_length_limit
+    _length_limits: dict[str | int | None, _LengthLimit | None]  # pragma: no cover
+    # Calculated on demand for each pattern, see get_combinations_count
+    _constrained_counts: dict[str | int | None, int]  # pragma: no cover
+    # Calculated on demand or by _check_not_hanging, see retry_rates
+    _retry_rates: dict[str | int | None, float]  # pragma: no cover
+
+    def __init__(self, config: Mapping[str, dict], rand: Random | None = None, compact: bool = False):
+        with _profile('RandomGenerator'):
+            self._init(config, rand, compact)
+
+    def _init(self, config: Mapping[str, dict], rand: Random | None, compact: bool,
+              lists: dict[str, AbstractNestedList] | None = None) -> None:
         self.random = rand  # sets _random and _randrange. Note that we assign via property setter.
         config = dict(config)
-        _validate_config(config)
-        lists: dict[str, AbstractNestedList] = {}
-        _create_lists(config, lists, 'all', [])
+        with _profile('validate_config'):
+            # Word lists and phrase lists are created right away, other lists are created from them below
+            lists = _validate_config(config, lists)
         self._lists = {}
-        for key, list_config in config.items():
-            # Other generators independent from 'all'
-            if list_config.get(_CONF.FIELD.GENERATOR) and key not in lists:
-                _create_lists(config, lists, key, [])
-            if key == 'all' or key.isdigit() or list_config.get(_CONF.FIELD.GENERATOR):
-                pattern: str | int | None
-                if key.isdigit():
-                    pattern = int(key)
-                elif key == 'all':
-                    pattern = None
-                else:
-                    pattern = key
-                gen_list = lists[key]
-                # Abnormal but possible configuration - top list is not multiword.
-                # This requires a wrapper so that we avoid dealing with str instead of list in generate().
-                # See also test_degen_* in test_impl.py
-                if not lists[key].multiword:
-                    gen_list = TopLevelMultiWrapper(lists[key])  # type: ignore
-                self._lists[pattern] = gen_list
-        self._lists[None] = self._lists[None].squash(True, {})
+        with _profile('create_lists'):
+            _create_lists(config, lists, 'all', [])
+            for key, list_config in config.items():
+                # Other generators independent from 'all'
+                if list_config.get(_CONF.FIELD.GENERATOR) and key not in lists:
+                    _create_lists(config, lists, key, [])
+                if key == 'all' or key.isdigit() or list_config.get(_CONF.FIELD.GENERATOR):
+                    pattern: str | int | None
+                    if key.isdigit():
+                        pattern = int(key)
+                    elif key == 'all':
+                        pattern = None
+                    else:
+                        pattern = key
+                    gen_list = lists[key]
+                    # Abnormal but possible configuration - top list is not multiword.
+                    # This requires a wrapper so that we avoid dealing with str instead of list in generate().
+                    # See also test_degen_* in test_impl.py
+                    if not lists[key].multiword:
+                        gen_list = TopLevelMultiWrapper(lists[key])  # type: ignore
+                    self._lists[pattern] = gen_list
+        with _profile('squash'):
+            self._lists[None] = self._lists[None].squash(True, {})
+        # Compact mode: store word lists as blobs
+        if compact:
+            with _profile('compact'):
+                cache: dict = {}
+                self._lists = {pattern: _pack_lists(lst, cache) for pattern, lst in self._lists.items()}
         # Should we avoid duplicates?
         try:
             ensure_unique = config['all'][_CONF.FIELD.ENSURE_UNIQUE]
@@ -337,10 +1084,31 @@ class RandomGenerator:
         # Make sure that generate() does not go into long loop.
         # Default generator is a special case, we don't need check.
         if (not config['all'].get('__nocheck') and
-                self._ensure_unique or self._check_prefix or self._max_slug_length):
-            self._check_not_hanging()
+                (self._ensure_unique or self._check_prefix or self._max_slug_length)):
+            with _profile('check_not_hanging'):
+                self._check_not_hanging(_config_hash(config))
         # Fire it up
-        assert self.generate_slug()
+        with _profile('self_test'):
+            assert self.generate_slug(rand=Random(0))
+
+    @classmethod
+    def from_snapshot(cls, path: str, rand: Random | None = None, verify: bool = True,
+                      compact: bool = True) -> 'RandomGenerator':
+        """
+        Loads generator from a snapshot file created by save_snapshot().
+
+        Snapshot is memory-mapped, so loading takes almost no time and memory.
+        If compact is False, word lists are copied into memory.
+        """
+        from coolname.snapshot import load_snapshot
+        return load_snapshot(path, rand, verify, compact)  # type: ignore
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Saves generator to a snapshot file, to be loaded by from_snapshot().
+        """
+        from coolname.snapshot import save_snapshot
+        save_snapshot(self, path)
 
     @property
     def random(self) -> Random | None:
@@ -350,111 +1118,604 @@ class RandomGenerator:
     def random(self, rand: Random | None) -> None:
         if rand:
             self._random = rand
-            self._randrange = rand.randrange
         else:
             self._random = random  # type: ignore
-            self._randrange = random.randrange
+        self._numpy_random = _is_numpy_random(self._random)
+        self._randrange = _get_randrange(self._random)
 
-    def generate(self, pattern: str | int | None = None) -> list[str]:
+    def generate(self, pattern: str | int | None = None, rand: Random | None = None) -> list[str]:
         """
         Generates and returns random name as a list of strings.
+
+        If rand is given, it is used instead of the generator's random.
         """
         lst = self._lists[pattern]
-        while True:
-            result = lst[self._randrange(lst.length)]
-            # 1. Check that there are no duplicates
-            # 2. Check that there are no duplicate prefixes
-            # 3. Check max slug length
-            n = len(result)
-            if (self._ensure_unique and len(set(result)) != n or
-                    self._check_prefix and len(set(x[:self._check_prefix] for x in result)) != n or
-                    self._max_slug_length and sum(len(x) for x in result) + n - 1 > self._max_slug_length):
-                continue
-            # Most of the time it returns at first attempt, without repeating the loop.
-            # Note about typing: technically its List[str] | str, but we know it's always List[str] at this point.
-            return result  # type: ignore
-
-    def generate_slug(self, pattern: str | int | None = None) -> str:
+        randrange = self._get_randrange(rand)
+        length_limit = self._get_length_limit(pattern)
+        if length_limit is None:
+            result = lst[randrange(lst.length)]
+            is_rejected = self._is_rejected
+        else:
+            # Pick from combinations which fit into max_slug_length.
+            # The result is still uniformly distributed.
+            result = lst[length_limit(randrange(length_limit.count))]
+            is_rejected = self._is_not_unique
+        # Most of the time it returns at first attempt
+        if is_rejected(result):
+            return self._generate_retry(lst, pattern, randrange, result, length_limit)
+        if self._stats is not None:
+            self._stats.record(pattern, 1, 1, self._count_rejections(()))
+        # Note about typing: technically its List[str] | str, but we know it's always List[str] at this point.
+        return result  # type: ignore
+
+    def _generate_retry(self, lst: AbstractNestedList, pattern: str | int | None, randrange: Callable[[int], int],
+                        result: str | list[str], length_limit: _LengthLimit | None) -> list[str]:
+        """Continues generate() after the first combination was rejected."""
+        rejected = [result]
+        if length_limit is None:
+            while True:
+                result = lst[randrange(lst.length)]
+                if not self._is_rejected(result):
+                    break
+                rejected.append(result)
+        else:
+            while True:
+                result = lst[length_limit(randrange(length_limit.count))]
+                if not self._is_not_unique(result):
+                    break
+                rejected.append(result)
+        if self._stats is not None:
+            self._stats.record(pattern, 1, len(rejected) + 1, self._count_rejections(rejected))
+        return result  # type: ignore
+
+    def generate_slug(self, pattern: str | int | None = None, rand: Random | None = None) -> str:
         """
         Generates and returns random name as a slug.
         """
-        return '-'.join(self.generate(pattern))
+        return '-'.join(self.generate(pattern, rand))
 
-    def get_combinations_count(self, pattern: str | int | None = None) -> int:
+    def generate_many(self, n: int, pattern: str | int | None = None,
+                      rand: Random | None = None) -> list[list[str]]:
+        """
+        Generates and returns n random names, each as a list of strings.
+
+        Equivalent to calling generate() n times, but faster.
+        """
+        lst = self._lists[pattern]
+        check_length = self._get_length_limit(pattern) is None
+        results: list[list[str]] = []
+        attempts = 0
+        rejected: list = []
+        # Draw the whole batch at once, then draw again to replace rejected combinations (if any)
+        while len(results) < n:
+            batch = lst.get_many(self._draw_many(pattern, n - len(results), rand))
+            attempts += len(batch)
+            accepted = self._accept_many(batch, check_length)
+            results.extend(itertools.compress(batch, accepted))
+            if self._stats is not None:
+                rejected.extend(x for x, ok in zip(batch, accepted) if not ok)
+        if self._stats is not None:
+            self._stats.record(pattern, n, attempts, self._count_rejections(rejected))
+        return results
+
+    def _generate_indexed_many(self, n: int, pattern: str | int | None = None,
+                               rand: Random | None = None) -> list[tuple[int, list[str]]]:
+        """
+        Same as generate_many(), but returns pairs (index, name),
+        where index is the number of combination (see index_to_slug).
+        """
+        lst = self._lists[pattern]
+        check_length = self._get_length_limit(pattern) is None
+        results: list[tuple[int, list[str]]] = []
+        attempts = 0
+        rejected: list = []
+        while len(results) < n:
+            indices = _to_list(self._draw_many(pattern, n - len(results), rand))
+            batch = lst.get_many(indices)
+            attempts += len(batch)
+            accepted = self._accept_many(batch, check_length)
+            results.extend(itertools.compress(zip(indices, batch), accepted))
+            if self._stats is not None:
+                rejected.extend(x for x, ok in zip(batch, accepted) if not ok)
+        if self._stats is not None:
+            self._stats.record(pattern, n, attempts, self._count_rejections(rejected))
+        return results
+
+    def generate_slug_many(self, n: int, pattern: str | int | None = None, separator: str = '-',
+                           rand: Random | None = None) -> list[str]:
+        """
+        Generates and returns n random names, each as a slug.
+
+        Equivalent to calling generate_slug() n times, but faster.
+        """
+        join = separator.join
+        return [join(x) for x in self.generate_many(n, pattern, rand)]
+
+    def get_combinations_count(self, pattern: str | int | None = None, constrained: bool = False) -> int:
         """
         Returns total number of unique combinations
         for the given pattern.
+
+        If constrained is True, only combinations which satisfy
+        ensure_unique, ensure_unique_prefix and max_slug_length are counted.
+        The result is exact if only max_slug_length is set or if there are
+        not too many combinations; otherwise it's a lower bound (see _count_constrained).
+        """
+        lst = self._lists[pattern]
+        if not constrained:
+            return lst.length
+        try:
+            return self._constrained_counts[pattern]
+        except AttributeError:
+            self._constrained_counts = {}
+        except KeyError:
+            pass
+        if lst.length <= _EXACT_COUNT_LIMIT:
+            # Small enough to check every combination
+            is_rejected = self._is_rejected
+            count = sum(not is_rejected(x) for x in lst.get_many(range(lst.length)))
+        elif self._check_prefix:
+            count = _count_constrained(lst, True, self._check_prefix, self._max_slug_length)
+        else:
+            count = _count_constrained(lst, self._ensure_unique, None, self._max_slug_length)
+        self._constrained_counts[pattern] = count
+        return count
+
+    def generate_for(self, key: bytes | str | int, pattern: str | int | None = None) -> list[str]:
+        """
+        Returns name for the given key as a list of strings.
+
+        Same key always gives the same name (as long as configuration is the same).
+        """
+        lst = self._lists[pattern]
+        key_bytes = _to_key_bytes(key)
+        # Same as in generate(), attempts are made among combinations which fit into max_slug_length
+        length_limit = self._get_length_limit(pattern)
+        is_rejected = self._get_is_rejected(pattern)
+        for attempt in itertools.count():
+            if length_limit is None:
+                result = lst[_key_to_index(key_bytes, lst.length, attempt)]
+            else:
+                result = lst[length_limit(_key_to_index(key_bytes, length_limit.count, attempt))]
+            if not is_rejected(result):
+                return result  # type: ignore
+        raise AssertionError('unreachable')  # pragma: no cover
+
+    def slug_for(self, key: bytes | str | int, pattern: str | int | None = None, separator: str = '-') -> str:
+        """
+        Returns slug for the given key (e.g. UUID, hash or database id).
+
+        Same key always gives the same slug (as long as configuration is the same),
+        on any machine and in any process. See also set_slug_cache().
+        """
+        if self._slug_cache is not None:
+            return self._slug_cache(key, pattern, separator)  # type: ignore
+        return separator.join(self.generate_for(key, pattern))
+
+    def slugs_for(self, keys: Iterable[bytes | str | int], pattern: str | int | None = None,
+                  separator: str = '-') -> list[str]:
+        """
+        Returns list of slugs for the given keys, same as slug_for().
+        Faster than calling slug_for() for each key.
+        """
+        lst = self._lists[pattern]
+        keys = list(keys)
+        keys_bytes = [_to_key_bytes(x) for x in keys]
+        length_limit = self._get_length_limit(pattern)
+        if length_limit is None:
+            results = lst.get_many([_key_to_index(x, lst.length, 0) for x in keys_bytes])
+        else:
+            results = lst.get_many([length_limit(_key_to_index(x, length_limit.count, 0)) for x in keys_bytes])
+        join = separator.join
+        is_rejected = self._get_is_rejected(pattern)
+        return [join(self.generate_for(key, pattern) if is_rejected(result) else result)
+                for key, result in zip(keys, results)]
+
+    def generate_parallel(self, n: int, pattern: str | int | None = None, separator: str = '-',
+                          workers: int | None = None, seed: int | str | bytes | None = None,
+                          chunk_size: int = 100000, ordered: bool = True) -> Iterator[list[str]]:
+        """
+        Generates n random slugs in a pool of worker processes.
+        Yields chunks (lists of slugs) of chunk_size, the last chunk may be smaller.
+
+        Chunk i is generated with random.Random seeded with (seed, i),
+        so with the same seed, result is the same regardless of number of workers.
+        If seed is not given, a random one is used.
+
+        If ordered is False, chunks are yielded as soon as they are ready.
+        If workers is 1, chunks are generated in the current process.
+        """
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        self._lists[pattern]  # Fail early if pattern is wrong
+        if seed is None:
+            seed = int.from_bytes(os.urandom(16), 'little')
+        workers = workers or os.cpu_count() or 1
+        chunks = ((seed, i, min(chunk_size, n - start), pattern, separator)
+                  for i, start in enumerate(range(0, n, chunk_size)))
+        if workers == 1:
+            for chunk in chunks:
+                yield _generate_seeded_chunk(self, *chunk)
+            return
+        # Generator is pickled once per worker, not once per chunk
+        executor = ProcessPoolExecutor(workers, initializer=_init_parallel_worker, initargs=(self,))
+        try:
+            # Limit number of chunks in flight, to keep memory usage bounded
+            pending: list = [executor.submit(_generate_chunk, *x) for x in itertools.islice(chunks, workers * 2)]
+            while pending:
+                if ordered:
+                    done = [pending.pop(0)]
+                else:
+                    done_set = wait(pending, return_when=FIRST_COMPLETED).done
+                    done = [x for x in pending if x in done_set]
+                    pending = [x for x in pending if x not in done_set]
+                for future in done:
+                    yield future.result()
+                    pending.extend(executor.submit(_generate_chunk, *x) for x in itertools.islice(chunks, 1))
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        # Default random is the module, which can't be pickled
+        state['_random'] = None if self._random is random else self._random
+        del state['_randrange'], state['_numpy_random']
+        # Stats are per process
+        state.pop('_stats', None)
+        state.pop('_slug_cache', None)
+        if self._slug_cache is not None:
+            state['_slug_cache_size'] = self._slug_cache.cache_parameters()['maxsize']  # type: ignore
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        slug_cache_size = state.pop('_slug_cache_size', None)
+        self.random = state.pop('_random')
+        self.__dict__.update(state)
+        if slug_cache_size is not None:
+            self.set_slug_cache(slug_cache_size)
+
+    def set_slug_cache(self, maxsize: int | None) -> None:
+        """
+        Enables LRU cache of slug_for() results for up to maxsize keys.
+        Use maxsize=None to disable the cache.
+        """
+        if maxsize is None:
+            self._slug_cache = None
+        else:
+            self._slug_cache = lru_cache(maxsize=maxsize)(
+                lambda key, pattern, separator: separator.join(self.generate_for(key, pattern)))
+
+    def enable_stats(self, hook: Callable | None = None) -> None:
+        """
+        Starts counting calls of generate() and generate_many() (and their slug versions), see stats().
+
+        If hook is given, it is called after each call as hook(pattern, names, attempts, rejections),
+        e.g. to export the numbers to a metrics system.
+        """
+        self._stats = _GeneratorStats(hook)
+
+    def disable_stats(self) -> None:
+        """Stops counting calls. When stats are disabled, they cost nothing."""
+        self._stats = None
+
+    def stats(self, reset: bool = False) -> dict:
+        """
+        Returns counters collected since enable_stats() (or since the last reset) as a dictionary:
+
+        calls - number of calls, names - number of generated names,
+        attempts - number of combinations drawn (including rejected ones),
+        rejections - {constraint: number of rejected combinations which violated it},
+        patterns - {pattern: number of generated names},
+        attempts_histogram - {attempts: number of generate() calls which took that many attempts}.
+        """
+        if self._stats is None:
+            raise RuntimeError('Stats are not enabled, call enable_stats() first')
+        return self._stats.as_dict(reset)
+
+    def slug_to_index(self, slug: str, pattern: str | int | None = None, separator: str = '-') -> int:
+        """
+        Returns number of the combination which gives this slug,
+        in range(get_combinations_count(pattern)).
+
+        Raises ValueError if slug can't be made from this generator's word lists.
+        """
+        lst = self._lists[pattern]
+        words = slug.split(separator)
+        # If several combinations give the same slug, the first one is returned
+        for i, end in lst._parse(words, 0):
+            if end == len(words):
+                return i
+        raise ValueError('Slug {!r} does not match any combination'.format(slug))
+
+    def index_to_slug(self, i: int, pattern: str | int | None = None, separator: str = '-') -> str:
+        """
+        Returns slug for combination number i. This is the reverse of slug_to_index().
+        """
+        lst = self._lists[pattern]
+        if not 0 <= i < lst.length:
+            raise IndexError('Combination number {} is out of range [0, {})'.format(i, lst.length))
+        return separator.join(lst[i])
+
+    def slugs_to_indices(self, slugs: Iterable[str], pattern: str | int | None = None,
+                         separator: str = '-') -> Iterator[int]:
+        """
+        Same as slug_to_index() for each slug. Slugs are processed as they come,
+        so this works with iterables of any size.
+        """
+        for slug in slugs:
+            yield self.slug_to_index(slug, pattern, separator)
+
+    def indices_to_slugs(self, indices: Iterable[int], pattern: str | int | None = None,
+                         separator: str = '-', chunk_size: int = 1000) -> Iterator[str]:
+        """
+        Same as index_to_slug() for each index. Indices are processed
+        in chunks of chunk_size, so this works with iterables of any size.
+        """
+        lst = self._lists[pattern]
+        join = separator.join
+        iterator = iter(indices)
+        while chunk := list(itertools.islice(iterator, chunk_size)):
+            for i in chunk:
+                if not 0 <= i < lst.length:
+                    raise IndexError('Combination number {} is out of range [0, {})'.format(i, lst.length))
+            yield from map(join, lst.get_many(chunk))
+
+    def unique_sequence(self, key: bytes | str | int, pattern: str | int | None = None,
+                        start: int = 0, stop: int | None = None) -> Any:
+        """
+        Returns iterator over names in pseudorandom order defined by key,
+        without repeats until all combinations are exhausted.
+
+        See coolname.unique.UniqueSequence for details.
+        """
+        from coolname.unique import UniqueSequence
+        return UniqueSequence(self, key, pattern, start, stop)
+
+    def _get_randrange(self, rand: Any = None) -> Callable[[int], int]:
+        """
+        Returns randrange function of rand if it's given,
+        otherwise of the random set by use_random() (if any),
+        otherwise of the generator's random.
+        """
+        if rand is None:
+            rand = _context_random.get()
+            if rand is None:
+                return self._randrange
+        return _get_randrange(rand)
+
+    def _randrange_many(self, stop: int, n: int, rand: Any = None) -> Sequence[int]:
+        """Returns n random integers in range [0, stop)."""
+        if rand is None:
+            rand = _context_random.get()
+        if rand is None:
+            rand, numpy_random, randrange = self._random, self._numpy_random, self._randrange
+        else:
+            numpy_random, randrange = _is_numpy_random(rand), _get_randrange(rand)
+        if numpy_random and stop <= _INT64_MAX:
+            # One vectorized call instead of n calls
+            return rand.integers(stop, size=n)  # type: ignore
+        return [randrange(stop) for _ in range(n)]
+
+    def _draw_many(self, pattern: str | int | None, n: int, rand: Any = None) -> Sequence[int]:
+        """
+        Returns indices of n random combinations of the pattern.
+        Same as in generate(), they are picked from combinations which fit into max_slug_length
+        if there is a length limit.
+        """
+        length_limit = self._get_length_limit(pattern)
+        if length_limit is None:
+            return self._randrange_many(self._lists[pattern].length, n, rand)
+        return [length_limit(r) for r in _to_list(self._randrange_many(length_limit.count, n, rand))]
+
+    @property
+    def retry_rates(self) -> dict[str | int | None, float]:
+        """
+        For each pattern, returns probability that generate() has to retry
+        because combination violates ensure_unique, ensure_unique_prefix or max_slug_length.
+        (max_slug_length causes retries only if it excludes a small fraction of combinations,
+        see _get_length_limit.)
+        """
+        try:
+            return dict(self._retry_rates)
+        except AttributeError:
+            pass
+        rates = {}
+        for pattern, lst in self._lists.items():
+            if not (self._ensure_unique or self._check_prefix or self._max_slug_length):
+                rates[pattern] = 0.0
+                continue
+            length_limit = self._get_length_limit(pattern)
+            count = lst.length if length_limit is None else length_limit.count
+            if count:
+                rates[pattern] = (count - self.get_combinations_count(pattern, constrained=True)) / count
+            else:
+                rates[pattern] = 1.0
+        self._retry_rates = rates
+        return dict(rates)
+
+    def _get_length_limit(self, pattern: str | int | None) -> _LengthLimit | None:
+        """
+        Returns _LengthLimit if max_slug_length excludes a significant fraction of combinations
+        of the pattern (see _LENGTH_LIMIT_THRESHOLD), otherwise None.
+
+        If there is a length limit, combinations are drawn only from those which fit
+        into max_slug_length, and they are checked only against ensure_unique
+        and ensure_unique_prefix (see _get_is_rejected).
+        Otherwise, too long combinations are rejected and drawn again, like any others.
+        """
+        try:
+            return self._length_limits[pattern]
+        except AttributeError:
+            self._length_limits = {}
+        except KeyError:
+            pass
+        length_limit = None
+        if self._max_slug_length:
+            lst = self._lists[pattern]
+            # Cost of combination is its slug length + 1
+            length_limit = _LengthLimit(lst, self._max_slug_length + 1)
+            if length_limit.count > lst.length * (1 - _LENGTH_LIMIT_THRESHOLD):
+                length_limit = None
+        self._length_limits[pattern] = length_limit
+        return length_limit
+
+    def _is_rejected(self, result: str | list[str]) -> bool:
+        """Returns True if combination violates any of the configured constraints."""
+        # 1. Check that there are no duplicates
+        # 2. Check that there are no duplicate prefixes
+        # 3. Check max slug length
+        n = len(result)
+        return bool(self._ensure_unique and len(set(result)) != n or
+                    self._check_prefix and len(set(x[:self._check_prefix] for x in result)) != n or
+                    self._max_slug_length and sum(len(x) for x in result) + n - 1 > self._max_slug_length)
+
+    def _is_not_unique(self, result: str | list[str]) -> bool:
+        """Same as _is_rejected(), but checks only ensure_unique and ensure_unique_prefix."""
+        n = len(result)
+        return bool(self._ensure_unique and len(set(result)) != n or
+                    self._check_prefix and len(set(x[:self._check_prefix] for x in result)) != n)
+
+    def _accept_many(self, batch: list, check_length: bool = True) -> list[bool]:
+        """
+        Same as not _is_rejected() for each combination, but faster: each constraint is checked for all at once.
+        If check_length is False, max_slug_length is not checked (same as _is_not_unique).
+        """
+        accepted = [True] * len(batch)
+        # Unique prefixes mean unique words, so ensure_unique is checked only if there's no prefix
+        if self._check_prefix:
+            n = self._check_prefix
+            accepted = [len({word[:n] for word in x}) == len(x) for x in batch]
+        elif self._ensure_unique:
+            accepted = [len(set(x)) == len(x) for x in batch]
+        if check_length and self._max_slug_length:
+            limit = self._max_slug_length + 1
+            accepted = [ok and sum(map(len, x)) + len(x) <= limit for ok, x in zip(accepted, batch)]
+        return accepted
+
+    def _sample_valid(self, pattern: str | int | None) -> bool:
+        """
+        Called if retry rate of the pattern is 1. Returns True if some combinations are valid after all.
+
+        Combinations count is exact for small lists, but it's a lower bound for big ones,
+        so they are checked by a sample of _EXACT_COUNT_LIMIT combinations (same every time).
+        If none of them is valid, generate() would take too long anyway.
         """
         lst = self._lists[pattern]
-        return lst.length
+        if lst.length <= _EXACT_COUNT_LIMIT:
+            return False
+        batch = lst.get_many(self._draw_many(pattern, _EXACT_COUNT_LIMIT, Random(0)))
+        return any(self._accept_many(batch, self._get_length_limit(pattern) is None))
+
+    def _get_is_rejected(self, pattern: str | int | None) -> Callable[[str | list[str]], bool]:
+        """Returns function which checks combinations drawn for the pattern (see _get_length_limit)."""
+        return self._is_rejected if self._get_length_limit(pattern) is None else self._is_not_unique
+
+    def _count_rejections(self, rejected: Iterable[str | list[str]]) -> dict[str, int]:
+        """For combinations rejected by _is_rejected(), counts how many of them violate each constraint."""
+        counts = dict.fromkeys(_CONSTRAINTS, 0)
+        for result in rejected:
+            n = len(result)
+            if self._ensure_unique and len(set(result)) != n:
+                counts[_CONF.FIELD.ENSURE_UNIQUE] += 1
+            if self._check_prefix and len(set(x[:self._check_prefix] for x in result)) != n:
+                counts[_CONF.FIELD.ENSURE_UNIQUE_PREFIX] += 1
+            if self._max_slug_length and sum(len(x) for x in result) + n - 1 > self._max_slug_length:
+                counts[_CONF.FIELD.MAX_SLUG_LENGTH] += 1
+        return counts
 
     def _dump(self, stream, pattern=None, object_ids=False) -> None:
         """Dumps current tree into a text stream."""
         self._lists[pattern]._dump(stream, '', object_ids=object_ids)  # noqa
 
-    def _check_not_hanging(self) -> None:
+    def _check_not_hanging(self, config_hash: bytes | None = None) -> None:
         """
-        Rough check that generate() will not hang or be very slow.
+        Checks that generate() will not hang or be very slow.
 
-        Raises ConfigurationError if generate() spends too much time in retry loop.
+        Raises ConfigurationError if generate() can't produce any combination.
         Issues a warning.warn() if there is a risk of slowdown.
+
+        Result is calculated analytically (see retry_rates), and it's cached by config_hash:
+        creating many generators from the same config doesn't repeat the check.
         """
-        # (field_name, predicate, warning_msg, exception_msg)
-        # predicate(g) is a function that returns True if generated combination g must be rejected,
-        # see checks in generate()
-        checks: list[tuple[str, Any, Callable[[Any], bool], str, str]] = []
-        # ensure_unique can lead to infinite loops for some tiny erroneous configs
-        if self._ensure_unique:
-            checks.append((
-                _CONF.FIELD.ENSURE_UNIQUE,
-                self._ensure_unique,
-                lambda g: len(set(g)) != len(g),
-                '{generate} may be slow because a significant fraction of combinations contain repeating words and {field_name} is set',  # noqa
-                'Impossible to generate with {field_name}'
-            ))
-        #
-        # max_slug_length can easily slow down or block generation if set too small
-        if self._max_slug_length:
-            checks.append((
-                _CONF.FIELD.MAX_SLUG_LENGTH,
-                self._max_slug_length,
-                lambda g: sum(len(x) for x in g) + len(g) - 1 > self._max_slug_length,  # type: ignore
-                '{generate} may be slow because a significant fraction of combinations exceed {field_name}={field_value}',  # noqa
-                'Impossible to generate with {field_name}={field_value}'
-            ))
-        # Perform the relevant checks for all generators, starting from 'all'
-        n = 100
-        warning_threshold = 20  # fail probability: 0.04 for 2 attempts, 0.008 for 3 attempts, etc.
-        for lst_id, lst in sorted(self._lists.items(), key=lambda x: '' if x is None else str(x)):
-            context = {'generate': 'coolname.generate({})'.format('' if lst_id is None else repr(lst_id))}
-            # For each generator, perform checks
-            for field_name, field_value, predicate, warning_msg, exception_msg in checks:
-                context.update({'field_name': field_name, 'field_value': field_value})
-                bad_count = 0
-                for _ in range(n):
-                    if predicate(lst[randrange(lst.length)]):
-                        bad_count += 1
-                if bad_count >= n:
-                    raise ConfigurationError(exception_msg.format(**context))
-                elif bad_count >= warning_threshold:
+        try:
+            self._retry_rates = _retry_rates_cache[config_hash]  # type: ignore
+        except KeyError:
+            # max_slug_length doesn't slow down generation much (see _get_length_limit),
+            # but it can block generation if set too small
+            if self._max_slug_length:
+                for pattern in self._lists:
+                    length_limit = self._get_length_limit(pattern)
+                    if length_limit is not None and length_limit.count == 0:
+                        raise ConfigurationError('Impossible to generate with {}={}'
+                                                 .format(_CONF.FIELD.MAX_SLUG_LENGTH, self._max_slug_length))
+        # ensure_unique and ensure_unique_prefix can lead to infinite loops for some tiny erroneous configs
+        if self._ensure_unique or self._check_prefix:
+            field_name = _CONF.FIELD.ENSURE_UNIQUE_PREFIX if self._check_prefix else _CONF.FIELD.ENSURE_UNIQUE
+            for pattern, rate in sorted(self.retry_rates.items(), key=lambda x: '' if x[0] is None else str(x[0])):
+                context = {
+                    'generate': 'coolname.generate({})'.format('' if pattern is None else repr(pattern)),
+                    'field_name': field_name,
+                }
+                if rate >= 1 and not self._sample_valid(pattern):
+                    raise ConfigurationError('Impossible to generate with {field_name}'.format(**context))
+                elif rate >= _RETRY_RATE_WARNING_THRESHOLD:
                     import warnings
-                    warnings.warn(warning_msg.format(**context))
+                    reason = 'repeating words' if field_name == _CONF.FIELD.ENSURE_UNIQUE else 'repeating prefixes'
+                    if self._max_slug_length and self._get_length_limit(pattern) is None:
+                        reason += ' or exceed {}={}'.format(_CONF.FIELD.MAX_SLUG_LENGTH, self._max_slug_length)
+                    warnings.warn('{generate} may be slow because a significant fraction of combinations '
+                                  'contain {reason} and {field_name} is set'.format(reason=reason, **context))
+        if config_hash is not None and config_hash not in _retry_rates_cache:
+            if len(_retry_rates_cache) >= _RETRY_RATES_CACHE_SIZE:
+                del _retry_rates_cache[next(iter(_retry_rates_cache))]
+            _retry_rates_cache[config_hash] = self.retry_rates
+
+
+# Generator in worker process of RandomGenerator.generate_parallel()
+_parallel_generator: RandomGenerator | None = None
+
+
+def _init_parallel_worker(generator: RandomGenerator) -> None:
+    global _parallel_generator
+    _parallel_generator = generator
+
+
+def _generate_chunk(seed: int | str | bytes, i: int, n: int,
+                    pattern: str | int | None, separator: str) -> list[str]:
+    assert _parallel_generator is not None
+    return _generate_seeded_chunk(_parallel_generator, seed, i, n, pattern, separator)
+
+
+def _generate_seeded_chunk(generator: RandomGenerator, seed: int | str | bytes, i: int, n: int,
+                           pattern: str | int | None, separator: str) -> list[str]:
+    rand = Random('{!r}/{}'.format(seed, i))
+    return generator.generate_slug_many(n, pattern, separator, rand)
 
 
 # Translate phrases defined as strings to tuples
 def _split_phrase(x: str) -> str | list[str]:
-    try:
+    if isinstance(x, str):
         return re.split(r'\s+', x.strip())
-    except AttributeError:  # Not str
-        return x
+    return x
+
+
+# For checking that all items are str: all(map(isinstance, items, _STR_TYPES))
+_STR_TYPES = itertools.repeat(str)
 
 
-def _validate_config(config: Mapping[str, dict]) -> None:
+def _validate_config(config: Mapping[str, dict],
+                     lists: dict[str, AbstractNestedList] | None = None) -> dict[str, AbstractNestedList]:
     """
     A big and ugly method for config validation.
     It would be nice to use cerberus, but we don't
     want to introduce dependencies just for that.
+
+    Each word and phrase is validated only once, and then it's used to create WordList or PhraseList.
+    Returns these lists as dict (key -> list). Lists which are already created and validated
+    (by loader, see _compile) are passed in lists; they are not validated again.
     """
+    results = dict(lists or {})
     try:
         referenced_sublists = set()
         for key, listdef in list(config.items()):
@@ -485,6 +1746,9 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                 if not isinstance(value, str):
                     raise ValueError('Config at key {!r} has invalid {!r}'
                                      .format(key, _CONF.FIELD.VALUE))
+            # Words in a file (see coolname.mapped)
+            elif listdef[_CONF.FIELD.TYPE] == _CONF.TYPE.WORDS and _CONF.FIELD.FILE in listdef:
+                results[key] = _map_wordlist(key, listdef)
             # Words
             elif listdef[_CONF.FIELD.TYPE] == _CONF.TYPE.WORDS:
                 try:
@@ -495,6 +1759,8 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                 if not isinstance(words, list) or not words:
                     raise ValueError('Config at key {!r} has invalid {!r}'
                                      .format(key, _CONF.FIELD.WORDS))
+                if results.get(key) is words:
+                    continue
                 # Validate word length
                 try:
                     max_length = int(listdef[_CONF.FIELD.MAX_LENGTH])
@@ -506,6 +1772,7 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                             raise ValueError('Config at key {!r} has invalid word {!r} '
                                              '(longer than {} characters)'
                                              .format(key, word, max_length))
+                results[key] = WordList(words)
             # Phrases (sequences of one or more words)
             elif listdef[_CONF.FIELD.TYPE] == _CONF.TYPE.PHRASES:
                 try:
@@ -516,6 +1783,8 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                 if not isinstance(phrases, list) or not phrases:
                     raise ValueError('Config at key {!r} has invalid {!r}'
                                      .format(key, _CONF.FIELD.PHRASES))
+                if results.get(key) is phrases:
+                    continue
                 # Validate multi-word and max length
                 try:
                     number_of_words = int(listdef[_CONF.FIELD.NUMBER_OF_WORDS])
@@ -525,9 +1794,10 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                     max_length = int(listdef[_CONF.FIELD.MAX_LENGTH])
                 except KeyError:
                     max_length = None
+                items = []
                 for phrase in phrases:
                     phrase = _split_phrase(phrase)  # str -> sequence, if necessary
-                    if not isinstance(phrase, (tuple, list)) or not all(isinstance(x, str) for x in phrase):
+                    if not isinstance(phrase, (tuple, list)) or not all(map(isinstance, phrase, _STR_TYPES)):
                         raise ValueError('Config at key {!r} has invalid {!r}: '
                                          'must be all string/tuple/list'
                                          .format(key, _CONF.FIELD.PHRASES))
@@ -540,6 +1810,8 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                         raise ValueError('Config at key {!r} has invalid phrase {!r} '
                                          '(longer than {} characters)'
                                          .format(key, ' '.join(phrase), max_length))
+                    items.append(tuple(phrase))
+                results[key] = PhraseList._from_items(items)
             else:
                 raise ValueError('Config at key {!r} has invalid {!r}'
                                  .format(key, _CONF.FIELD.TYPE))
@@ -550,6 +1822,296 @@ def _validate_config(config: Mapping[str, dict]) -> None:
                              .format(', '.join(sorted(diff)[:10])))
     except (KeyError, ValueError) as ex:
         raise ConfigurationError(str(ex))
+    return results
+
+
+def _map_wordlist(key: str, listdef: dict) -> AbstractNestedList:
+    """Validates 'words' rule with 'file' field and returns MappedWordList."""
+    if _CONF.FIELD.WORDS in listdef:
+        raise ValueError('Config at key {!r} has both {!r} and {!r}'
+                         .format(key, _CONF.FIELD.WORDS, _CONF.FIELD.FILE))
+    path = listdef[_CONF.FIELD.FILE]
+    if not isinstance(path, str) or not path:
+        raise ValueError('Config at key {!r} has invalid {!r}'
+                         .format(key, _CONF.FIELD.FILE))
+    from .mapped import map_wordlist
+    lst = map_wordlist(path)
+    try:
+        max_length = int(listdef[_CONF.FIELD.MAX_LENGTH])
+    except KeyError:
+        max_length = None
+    if max_length is not None and len(lst[lst._longest]) > max_length:
+        raise ValueError('Config at key {!r} has invalid word {!r} '
+                         '(longer than {} characters)'
+                         .format(key, lst[lst._longest], max_length))
+    return lst
+
+
+def _is_words(lst: Any) -> bool:
+    """Returns True if lst is a list of single words (in memory or in a file)."""
+    return isinstance(lst, (WordList, _PackedList)) and not lst.multiword
+
+
+def _key_to_index(key: bytes, length: int, attempt: int) -> int:
+    """
+    Hashes key into range(length). Different attempts give independent results.
+    """
+    # Hash is 64 bits longer than length, so that modulo bias is negligible
+    digest_size = min(64, (length.bit_length() + 64 + 7) // 8)
+    digest = hashlib.blake2b(key, digest_size=digest_size, salt=attempt.to_bytes(16, 'little')).digest()
+    return int.from_bytes(digest, 'little') % length
+
+
+def _is_flat(lst: Any) -> bool:
+    """Returns True if items of the list are words or phrases (not combinations)."""
+    if isinstance(lst, WordAsPhraseWrapper):
+        return _is_flat(lst._list)
+    elif isinstance(lst, NestedList):
+        return all(_is_flat(x) for x in lst._lists)
+    return not isinstance(lst, CartesianList)
+
+
+def _expand_positions(lst: Any) -> list[list[Any]]:
+    """
+    Represents list as a union of Cartesian products of flat lists (see _is_flat).
+    Returns list of products, each product is a list of flat lists.
+    """
+    if isinstance(lst, WordAsPhraseWrapper):
+        return _expand_positions(lst._list)
+    elif _is_flat(lst) and not (isinstance(lst, NestedList) and _has_sorted(lst)):
+        return [[lst]]
+    elif isinstance(lst, NestedList):
+        return [product for x in lst._lists for product in _expand_positions(x)]
+    # Note that we use the same sublists as __getitem__ does (not squashed self._lists).
+    products: list[list[Any]] = [[]]
+    for sublist, _ in lst._list_divs:
+        products = [x + y for x in products for y in _expand_positions(sublist)]
+    return products
+
+
+def _has_sorted(lst: Any) -> bool:
+    """Returns True if the tree contains sorted lists (they need separate key tables, see _key_table)."""
+    if isinstance(lst, WordAsPhraseWrapper):
+        return _has_sorted(lst._list)
+    elif isinstance(lst, (NestedList, CartesianList)):
+        return any(_has_sorted(x) for x in lst._lists)
+    return bool(lst._sorted)
+
+
+def _flat_items(lst: Any) -> Iterable[str | Sequence[str]]:
+    if isinstance(lst, Scalar):
+        return [lst.value]
+    elif isinstance(lst, WordAsPhraseWrapper):
+        return _flat_items(lst._list)
+    elif isinstance(lst, NestedList):
+        return itertools.chain.from_iterable(_flat_items(x) for x in lst._lists)
+    return lst  # type: ignore
+
+
+def _key_table(lst: Any, prefix: int | None) -> tuple[list[int], list[int], dict[str, dict[int, int]]]:
+    """
+    Returns (counts, conflicts, key_counts) for flat list:
+    counts[c] - number of items with cost c (see AbstractNestedList._cost_counts),
+    conflicts[c] - number of items with cost c which contain the same key twice,
+    key_counts[key][c] - number of other items with cost c which contain the key.
+    Key is the word prefix of given length (the whole word if prefix is None).
+
+    For sorted lists, key_counts is _SortedKeyCounts (lists of this kind are usually huge).
+    """
+    # Lists are often shared between patterns, so we keep their tables
+    try:
+        table: tuple[list[int], list[int], dict[str, dict[int, int]]] = lst._key_tables[prefix]
+        return table
+    except AttributeError:
+        lst._key_tables = {}
+    except KeyError:
+        pass
+    if lst._sorted:
+        # Single word can't contain the same key twice
+        cost_counts = list(_flat_cost_table(lst)[1])
+        table = cost_counts, [0] * len(cost_counts), _SortedKeyCounts(lst, prefix)  # type: ignore
+        lst._key_tables[prefix] = table
+        return table
+    counts: list[int] = []
+    conflicts: list[int] = []
+    key_counts: dict[str, dict[int, int]] = {}
+    for item in _flat_items(lst):
+        words = [item] if isinstance(item, str) else item
+        cost = sum(len(x) + 1 for x in words)
+        if cost >= len(counts):
+            counts.extend([0] * (cost + 1 - len(counts)))
+            conflicts.extend([0] * (cost + 1 - len(conflicts)))
+        counts[cost] += 1
+        keys = {x[:prefix] for x in words}
+        if len(keys) != len(words):
+            conflicts[cost] += 1
+        else:
+            for key in keys:
+                costs = key_counts.setdefault(key, {})
+                costs[cost] = costs.get(cost, 0) + 1
+    lst._key_tables[prefix] = counts, conflicts, key_counts
+    return counts, conflicts, key_counts
+
+
+class _SortedKeyCounts:
+    """
+    Same as key_counts of _key_table, for a sorted list (see AbstractNestedList._sorted).
+
+    Counts are calculated on demand instead of being stored: words with the same key
+    are adjacent in sorted list, so they are found by binary search.
+    """
+
+    def __init__(self, lst: AbstractNestedList, prefix: int | None):
+        self._list = lst
+        self._prefix = prefix
+
+    def __len__(self) -> int:
+        # Upper bound of the number of keys (enough for _join_keys)
+        return self._list.length
+
+    def get(self, key: str) -> dict[int, int]:
+        lst = self._list
+        start = bisect_left(lst, key)  # type: ignore
+        if self._prefix is None or len(key) < self._prefix:
+            # Key is the whole word
+            stop = start + (start < lst.length and lst[start] == key)
+        else:
+            # Words are [a-z]+ (see coolname.mapped), so they never include the last code point
+            stop = bisect_left(lst, key + '\U0010ffff', start)  # type: ignore
+        return _count_costs(lst[i] for i in range(start, stop))  # type: ignore
+
+    def items(self) -> Iterator[tuple[str, dict[int, int]]]:
+        """Yields (key, costs) in sorted order of keys."""
+        prefix = self._prefix
+        for key, words in itertools.groupby(self._list, lambda x: x[:prefix]):  # type: ignore
+            yield key, _count_costs(words)
+
+
+def _count_costs(words: Iterable[str]) -> dict[int, int]:
+    costs: dict[int, int] = {}
+    for word in words:
+        costs[len(word) + 1] = costs.get(len(word) + 1, 0) + 1
+    return costs
+
+
+def _merge_keys(x: _SortedKeyCounts, y: _SortedKeyCounts) -> Iterator[tuple[dict[int, int], dict[int, int]]]:
+    """Yields (x_costs, y_costs) for each common key of two sorted lists, reading each list once."""
+    if x is y and x._prefix is None:
+        # Each word matches only itself: n words with cost c give n pairs with cost 2c
+        for cost, count in enumerate(_flat_cost_table(x._list)[1]):
+            if count:
+                yield {cost: count}, {cost: 1}
+    elif x is y:
+        for _, costs in x.items():
+            yield costs, costs
+    else:
+        y_items = y.items()
+        y_key, y_costs = next(y_items, (None, None))
+        for key, x_costs in x.items():
+            while y_key is not None and y_key < key:
+                y_key, y_costs = next(y_items, (None, None))
+            if y_key is None:
+                break
+            if y_key == key:
+                yield x_costs, y_costs  # type: ignore
+
+
+def _join_keys(x: dict[str, dict[int, int]], y: dict[str, dict[int, int]], limit: int) -> list[int]:
+    """
+    Returns numbers of pairs of items (one from x, one from y) with common key, by cost (up to limit).
+    Pair with several common keys is counted several times.
+    """
+    result = [0] * (limit + 1)
+    if isinstance(x, _SortedKeyCounts) and isinstance(y, _SortedKeyCounts):
+        pairs = _merge_keys(x, y)
+    else:
+        if len(x) > len(y):
+            x, y = y, x
+        pairs = ((x_costs, y.get(key)) for key, x_costs in x.items())  # type: ignore
+    for x_costs, y_costs in pairs:
+        if y_costs:
+            for x_cost, x_count in x_costs.items():
+                for y_cost, y_count in y_costs.items():
+                    if x_cost + y_cost <= limit:
+                        result[x_cost + y_cost] += x_count * y_count
+    return result
+
+
+def _count_constrained(lst: AbstractNestedList, unique: bool, prefix: int | None, max_slug_length: int | None) -> int:
+    """
+    Counts combinations which satisfy the constraints.
+
+    If unique is False, the count is exact.
+    Otherwise, it's a lower bound: combinations with repeating keys are counted
+    by pairs of positions where repeating keys are, and subtracted from the total
+    (i.e. combination with several repeats is subtracted several times).
+    This bound is very tight if repeats are rare, which is the case for any sane config.
+    """
+    if not unique:
+        # Same as the count of _LengthLimit (no need to build key tables)
+        return sum(lst._cost_counts(max_slug_length + 1)) if max_slug_length else lst.length
+    tables: dict[int, tuple[list[int], list[int], dict[str, dict[int, int]]]] = {}
+    result = 0
+    for product in _expand_positions(lst):
+        # Same list can appear several times, so we cache its table
+        for x in product:
+            if id(x) not in tables:
+                tables[id(x)] = _key_table(x, prefix)
+        counts, conflicts, key_counts = zip(*(tables[id(x)] for x in product))
+        # Cost of combination is slug length + 1
+        limit = max_slug_length + 1 if max_slug_length else sum(len(x) - 1 for x in counts)
+
+        def count_rest(excluded: tuple[int, ...]) -> list[int]:
+            # Number of combinations of positions other than excluded, with cost up to c (cumulative)
+            rest = [1] + [0] * limit
+            for i, x in enumerate(counts):
+                if i not in excluded:
+                    rest = _convolve(x, rest, limit)
+            return list(itertools.accumulate(rest))
+
+        total = count_rest(())[limit]
+        if unique:
+            for i, x in enumerate(conflicts):
+                if any(x):
+                    rest = count_rest((i, ))
+                    total -= sum(count * rest[limit - c] for c, count in enumerate(x[:limit + 1]))
+            for i, j in itertools.combinations(range(len(product)), 2):
+                pairs = _join_keys(key_counts[i], key_counts[j], limit)
+                if any(pairs):
+                    rest = count_rest((i, j))
+                    total -= sum(count * rest[limit - c] for c, count in enumerate(pairs))
+        result += max(total, 0)
+    return result
+
+
+def _pack_lists(lst: Any, cache: dict) -> Any:
+    """
+    Replaces WordList and PhraseList instances in the tree with
+    PackedWordList and PackedPhraseList, which use much less memory.
+    Returns new root of the tree.
+    """
+    try:
+        return cache[id(lst)][1]
+    except KeyError:
+        pass
+    result = lst
+    if isinstance(lst, WordList):
+        result = PackedWordList.pack(lst)
+    elif isinstance(lst, PhraseList):
+        result = PackedPhraseList.pack(lst)
+    elif isinstance(lst, WordAsPhraseWrapper):
+        lst._list = _pack_lists(lst._list, cache)
+    elif isinstance(lst, CartesianList):
+        lst._list_divs = tuple((_pack_lists(x, cache), n) for x, n in lst._list_divs)
+        lst._lists = [_pack_lists(x, cache) for x in lst._lists]
+    elif isinstance(lst, AbstractNestedList):
+        # Lengths are not changed, so NestedList only needs to forget its leaves (see NestedList._get_leaves)
+        lst._lists = [_pack_lists(x, cache) for x in lst._lists]
+        if isinstance(lst, NestedList):
+            lst._leaves = None
+    # Keep reference to the original list, so that its id is not reused while we're working
+    cache[id(lst)] = (lst, result)
+    return result
 
 
 def _create_lists(
@@ -562,6 +2124,8 @@ def _create_lists(
     """
     An ugly recursive method to transform config dict
     into a tree of AbstractNestedList.
+
+    Lists of words and phrases are already created by _validate_config and passed in results.
     """
     # Have we done it already?
     try:
@@ -576,43 +2140,54 @@ def _create_lists(
     # Track recursion depth
     stack.append(current)
     try:
-        # Check what kind of list we have
-        list_config = config[current]
-        list_type = list_config[_CONF.FIELD.TYPE]
-        # 1. List of words
-        if list_type == _CONF.TYPE.WORDS:
-            results[current] = WordList(list_config['words'])
-        # List of phrases
-        elif list_type == _CONF.TYPE.PHRASES:
-            results[current] = PhraseList(list_config['phrases'])
-        # 2. Simple list of lists
-        elif list_type == _CONF.TYPE.NESTED:
-            results[current] = NestedList([_create_lists(config, results, x, stack,
-                                                         inside_cartesian=inside_cartesian)
-                                           for x in list_config[_CONF.FIELD.LISTS]])
-
-        # 3. Cartesian list of lists
-        elif list_type == _CONF.TYPE.CARTESIAN:
-            if inside_cartesian is not None:
-                raise ConfigurationError("Cartesian list {!r} contains another Cartesian list "
-                                         "{!r}. Nested Cartesian lists are not allowed."
-                                         .format(inside_cartesian, current))
-            results[current] = CartesianList([_create_lists(config, results, x, stack,
-                                                            inside_cartesian=current)
-                                              for x in list_config[_CONF.FIELD.LISTS]])
-        # 4. Scalar
-        elif list_type == _CONF.TYPE.CONST:
-            results[current] = Scalar(list_config[_CONF.FIELD.VALUE])
-        # Unknown type
-        else:
-            raise InitializationError("Unknown list type: {!r}".format(list_type))
-        # Return the result
-        return results[current]
+        with _profile(current, 'node'):
+            # Check what kind of list we have
+            list_config = config[current]
+            list_type = list_config[_CONF.FIELD.TYPE]
+            # 1. Simple list of lists
+            if list_type == _CONF.TYPE.NESTED:
+                results[current] = NestedList([_create_lists(config, results, x, stack,
+                                                             inside_cartesian=inside_cartesian)
+                                               for x in list_config[_CONF.FIELD.LISTS]])
+
+            # 2. Cartesian list of lists
+            elif list_type == _CONF.TYPE.CARTESIAN:
+                if inside_cartesian is not None:
+                    raise ConfigurationError("Cartesian list {!r} contains another Cartesian list "
+                                             "{!r}. Nested Cartesian lists are not allowed."
+                                             .format(inside_cartesian, current))
+                results[current] = CartesianList([_create_lists(config, results, x, stack,
+                                                                inside_cartesian=current)
+                                                  for x in list_config[_CONF.FIELD.LISTS]])
+            # 3. Scalar
+            elif list_type == _CONF.TYPE.CONST:
+                results[current] = Scalar(list_config[_CONF.FIELD.VALUE])
+            # Unknown type
+            else:
+                raise InitializationError("Unknown list type: {!r}".format(list_type))
+            # Return the result
+            return results[current]
     finally:
         stack.pop()
 
 
 # Default generator is a global object
+def _compile(path: str, rand: Random | None = None, compact: bool = False,
+             nocheck: bool = False) -> RandomGenerator:
+    """
+    Creates generator from config path, same as RandomGenerator(load_config(path)), but faster:
+    lists from *.txt files go directly from loader to generator, without second validation.
+    """
+    from coolname.loader import _load_lists
+    config, lists = _load_lists(path)
+    if nocheck:
+        config['all']['__nocheck'] = True
+    generator = RandomGenerator.__new__(RandomGenerator)
+    with _profile('RandomGenerator'):
+        generator._init(config, rand, compact, lists)
+    return generator
+
+
 def _create_default_generator() -> RandomGenerator:
     data_dir = os.getenv('COOLNAME_DATA_DIR')
     data_module = os.getenv('COOLNAME_DATA_MODULE')
@@ -620,8 +2195,14 @@ def _create_default_generator() -> RandomGenerator:
         data_dir = op.join(op.dirname(op.abspath(__file__)), 'data')
         data_module = 'coolname.data'  # used when imported from egg; consumes more memory
     if data_dir and op.isdir(data_dir):
-        from coolname.loader import load_config
-        config = load_config(data_dir)
+
+        def create() -> RandomGenerator:
+            return _compile(data_dir, nocheck=True)  # type: ignore
+
+        if os.getenv('COOLNAME_CACHE_DIR'):
+            from coolname.snapshot import _load_cached
+            return _load_cached(data_dir, create)  # type: ignore
+        return create()
     elif data_module:  # pragma: no cover (actually tested via subprocess - see test_coolname_env.py)
         import importlib
         config = importlib.import_module(data_module).config
@@ -631,16 +2212,64 @@ def _create_default_generator() -> RandomGenerator:
     return RandomGenerator(config)
 
 
-# Default generator is a global object
-_default: RandomGenerator = _create_default_generator()
+# Default generator is a global object, created on first use.
+# Creating it takes some time, so we don't do it at import.
+_default_generator: RandomGenerator | None = None
+_default_lock = threading.Lock()
+
+
+def _get_default() -> RandomGenerator:
+    global _default_generator
+    if _default_generator is None:
+        with _default_lock:
+            if _default_generator is None:
+                _default_generator = _create_default_generator()
+    return _default_generator
+
+
+def __getattr__(name: str) -> Any:
+    # _default used to be created at import time, keep it accessible
+    if name == '_default':
+        return _get_default()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def warmup() -> None:
+    """
+    Creates the default RandomGenerator instance right now, instead of on first use.
+    """
+    _get_default()
+
 
 # Global functions are actually methods of the default generator.
 # (most users don't care about creating generator instances)
-generate = _default.generate
-generate_slug = _default.generate_slug
-get_combinations_count = _default.get_combinations_count
+
+def generate(pattern: str | int | None = None, rand: Random | None = None) -> list[str]:
+    """Generates and returns random name as a list of strings."""
+    return _get_default().generate(pattern, rand)
+
+
+def generate_slug(pattern: str | int | None = None, rand: Random | None = None) -> str:
+    """Generates and returns random name as a slug."""
+    return _get_default().generate_slug(pattern, rand)
+
+
+def generate_many(n: int, pattern: str | int | None = None, rand: Random | None = None) -> list[list[str]]:
+    """Generates and returns n random names, each as a list of strings."""
+    return _get_default().generate_many(n, pattern, rand)
+
+
+def generate_slug_many(n: int, pattern: str | int | None = None, separator: str = '-',
+                       rand: Random | None = None) -> list[str]:
+    """Generates and returns n random names, each as a slug."""
+    return _get_default().generate_slug_many(n, pattern, separator, rand)
+
+
+def get_combinations_count(pattern: str | int | None = None, constrained: bool = False) -> int:
+    """Returns total number of unique combinations for the given pattern."""
+    return _get_default().get_combinations_count(pattern, constrained)
 
 
 def replace_random(rand: Random | None = None) -> None:
     """Replaces random number generator for the default RandomGenerator instance."""
-    _default.random = rand
+    _get_default().random = rand
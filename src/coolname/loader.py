@@ -13,6 +13,7 @@ import re
 
 from .config import _CONF
 from .exceptions import InitializationError, ConfigurationError
+from .profile import _profile
 
 
 def load_config(path):
@@ -26,6 +27,24 @@ def load_config(path):
 
     Raises InitializationError when something is wrong.
     """
+    with _profile('load_config'):
+        return _load_config_or_data(path)
+
+
+def _load_lists(path):
+    """
+    Same as load_config, but lists from *.txt files are created right away
+    (as WordList or PhraseList, used in config instead of plain lists).
+    They are already validated by loader, so RandomGenerator doesn't validate them again.
+
+    Returns tuple (config, lists).
+    """
+    lists = {}
+    with _profile('load_config'):
+        return _load_config_or_data(path, lists), lists
+
+
+def _load_config_or_data(path, lists=None):
     path = os.path.abspath(path)
     if os.path.isdir(path):
         config, wordlists = _load_data(path)
@@ -34,12 +53,23 @@ def load_config(path):
         wordlists = {}
     else:
         raise InitializationError('File or directory not found: {0}'.format(path))
+    # Word files (see coolname.mapped) are relative to the config
+    base_path = path if os.path.isdir(path) else os.path.dirname(path)
+    for listdef in config.values():
+        if isinstance(listdef, dict) and isinstance(listdef.get(_CONF.FIELD.FILE), str):
+            listdef[_CONF.FIELD.FILE] = os.path.join(base_path, listdef[_CONF.FIELD.FILE])
     for name, wordlist in wordlists.items():
         if name in config:
             raise InitializationError("Conflict: list {!r} is defined both in config "
                                       "and in *.txt file. If it's a {!r} list, "
                                       "you should remove it from config."
                                       .format(name, _CONF.TYPE.WORDS))
+        if lists is not None:
+            from .impl import WordList, PhraseList
+            if wordlist[_CONF.FIELD.TYPE] == _CONF.TYPE.PHRASES:
+                wordlist[_CONF.FIELD.PHRASES] = lists[name] = PhraseList._from_items(wordlist[_CONF.FIELD.PHRASES])
+            else:
+                wordlist[_CONF.FIELD.WORDS] = lists[name] = WordList._from_items(wordlist[_CONF.FIELD.WORDS])
         config[name] = wordlist
     return config
 
@@ -60,7 +90,7 @@ def _load_data(path):
         file_path = os.path.join(path, file_name)
         name = os.path.splitext(os.path.split(file_path)[1])[0]
         try:
-            with open(file_path, encoding='utf-8') as file:
+            with open(file_path, encoding='utf-8') as file, _profile(name, 'node'):
                 wordlists[name] = _load_wordlist(name, file)
         except (OSError, FileNotFoundError) as ex:
             raise InitializationError('Failed to read {}: {}'.format(file_path, ex))
@@ -82,6 +112,14 @@ def _load_config(config_file_path):
 _WORD_REGEX = re.compile(r'^[a-z]+$')
 _PHRASE_REGEX = re.compile(r'^\w+(?: \w+)*$')
 
+# Runs of lines with words or phrases and nothing else (no options, comments or extra spaces).
+# Such lines are parsed in bulk, which is much faster than one by one.
+_WORDS_RUN_REGEX = re.compile(r'(?:[a-z]+\n)+')
+_PHRASES_RUN_REGEX = re.compile(r'(?:\w+(?: \w+)*\n)+')
+
+# Size of a block read from a file, in characters (or bytes, for binary files)
+_BLOCK_SIZE = 1 << 20
+
 
 # Options are defined using simple notation: 'option = value'
 _OPTION_REGEX = re.compile(r'^([a-z_]+)\s*=\s*(\w+)$', re.UNICODE)
@@ -106,6 +144,40 @@ def _parse_option(line):
     raise ValueError('Unknown option')
 
 
+def _read_blocks(stream, newline='\n'):
+    """
+    Reads stream in blocks of whole lines. Each block ends with a newline.
+    For binary stream, newline must be b'\\n'.
+    """
+    rest = newline[:0]
+    while True:
+        data = stream.read(_BLOCK_SIZE)
+        if not data:
+            break
+        end = data.rfind(newline) + 1
+        if end:
+            yield rest + data[:end]
+            rest = data[end:]
+        else:
+            rest += data
+    if rest:
+        yield rest + newline
+
+
+def _valid_run(items, max_length, number_of_words):
+    """
+    Returns True if all words (str) or phrases (tuple) parsed in bulk are valid.
+    If not, they are parsed again one by one, to raise the proper error.
+    """
+    if isinstance(items[0], tuple):
+        if number_of_words is not None and any(len(x) != number_of_words for x in items):
+            return False
+        lengths = (sum(map(len, x)) for x in items)
+    else:
+        lengths = map(len, items)
+    return max_length is None or max(lengths) <= max_length
+
+
 def _load_wordlist(name, stream):
     """
     Loads list of words or phrases from file.
@@ -118,49 +190,68 @@ def _load_wordlist(name, stream):
     multiword = False
     multiword_start = None
     number_of_words = None
-    for i, line in enumerate(stream, start=1):
-        line = line.strip()
-        if not line or line.startswith('#'):
-            continue
-        # Is it an option line, e.g. 'max_length = 10'?
-        if '=' in line:
-            if items:
-                raise ConfigurationError('Invalid assignment at list {!r} line {}: {!r} '
-                                         '(options must be defined before words)'
-                                         .format(name, i, line))
-            try:
-                option, option_value = _parse_option(line)
-            except ValueError as ex:
-                raise ConfigurationError('Invalid assignment at list {!r} line {}: {!r} '
-                                         '({})'
-                                         .format(name, i, line, ex))
-            if option == _CONF.FIELD.MAX_LENGTH:
-                max_length = option_value
-            elif option == _CONF.FIELD.NUMBER_OF_WORDS:
-                number_of_words = option_value
-            continue  # pragma: no cover
-        # Parse words
-        if not multiword and _WORD_REGEX.match(line):
-            if max_length is not None and len(line) > max_length:
-                raise ConfigurationError('Word is too long at list {!r} line {}: {!r}'
-                                         .format(name, i, line))
-            items.append(line)
-        elif _PHRASE_REGEX.match(line):
-            if not multiword:
-                multiword = True
-                multiword_start = len(items)
-            phrase = tuple(line.split(' '))
-            if number_of_words is not None and len(phrase) != number_of_words:
-                raise ConfigurationError('Phrase has {} word(s) (while number_of_words={}) '
-                                         'at list {!r} line {}: {!r}'
-                                         .format(len(phrase), number_of_words, name, i, line))
-            if max_length is not None and sum(len(x) for x in phrase) > max_length:
-                raise ConfigurationError('Phrase is too long at list {!r} line {}: {!r}'
-                                         .format(name, i, line))
-            items.append(phrase)
-        else:
-            raise ConfigurationError('Invalid syntax at list {!r} line {}: {!r}'
-                                     .format(name, i, line))
+    i = 0
+    for block in _read_blocks(stream):
+        pos = 0
+        while pos < len(block):
+            match = (_PHRASES_RUN_REGEX if multiword else _WORDS_RUN_REGEX).match(block, pos)
+            if match:
+                end = match.end()
+                run = block[pos:end - 1].split('\n')
+                if multiword:
+                    run = [tuple(x.split(' ')) for x in run]
+                if _valid_run(run, max_length, number_of_words):
+                    items.extend(run)
+                    i += len(run)
+                    pos = end
+                    continue
+            else:
+                end = block.index('\n', pos) + 1
+            for line in block[pos:end - 1].split('\n'):
+                i += 1
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                # Is it an option line, e.g. 'max_length = 10'?
+                if '=' in line:
+                    if items:
+                        raise ConfigurationError('Invalid assignment at list {!r} line {}: {!r} '
+                                                 '(options must be defined before words)'
+                                                 .format(name, i, line))
+                    try:
+                        option, option_value = _parse_option(line)
+                    except ValueError as ex:
+                        raise ConfigurationError('Invalid assignment at list {!r} line {}: {!r} '
+                                                 '({})'
+                                                 .format(name, i, line, ex))
+                    if option == _CONF.FIELD.MAX_LENGTH:
+                        max_length = option_value
+                    elif option == _CONF.FIELD.NUMBER_OF_WORDS:
+                        number_of_words = option_value
+                    continue  # pragma: no cover
+                # Parse words
+                if not multiword and _WORD_REGEX.match(line):
+                    if max_length is not None and len(line) > max_length:
+                        raise ConfigurationError('Word is too long at list {!r} line {}: {!r}'
+                                                 .format(name, i, line))
+                    items.append(line)
+                elif _PHRASE_REGEX.match(line):
+                    if not multiword:
+                        multiword = True
+                        multiword_start = len(items)
+                    phrase = tuple(line.split(' '))
+                    if number_of_words is not None and len(phrase) != number_of_words:
+                        raise ConfigurationError('Phrase has {} word(s) (while number_of_words={}) '
+                                                 'at list {!r} line {}: {!r}'
+                                                 .format(len(phrase), number_of_words, name, i, line))
+                    if max_length is not None and sum(len(x) for x in phrase) > max_length:
+                        raise ConfigurationError('Phrase is too long at list {!r} line {}: {!r}'
+                                                 .format(name, i, line))
+                    items.append(phrase)
+                else:
+                    raise ConfigurationError('Invalid syntax at list {!r} line {}: {!r}'
+                                             .format(name, i, line))
+            pos = end
     if multiword:
         # If in phrase mode, convert everything to tuples
         for i in range(0, multiword_start):
@@ -0,0 +1,258 @@
+"""
+This module provides memory-mapped word files, for very large word lists.
+
+Word file is a text file with one word per line: no comments, options
+or blank lines, sorted and without duplicates. Words are lowercase English letters,
+same as words in text files (see coolname.loader).
+Words are not loaded into memory: they are read directly from the memory-mapped file,
+using index which is stored next to it (``<path>.cnidx``).
+Index is built once (which also validates all words), and rebuilt when the word file is changed.
+
+Word file is used in config instead of the list of words:
+
+    {"type": "words", "file": "nouns.words", "max_length": 13}
+
+Index layout (all integers are little-endian):
+
+    header      magic, format version, size of offset, size and mtime of word file,
+                number of words, index of the longest word, number of costs
+    offsets     start of each line, plus end of file (number of words + 1 items)
+    counts      number of words of each cost (word length + 1), 8 bytes each
+    order       indices of words sorted by cost (same size as offsets)
+
+Counts and order are the cost table used for max_slug_length (see coolname.impl._flat_cost_table),
+so it doesn't have to be built in memory.
+"""
+
+
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+import itertools
+import mmap
+import operator
+import os
+import re
+import struct
+import sys
+import warnings
+
+from ._fileutil import atomic_write
+from .exceptions import InitializationError, ConfigurationError
+from .impl import _PackedList
+from .loader import _read_blocks
+
+
+INDEX_EXTENSION = '.cnidx'
+
+_MAGIC = b'CNIDX\0\0\0'
+_VERSION = 2
+_HEADER = struct.Struct('<8sIIQqQQQ')
+_TYPECODES = {4: 'I', 8: 'Q'}
+
+# Number of words decoded at once when iterating
+_CHUNK_SIZE = 10000
+
+# Same as in coolname.loader
+_WORDS_REGEX = re.compile(r'(?:[a-z]+\n)*')
+_WORD_REGEX = re.compile(r'[a-z]+')
+_ONES = itertools.repeat(1)
+
+
+class MappedWordList(_PackedList):
+    """List of single words, stored in a memory-mapped word file (see map_wordlist)."""
+
+    # Words are unique and sorted, so keys for ensure_unique are found
+    # by binary search (see coolname.impl._SortedKeyCounts)
+    _sorted = True
+
+    def __init__(self, path, blob, offsets, longest, counts, order):
+        super().__init__(blob, offsets)
+        self.length = len(offsets) - 1
+        self._path = path
+        # Index of the longest word (to check max_length without reading all words)
+        self._longest = longest
+        # Same as built by _flat_cost_table, but order stays in the index file
+        counts = list(counts)
+        self._cost_table = order, counts, [0, *itertools.accumulate(counts)]
+
+    def __getitem__(self, i: int) -> str:
+        if i >= self.length:
+            raise IndexError('list index out of range')
+        return self._word(i)
+
+    def __iter__(self):
+        # Decoding in chunks is much faster than word by word
+        offsets = self._offsets
+        for start in range(0, self.length, _CHUNK_SIZE):
+            stop = min(start + _CHUNK_SIZE, self.length)
+            yield from str(self._blob[offsets[start]:offsets[stop] - 1], 'utf-8').split('\n')
+
+    def _word(self, i: int) -> str:
+        # Offsets point to the start of lines, so newline is excluded
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1] - 1], 'utf-8')
+
+    def _words(self) -> list[str]:
+        return str(self._blob, 'utf-8').split('\n')[:self.length]
+
+    def _parse(self, words, pos):
+        # Words are sorted, so binary search is used instead of reverse index
+        # (which would load all words into memory).
+        if pos < len(words):
+            i = bisect_left(self, words[pos])
+            if i < self.length and self[i] == words[pos]:
+                yield i, pos + 1
+
+    def __getstate__(self) -> dict:
+        # Word file is mapped again after unpickling (e.g. in worker processes)
+        return {'path': self._path, 'length': self.length}
+
+    def __setstate__(self, state):
+        lst = map_wordlist(state['path'])
+        if lst.length != state['length']:
+            raise InitializationError('Word file was changed: {}'.format(state['path']))
+        self.__dict__.update(lst.__dict__)
+
+
+def map_wordlist(path: str) -> MappedWordList:
+    """
+    Returns MappedWordList for a word file.
+
+    Index is loaded from <path>.cnidx. If it's missing or outdated, it's built and saved;
+    if it can't be saved (e.g. directory is read-only), it's kept in memory.
+    """
+    path = os.path.abspath(path)
+    try:
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            index = _load_index(path + INDEX_EXTENSION, stat)
+            if index is None:
+                scanned = _scan(path, file)
+                try:
+                    _save_index(path + INDEX_EXTENSION, stat, *scanned)
+                    index = _load_index(path + INDEX_EXTENSION, stat)
+                except OSError as ex:
+                    warnings.warn('Failed to write index of {}: {}'.format(path, ex))
+                if index is None:
+                    index = scanned
+            blob = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except OSError as ex:
+        raise InitializationError('Failed to read word file {}: {}'.format(path, ex))
+    return MappedWordList(path, blob, *index)
+
+
+def build_index(path: str) -> int:
+    """
+    Validates word file and saves its index.
+    Useful to build index in advance, e.g. before deploying word file to a read-only location.
+    Returns the number of words.
+    """
+    path = os.path.abspath(path)
+    try:
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            scanned = _scan(path, file)
+        _save_index(path + INDEX_EXTENSION, stat, *scanned)
+    except OSError as ex:
+        raise InitializationError('Failed to index word file {}: {}'.format(path, ex))
+    return len(scanned[0]) - 1
+
+
+def _scan(path, file):
+    """
+    Validates word file: one word per line, sorted and unique.
+    Returns (offsets, longest, counts, order): start of each line plus end of file,
+    index of the longest word, and the cost table (see module docstring).
+    """
+    offsets = array('Q', [0])
+    # Indices of words by length
+    indices: defaultdict[int, array] = defaultdict(lambda: array('Q'))
+    longest = 0
+    longest_length = 0
+    previous = b''
+    for block in _read_blocks(file, b'\n'):
+        count = len(offsets) - 1
+        try:
+            text = block.decode('utf-8')
+        except UnicodeDecodeError as ex:
+            raise ConfigurationError('Invalid UTF-8 in {} line {}'
+                                     .format(path, count + block.count(b'\n', 0, ex.start) + 1))
+        words = text.split('\n')
+        words.pop()
+        if not _WORDS_REGEX.fullmatch(text):
+            for i, word in enumerate(words):
+                if not _WORD_REGEX.fullmatch(word):
+                    raise ConfigurationError('Invalid syntax in {} line {}: {!r}'.format(path, count + i + 1, word))
+        lines = block.split(b'\n')
+        lines.pop()
+        if not (previous < lines[0] and all(map(operator.lt, lines, lines[1:]))):
+            i = next(i for i, x in enumerate(lines) if not (lines[i - 1] if i else previous) < x)
+            raise ConfigurationError('Words are not sorted (or not unique) in {} line {}: {!r}'
+                                     .format(path, count + i + 1, words[i]))
+        previous = lines[-1]
+        lengths = list(map(len, words))
+        for i, length in enumerate(lengths, count):
+            indices[length].append(i)
+        max_length = max(lengths)
+        if max_length > longest_length:
+            longest_length = max_length
+            longest = count + lengths.index(max_length)
+        # Each line takes its length plus newline; the last start is replaced with itself
+        offsets.extend(itertools.accumulate(map(operator.add, map(len, lines), _ONES), initial=offsets.pop()))
+    if len(offsets) == 1:
+        raise ConfigurationError('Word file is empty: {}'.format(path))
+    counts = array('Q', [0]) * (longest_length + 2)
+    order = array('Q')
+    for length in sorted(indices):
+        counts[length + 1] = len(indices[length])
+        order.extend(indices.pop(length))
+    if offsets[-1] < 1 << 32:
+        offsets = array('I', offsets)
+        order = array('I', order)
+    return offsets, longest, counts, order
+
+
+def _save_index(index_path, stat, offsets, longest, counts, order):
+    """Writes index file (processes which build the same index at the same time don't interfere)."""
+    header = _HEADER.pack(_MAGIC, _VERSION, offsets.itemsize, stat.st_size, stat.st_mtime_ns,
+                          len(offsets) - 1, longest, len(counts))
+    with atomic_write(index_path) as file:
+        file.write(header)
+        for items in (offsets, counts, order):
+            if sys.byteorder != 'little':  # pragma: no cover
+                items = array(items.typecode, items)
+                items.byteswap()
+            file.write(items.tobytes())
+
+
+def _load_index(index_path, stat):
+    """
+    Returns (offsets, longest, counts, order) from index file,
+    or None if it's missing, corrupted or outdated.
+    """
+    try:
+        with open(index_path, 'rb') as file:
+            data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, itemsize, size, mtime_ns, count, longest, costs = _HEADER.unpack_from(data)
+    if ((magic, version, size, mtime_ns) != (_MAGIC, _VERSION, stat.st_size, stat.st_mtime_ns) or
+            itemsize not in _TYPECODES or len(data) != _HEADER.size + (2 * count + 1) * itemsize + costs * 8):
+        return None
+    typecode = _TYPECODES[itemsize]
+    counts_start = _HEADER.size + (count + 1) * itemsize
+    order_start = counts_start + costs * 8
+    parts = [(data[_HEADER.size:counts_start], typecode), (data[counts_start:order_start], 'Q'),
+             (data[order_start:], typecode)]
+    if sys.byteorder != 'little':  # pragma: no cover
+        arrays = []
+        for part, x in parts:
+            items = array(x)
+            items.frombytes(part)
+            items.byteswap()
+            arrays.append(items)
+        return arrays[0], longest, arrays[1], arrays[2]
+    offsets, counts, order = (part.cast(x) for part, x in parts)
+    return offsets, longest, counts, order
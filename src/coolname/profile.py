@@ -0,0 +1,118 @@
+"""
+This module provides profiling of generator construction.
+
+    >>> from coolname.profile import ConstructionProfile
+    >>> with ConstructionProfile() as profile:
+    ...     generator = RandomGenerator(load_config(path))
+    >>> profile._dump(sys.stdout)
+
+Profile records wall time and number of allocated memory blocks
+for each phase of load_config() and RandomGenerator() and for each config node.
+When there is no active profile, profiling costs almost nothing.
+"""
+
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import sys
+import time
+from typing import Iterator
+
+
+class ProfileEntry:
+    """
+    One phase of construction, or one config node.
+
+    time - wall time in seconds, including children.
+    blocks - net number of allocated memory blocks (see sys.getallocatedblocks), including children.
+    """
+
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind
+        self.time = 0.0
+        self.blocks = 0
+        self.children: list['ProfileEntry'] = []
+
+    def __repr__(self):
+        return '<ProfileEntry {} {!r} time={:.6f} blocks={}>'.format(self.kind, self.name, self.time, self.blocks)
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'time': self.time,
+            'blocks': self.blocks,
+            'children': [x.as_dict() for x in self.children],
+        }
+
+    def _dump(self, stream, indent=''):
+        name = self.name if self.kind == 'phase' else '{} {!r}'.format(self.kind, self.name)
+        stream.write('{}{}: {:.3f} ms, {:+,} blocks\n'.format(indent, name, self.time * 1000, self.blocks))
+        for child in self.children:
+            child._dump(stream, indent + '  ')
+
+
+class ConstructionProfile:
+    """
+    Context manager which records construction phases in the current thread (or asyncio task).
+
+    Entries form a tree: top-level entries are load_config and RandomGenerator calls,
+    their children are phases, and so on.
+    """
+
+    def __init__(self) -> None:
+        self.entries: list[ProfileEntry] = []
+        self._stack: list[ProfileEntry] = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_profile.set(self)
+        return self
+
+    def __exit__(self, *args):
+        _current_profile.reset(self._token)  # type: ignore
+
+    def phases(self) -> dict[str, float]:
+        """Returns total time of each phase (summed over all entries with the same name), in seconds."""
+        result: dict[str, float] = {}
+
+        def visit(entries):
+            for entry in entries:
+                if entry.kind == 'phase':
+                    result[entry.name] = result.get(entry.name, 0.0) + entry.time
+                visit(entry.children)
+
+        visit(self.entries)
+        return result
+
+    def as_dict(self) -> list[dict]:
+        """Returns the whole tree as a list of nested dictionaries."""
+        return [x.as_dict() for x in self.entries]
+
+    def _dump(self, stream):
+        for entry in self.entries:
+            entry._dump(stream)
+
+
+_current_profile: ContextVar[ConstructionProfile | None] = ContextVar('coolname_profile', default=None)
+
+
+@contextmanager
+def _profile(name: str, kind: str = 'phase') -> Iterator[None]:
+    """Records the enclosed block in the active profile (if any)."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    entry = ProfileEntry(name, kind)
+    (profile._stack[-1].children if profile._stack else profile.entries).append(entry)
+    profile._stack.append(entry)
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry.time = time.perf_counter() - start
+        entry.blocks = sys.getallocatedblocks() - blocks
+        profile._stack.pop()
@@ -0,0 +1,204 @@
+"""
+This module provides a registry of issued names, stored in SQLite database.
+
+Use it if names must never repeat, even across restarts and processes.
+
+Registry stores numbers of combinations (see RandomGenerator.index_to_slug),
+not strings. Names are reserved in blocks: each block takes one transaction,
+and then names are handed out from memory.
+
+Numbers make sense only for the same generator and pattern, so each table is bound
+to them on first use (see _META_TABLE), and opening it with another generator or pattern fails.
+"""
+
+
+from collections import deque
+import re
+import sqlite3
+
+from .exceptions import InitializationError
+from .impl import _md5
+
+
+# SQLite integers are signed 64-bit
+_MAX_INDEX = 2**63 - 1
+
+# Max number of variables in one SQL statement (default limit of SQLite 3.32+ is 32766)
+_MAX_VARIABLES = 500
+
+# Pattern, number of combinations and fingerprint of generator for each table of issued names
+_META_TABLE = 'coolname_registry_meta'
+
+# Number of combinations used for fingerprint (see _fingerprint)
+_FINGERPRINT_SAMPLES = 64
+
+
+def _fingerprint(lst):
+    """
+    Returns hash of combinations at evenly spaced numbers.
+    It changes if config is changed so that numbers give other names (e.g. words are added or removed).
+    """
+    step = max(1, lst.length // _FINGERPRINT_SAMPLES)
+    md5 = _md5()
+    for words in lst.get_many(range(0, lst.length, step)):
+        md5.update(' '.join(words).encode('utf-8') + b'\n')
+    return md5.hexdigest()
+
+
+class SlugRegistry:
+    """
+    Generates random names which were never issued before by any registry
+    using the same database file and table.
+
+    Table is bound to generator and pattern which used it first.
+    Raises InitializationError if table was used with another pattern or config
+    (use different tables for them).
+
+    Names are reserved by blocks of block_size in one transaction,
+    and kept in memory until handed out. Names which are reserved but not handed out
+    (e.g. when process exits) are never issued.
+
+    Database is opened in WAL mode, so several processes can share it.
+    This class itself is not thread-safe: use one instance per thread.
+    """
+
+    # If reserve() can't find any new name in this many attempts, namespace is considered exhausted
+    max_attempts = 100
+
+    def __init__(self, generator, path, pattern=None, block_size=1000, table='coolname_issued', timeout=30.0):
+        if block_size < 1:
+            raise ValueError('block_size must be positive')
+        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', table):
+            raise ValueError('Invalid table name: {!r}'.format(table))
+        length = generator._lists[pattern].length
+        if length - 1 > _MAX_INDEX:
+            raise ValueError('Too many combinations to store in SQLite: {}'.format(length))
+        self._generator = generator
+        self._pattern = pattern
+        self._table = table
+        self.block_size = block_size
+        self._buffer = deque()
+        try:
+            # Transactions are controlled explicitly (see reserve)
+            self._connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            meta = (repr(pattern), length, _fingerprint(generator._lists[pattern]))
+            bound_meta = self._bind_table(*meta)
+        except sqlite3.Error as ex:
+            raise InitializationError('Failed to open registry {}: {}'.format(path, ex))
+        if bound_meta != meta:
+            self._connection.close()
+            if bound_meta[:2] != meta[:2]:
+                raise InitializationError('Registry table {!r} was created for pattern {} with {} combinations, '
+                                          'not for pattern {} with {} combinations: {}'
+                                          .format(table, *bound_meta[:2], *meta[:2], path))
+            raise InitializationError('Registry table {!r} was created for another config: {}'.format(table, path))
+
+    def _bind_table(self, pattern, length, fingerprint):
+        """
+        Creates tables (if necessary) and binds the table of issued names to the generator on first use.
+        Returns (pattern, length, fingerprint) which the table is bound to.
+        """
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # INTEGER PRIMARY KEY is the rowid itself, so table has no separate index
+            connection.execute('CREATE TABLE IF NOT EXISTS {} (id INTEGER PRIMARY KEY)'.format(self._table))
+            connection.execute('CREATE TABLE IF NOT EXISTS {} (table_name TEXT PRIMARY KEY, pattern TEXT, '
+                               'length INTEGER, fingerprint TEXT)'.format(_META_TABLE))
+            connection.execute('INSERT OR IGNORE INTO {} VALUES (?, ?, ?, ?)'.format(_META_TABLE),
+                               (self._table, pattern, length, fingerprint))
+            meta = connection.execute('SELECT pattern, length, fingerprint FROM {} WHERE table_name = ?'
+                                      .format(_META_TABLE), (self._table, )).fetchone()
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return meta
+
+    def reserve(self, n):
+        """
+        Reserves n new names in one transaction and adds them to the buffer.
+
+        If namespace is nearly exhausted, reserves as many as it can find.
+        Raises RuntimeError if there are no new names at all.
+        """
+        connection = self._connection
+        fresh = {}
+        attempts = 0
+        # IMMEDIATE takes the write lock right away, so other processes can't reserve the same names
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            while len(fresh) < n:
+                candidates = {i: x for i, x in self._generator._generate_indexed_many(n - len(fresh), self._pattern)
+                              if i not in fresh}
+                ids = list(candidates)
+                for start in range(0, len(ids), _MAX_VARIABLES):
+                    chunk = ids[start:start + _MAX_VARIABLES]
+                    query = 'SELECT id FROM {} WHERE id IN ({})'.format(self._table, ','.join('?' * len(chunk)))
+                    for (i, ) in connection.execute(query, chunk):
+                        del candidates[i]
+                if candidates:
+                    attempts = 0
+                else:
+                    attempts += 1
+                    if attempts >= self.max_attempts:
+                        break
+                fresh.update(candidates)
+            if not fresh:
+                raise RuntimeError('Failed to reserve new names in {} attempts, namespace is probably exhausted'
+                                   .format(self.max_attempts))
+            connection.executemany('INSERT INTO {} (id) VALUES (?)'.format(self._table), ((i, ) for i in fresh))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        self._buffer.extend(fresh.values())
+
+    def generate(self):
+        """Returns a new name as a list of strings."""
+        if not self._buffer:
+            self.reserve(self.block_size)
+        return self._buffer.popleft()
+
+    def generate_slug(self, separator='-'):
+        """Returns a new name as a slug."""
+        return separator.join(self.generate())
+
+    def generate_many(self, n):
+        """Returns n new names, each as a list of strings."""
+        if n > len(self._buffer):
+            # Reserve everything in one go, but keep the buffer full as usual
+            self.reserve(n - len(self._buffer) + self.block_size)
+            if n > len(self._buffer):
+                raise RuntimeError('Only {} new names left, namespace is probably exhausted'.format(len(self._buffer)))
+        buffer = self._buffer
+        return [buffer.popleft() for _ in range(n)]
+
+    def generate_slug_many(self, n, separator='-'):
+        """Returns n new names, each as a slug."""
+        join = separator.join
+        return [join(x) for x in self.generate_many(n)]
+
+    def is_issued(self, slug, separator='-'):
+        """
+        Returns True if slug was issued (or reserved) by any registry using the same database.
+        """
+        try:
+            i = self._generator.slug_to_index(slug, self._pattern, separator)
+        except ValueError:
+            return False
+        query = 'SELECT 1 FROM {} WHERE id = ?'.format(self._table)
+        return self._connection.execute(query, (i, )).fetchone() is not None
+
+    def close(self):
+        """Closes the database. Names left in the buffer are discarded."""
+        self._buffer.clear()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
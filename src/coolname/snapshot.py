@@ -0,0 +1,342 @@
+"""
+This module provides functions to save RandomGenerator into a snapshot file
+and to load it back.
+
+Snapshot contains the final tree, so loading it skips
+reading word lists, validation and tree building. Word lists are not
+copied into memory: they are read directly from the memory-mapped file,
+and memory pages are shared between processes which load the same snapshot.
+
+File layout (all integers are little-endian):
+
+    header      magic, format version, checksum, size of metadata
+    metadata    JSON: generator options, tree nodes, locations of arrays
+    data        UTF-8 blobs and offset arrays (aligned to 8 bytes)
+
+Checksum is CRC-32 of everything after the header.
+
+Snapshots are also used as a compile cache (see load_cached).
+"""
+
+
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import warnings
+import zlib
+
+from ._fileutil import atomic_write
+from ._version import __version__
+from .config import _CONF
+from .exceptions import InitializationError
+from .impl import RandomGenerator, NestedList, CartesianList, Scalar, WordList, PhraseList, \
+    PackedWordList, PackedPhraseList, WordAsPhraseWrapper, TopLevelMultiWrapper, _compile
+from .mapped import MappedWordList
+
+
+SNAPSHOT_EXTENSION = '.cnsnap'
+
+_MAGIC = b'CNSNAP\0\0'
+_VERSION = 1
+# magic, version, checksum, metadata size
+_HEADER = struct.Struct('<8sIIQ')
+_ALIGNMENT = 8
+# Typecodes for offset arrays, by item size
+_TYPECODES = {4: 'I', 8: 'Q'}
+
+
+def compile_snapshot(config, path):
+    """
+    Creates RandomGenerator from config and saves it to a snapshot file.
+
+    Config can be a dict or a path (see load_config).
+    """
+    if isinstance(config, (str, os.PathLike)):
+        from .loader import load_config
+        config = load_config(config)
+    save_snapshot(RandomGenerator(config), path)
+
+
+def save_snapshot(generator, path):
+    """
+    Saves RandomGenerator to a snapshot file.
+    Snapshot which is already loaded by other processes can be replaced safely (see atomic_write).
+    """
+    writer = _SnapshotWriter()
+    metadata = {
+        'options': {
+            _CONF.FIELD.ENSURE_UNIQUE: generator._ensure_unique,
+            _CONF.FIELD.ENSURE_UNIQUE_PREFIX: generator._check_prefix,
+            _CONF.FIELD.MAX_SLUG_LENGTH: generator._max_slug_length,
+        },
+        'patterns': [[pattern, writer.add(lst)] for pattern, lst in generator._lists.items()],
+        'nodes': writer.nodes,
+    }
+    meta_bytes = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    meta_bytes += b' ' * (-(_HEADER.size + len(meta_bytes)) % _ALIGNMENT)
+    payload = [meta_bytes, *writer.chunks]
+    checksum = 0
+    for chunk in payload:
+        checksum = zlib.crc32(chunk, checksum)
+    with atomic_write(path) as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, checksum, len(meta_bytes)))
+        for chunk in payload:
+            file.write(chunk)
+
+
+def load_snapshot(path, rand=None, verify=True, compact=True):
+    """
+    Loads RandomGenerator from a snapshot file.
+
+    If verify is True, checksum is verified (this reads the whole file).
+    If compact is False, word lists are copied into memory as ordinary lists
+    (generation is faster, but memory is not shared between processes).
+
+    Raises InitializationError if file is missing, corrupted
+    or was created by incompatible version of coolname.
+    """
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        raise InitializationError('Failed to read snapshot {}: {}'.format(path, ex))
+    if len(data) < _HEADER.size:
+        raise InitializationError('Not a coolname snapshot: {}'.format(path))
+    magic, version, checksum, meta_size = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise InitializationError('Not a coolname snapshot: {}'.format(path))
+    if version != _VERSION:
+        raise InitializationError('Unsupported snapshot version {} (expected {}): {}'
+                                  .format(version, _VERSION, path))
+    view = memoryview(data)
+    if verify and zlib.crc32(view[_HEADER.size:]) != checksum:
+        raise InitializationError('Snapshot is corrupted (checksum mismatch): {}'.format(path))
+    try:
+        metadata = json.loads(bytes(view[_HEADER.size:_HEADER.size + meta_size]))
+        reader = _SnapshotReader(view, _HEADER.size + meta_size, metadata['nodes'], compact)
+        options = metadata['options']
+        generator = RandomGenerator.__new__(RandomGenerator)
+        generator.random = rand
+        generator._lists = {pattern: reader.get(node_id) for pattern, node_id in metadata['patterns']}
+        generator._ensure_unique = options[_CONF.FIELD.ENSURE_UNIQUE]
+        generator._check_prefix = options[_CONF.FIELD.ENSURE_UNIQUE_PREFIX]
+        generator._max_slug_length = options[_CONF.FIELD.MAX_SLUG_LENGTH]
+    except (KeyError, IndexError, TypeError, ValueError) as ex:
+        raise InitializationError('Snapshot is corrupted ({}): {}'.format(ex, path))
+    return generator
+
+
+def load_cached(path, rand=None, cache_dir=None):
+    """
+    Creates RandomGenerator from a config path (see load_config), using compile cache.
+
+    Cache is a directory with snapshots, one per config path. Snapshot is valid
+    while names, sizes and modification times of config files stay the same.
+    Cache directory is cache_dir or COOLNAME_CACHE_DIR; if neither is set, cache is not used.
+    """
+    return _load_cached(path, lambda: _compile(path, rand), rand, cache_dir)
+
+
+def _load_cached(path, create, rand=None, cache_dir=None):
+    cache_dir = cache_dir or os.getenv('COOLNAME_CACHE_DIR')
+    if not cache_dir:
+        return create()
+    try:
+        prefix, key = _cache_key(path)
+    except OSError:
+        # Missing path etc. - let load_config raise the proper error
+        return create()
+    cache_path = os.path.join(cache_dir, prefix + key + SNAPSHOT_EXTENSION)
+    if os.path.isfile(cache_path):
+        try:
+            return load_snapshot(cache_path, rand, compact=False)
+        except InitializationError:
+            pass  # Corrupted or incompatible, rebuild it
+    generator = create()
+    if _uses_word_files(generator):
+        # Word files are not covered by cache key, and copying them into cache defeats their purpose
+        return generator
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_snapshot(generator, cache_path)
+        # Remove snapshots of older versions of the same config.
+        # Other files (e.g. temporary files which other processes are writing right now) are kept.
+        old_name = re.compile(re.escape(prefix) + '[0-9a-f]{32}' + re.escape(SNAPSHOT_EXTENSION))
+        for file_name in os.listdir(cache_dir):
+            if old_name.fullmatch(file_name) and file_name != os.path.basename(cache_path):
+                try:
+                    os.unlink(os.path.join(cache_dir, file_name))
+                except FileNotFoundError:
+                    pass  # Removed by another process
+    except OSError as ex:
+        warnings.warn('Failed to write coolname cache to {}: {}'.format(cache_dir, ex))
+    return generator
+
+
+def _uses_word_files(generator):
+    """Returns True if generator has lists from memory-mapped word files (see coolname.mapped)."""
+    stack = list(generator._lists.values())
+    seen = set()
+    while stack:
+        lst = stack.pop()
+        if id(lst) in seen:
+            continue
+        seen.add(id(lst))
+        if isinstance(lst, MappedWordList):
+            return True
+        elif isinstance(lst, WordAsPhraseWrapper):
+            stack.append(lst._list)
+        elif isinstance(lst, NestedList):
+            stack.extend(lst._lists)
+        elif isinstance(lst, CartesianList):
+            stack.extend(x for x, _ in lst._list_divs)
+    return False
+
+
+def _cache_key(path):
+    """
+    Returns cache file name prefix (same for the same config path)
+    and key (changes when config files change).
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, x) for x in os.listdir(path)
+                       if x == 'config.json' or os.path.splitext(x)[1] == '.txt')
+    else:
+        files = [path]
+    sha = hashlib.sha256(repr((__version__, _VERSION)).encode('utf-8'))
+    for file_path in files:
+        stat = os.stat(file_path)
+        sha.update(repr((os.path.basename(file_path), stat.st_size, stat.st_mtime_ns)).encode('utf-8'))
+    name = os.path.basename(path.rstrip(os.sep)) or 'root'
+    prefix = '{}-{}-'.format(name, hashlib.sha256(path.encode('utf-8')).hexdigest()[:16])
+    return prefix, sha.hexdigest()[:32]
+
+
+class _SnapshotWriter:
+    """Transforms tree into a list of node descriptions plus data chunks."""
+
+    def __init__(self):
+        self.nodes = []
+        self.chunks = []
+        self._size = 0
+        # Same list can appear in several places of the tree (see squash)
+        self._node_ids = {}
+
+    def add(self, lst):
+        try:
+            return self._node_ids[id(lst)]
+        except KeyError:
+            pass
+        if isinstance(lst, TopLevelMultiWrapper):
+            node = {'type': 'top_level_multi', 'list': self.add(lst._list)}
+        elif isinstance(lst, WordAsPhraseWrapper):
+            node = {'type': 'word_as_phrase', 'list': self.add(lst._list)}
+        elif isinstance(lst, NestedList):
+            node = {'type': _CONF.TYPE.NESTED, 'lists': [self.add(x) for x in lst._lists]}
+        elif isinstance(lst, CartesianList):
+            # Save sublists which are actually used for generation
+            node = {'type': _CONF.TYPE.CARTESIAN, 'lists': [self.add(x) for x, _ in lst._list_divs]}
+        elif isinstance(lst, Scalar):
+            node = {'type': _CONF.TYPE.CONST, 'value': lst.value}
+        elif isinstance(lst, (WordList, PackedWordList, MappedWordList)):
+            packed = lst if isinstance(lst, PackedWordList) else PackedWordList.pack(lst)
+            node = {
+                'type': _CONF.TYPE.WORDS,
+                'blob': self._add_chunk(packed._blob),
+                'offsets': self._add_array(packed._offsets),
+            }
+        elif isinstance(lst, (PhraseList, PackedPhraseList)):
+            packed = lst if isinstance(lst, PackedPhraseList) else PackedPhraseList.pack(lst)
+            node = {
+                'type': _CONF.TYPE.PHRASES,
+                'blob': self._add_chunk(packed._blob),
+                'offsets': self._add_array(packed._offsets),
+                'phrase_offsets': self._add_array(packed._phrase_offsets),
+            }
+        else:
+            raise InitializationError('Unsupported list type: {}'.format(lst.__class__.__name__))
+        self.nodes.append(node)
+        self._node_ids[id(lst)] = len(self.nodes) - 1
+        return self._node_ids[id(lst)]
+
+    def _add_chunk(self, data):
+        data = bytes(data)
+        position = self._size
+        self.chunks.append(data)
+        padding = b'\0' * (-len(data) % _ALIGNMENT)
+        if padding:
+            self.chunks.append(padding)
+        self._size += len(data) + len(padding)
+        return [position, len(data)]
+
+    def _add_array(self, values):
+        if not isinstance(values, array) or values.itemsize not in _TYPECODES:
+            values = array('Q', values)
+        if sys.byteorder != 'little':  # pragma: no cover
+            values = array(values.typecode, values)
+            values.byteswap()
+        return [*self._add_chunk(values.tobytes()), values.itemsize]
+
+
+class _SnapshotReader:
+    """Creates tree from node descriptions, using memory-mapped data."""
+
+    def __init__(self, view, data_start, nodes, compact=True):
+        self._view = view
+        self._data_start = data_start
+        self._nodes = nodes
+        self._compact = compact
+        self._lists = {}
+
+    def get(self, node_id):
+        try:
+            return self._lists[node_id]
+        except KeyError:
+            pass
+        node = self._nodes[node_id]
+        node_type = node['type']
+        if node_type == 'top_level_multi':
+            lst = TopLevelMultiWrapper(self.get(node['list']))
+        elif node_type == 'word_as_phrase':
+            lst = WordAsPhraseWrapper(self.get(node['list']))
+        elif node_type == _CONF.TYPE.NESTED:
+            lst = NestedList([self.get(x) for x in node['lists']])
+        elif node_type == _CONF.TYPE.CARTESIAN:
+            lst = CartesianList([self.get(x) for x in node['lists']])
+        elif node_type == _CONF.TYPE.CONST:
+            lst = Scalar(node['value'])
+        elif node_type == _CONF.TYPE.WORDS:
+            lst = PackedWordList(self._chunk(node['blob']), self._array(node['offsets']))
+            if not self._compact:
+                lst = lst.unpack()
+        elif node_type == _CONF.TYPE.PHRASES:
+            lst = PackedPhraseList(self._chunk(node['blob']), self._array(node['offsets']),
+                                   self._array(node['phrase_offsets']))
+            if not self._compact:
+                lst = lst.unpack()
+        else:
+            raise ValueError('unknown node type {!r}'.format(node_type))
+        self._lists[node_id] = lst
+        return lst
+
+    def _chunk(self, location):
+        position, size = location[:2]
+        start = self._data_start + position
+        if start + size > len(self._view):
+            raise ValueError('data out of bounds')
+        return self._view[start:start + size]
+
+    def _array(self, location):
+        chunk = self._chunk(location)
+        typecode = _TYPECODES[location[2]]
+        if sys.byteorder != 'little':  # pragma: no cover
+            values = array(typecode, chunk)
+            values.byteswap()
+            return values
+        return chunk.cast(typecode)
@@ -0,0 +1,361 @@
+"""
+This module provides tools for generating names without repeats.
+
+You will need this only if you want stronger uniqueness guarantees
+than randomness can give.
+"""
+
+
+import hashlib
+import math
+import mmap
+import struct
+
+from ._fileutil import atomic_write
+from .exceptions import InitializationError
+from .impl import _to_key_bytes
+
+
+class _FeistelPermutation:
+    """
+    Keyed pseudorandom permutation of range(length).
+
+    Balanced Feistel network permutes numbers of 2*k bits,
+    where 4**k is the smallest power of 4 greater or equal to length.
+    Numbers outside of range are walked through the permutation again
+    (cycle-walking) until they fall into the range.
+    Since 4**k < 4 * length, it takes less than 4 steps on average.
+
+    This is not a cryptographically secure permutation.
+    """
+
+    rounds = 4
+
+    def __init__(self, length, key):
+        self.length = length
+        self._half_bits = max(1, ((length - 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half_bits) - 1
+        self._input_size = (self._half_bits + 7) // 8
+        digest_size = min(64, self._input_size)
+        key = _to_key_bytes(key)
+        # Keyed hash function for each round. We copy them instead of creating new ones, it's faster.
+        self._round_hashes = [
+            hashlib.blake2b(digest_size=digest_size,
+                            key=hashlib.blake2b(key, digest_size=32, person=b'coolname', salt=bytes([i])).digest())
+            for i in range(self.rounds)
+        ]
+
+    def _encrypt(self, value):
+        half_bits, mask, input_size = self._half_bits, self._mask, self._input_size
+        left, right = value >> half_bits, value & mask
+        for round_hash in self._round_hashes:
+            h = round_hash.copy()
+            h.update(right.to_bytes(input_size, 'little'))
+            left, right = right, left ^ (int.from_bytes(h.digest(), 'little') & mask)
+        return (left << half_bits) | right
+
+    def __call__(self, value):
+        if not 0 <= value < self.length:
+            raise IndexError('value out of range')
+        value = self._encrypt(value)
+        while value >= self.length:
+            value = self._encrypt(value)
+        return value
+
+
+class UniqueSequence:
+    """
+    Sequence of names which never repeats until the namespace is exhausted.
+
+    Names are taken in pseudorandom order defined by the key:
+    n-th name of the sequence is the combination number permutation(n),
+    where permutation is a keyed bijection of range(get_combinations_count(pattern)).
+    Nothing is stored except the current position, so memory usage is constant.
+
+    To resume the sequence (e.g. after restart), save `position`
+    and create sequence with the same key and start=position.
+
+    Several processes can share one namespace by taking
+    non-overlapping [start, stop) ranges with the same key (see split).
+
+    Combinations rejected by generator constraints (ensure_unique etc.) are skipped.
+
+    Don't create this class directly, use RandomGenerator.unique_sequence().
+    """
+
+    def __init__(self, generator, key, pattern=None, start=0, stop=None):
+        self._generator = generator
+        self._key = key
+        self._pattern = pattern
+        self._list = generator._lists[pattern]
+        self._permutation = _FeistelPermutation(self._list.length, key)
+        if stop is None:
+            stop = self._list.length
+        if not 0 <= start <= stop <= self._list.length:
+            raise ValueError('Invalid range [{}, {}) for {} combinations'.format(start, stop, self._list.length))
+        self.position = start
+        self.stop = stop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """Returns next name as a list of strings, or raises StopIteration if sequence is exhausted."""
+        lst = self._list
+        permutation = self._permutation
+        is_rejected = self._generator._is_rejected
+        while self.position < self.stop:
+            result = lst[permutation(self.position)]
+            self.position += 1
+            if not is_rejected(result):
+                return result
+        raise StopIteration
+
+    def next_slug(self, separator='-'):
+        """Returns next name as a slug, or raises StopIteration if sequence is exhausted."""
+        return separator.join(next(self))
+
+    def split(self, parts):
+        """
+        Splits the rest of the sequence into given number of non-overlapping sequences
+        of approximately equal size.
+        """
+        start, size = self.position, self.stop - self.position
+        bounds = [start + size * i // parts for i in range(parts + 1)]
+        return [UniqueSequence(self._generator, self._key, self._pattern, bounds[i], bounds[i + 1])
+                for i in range(parts)]
+
+
+class _BloomFilter:
+    """
+    Bloom filter of non-negative integers, stored in a bit array.
+
+    bits can be bytearray or writable memoryview of mmap.
+    Positions of item are calculated by double hashing: h1 + j * h2 (mod size), j = 0 ... hashes - 1.
+    """
+
+    def __init__(self, bits, size, hashes):
+        self.bits = bits
+        self.size = size
+        self.hashes = hashes
+
+    @staticmethod
+    def optimal_parameters(capacity, error_rate):
+        """Returns (size, hashes) for given number of items and false positive rate."""
+        size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return size, hashes
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.to_bytes((value.bit_length() + 8) // 8, 'little'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + j * h2) % size for j in range(self.hashes)]
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[x >> 3] & (1 << (x & 7)) for x in self._positions(value))
+
+    def add(self, value):
+        """Adds value. Returns False if value was (probably) added before."""
+        bits = self.bits
+        added = False
+        for x in self._positions(value):
+            mask = 1 << (x & 7)
+            if not bits[x >> 3] & mask:
+                bits[x >> 3] |= mask
+                added = True
+        return added
+
+    def fill_ratio(self):
+        """Returns fraction of bits which are set."""
+        chunk_size = 1 << 20
+        count = sum(int.from_bytes(self.bits[i:i + chunk_size], 'little').bit_count()
+                    for i in range(0, len(self.bits), chunk_size))
+        return count / self.size
+
+
+class UniqueGenerator:
+    """
+    Generates random names which very probably were never generated before.
+
+    Generated combinations (not strings) are remembered in a Bloom filter,
+    which takes about 1.8 bytes per combination for error_rate=0.001.
+    Filter has no false negatives, so names never repeat. False positives only mean
+    that some combinations which were never generated are skipped.
+    Filter is designed for up to capacity names; after that, error rate grows.
+
+    Filter can be saved to a file and loaded back (see save and load).
+    Loaded filter is memory-mapped, and changes go directly to the file.
+
+    This class is not thread-safe.
+    """
+
+    # If generate() retries this many times in a row, filter is considered full
+    max_attempts = 10000
+
+    def __init__(self, generator, capacity, error_rate=0.001, pattern=None):
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+        size, hashes = _BloomFilter.optimal_parameters(capacity, error_rate)
+        self._init(generator, pattern, _BloomFilter(bytearray((size + 7) // 8), size, hashes), 0)
+
+    def _init(self, generator, pattern, bloom_filter, count):
+        self._generator = generator
+        self._pattern = pattern
+        self._list = generator._lists[pattern]
+        self._filter = bloom_filter
+        self._mmap = None
+        self.count = count
+
+    def generate(self):
+        """Generates and returns random name as a list of strings."""
+        generator = self._generator
+        lst = self._list
+        randrange = generator._get_randrange()
+        # Same as in RandomGenerator.generate()
+        length_limit = generator._get_length_limit(self._pattern)
+        is_rejected = generator._get_is_rejected(self._pattern)
+        for _ in range(self.max_attempts):
+            if length_limit is None:
+                i = randrange(lst.length)
+            else:
+                i = length_limit(randrange(length_limit.count))
+            result = lst[i]
+            if is_rejected(result):
+                continue
+            if self._filter.add(i):
+                self.count += 1
+                return result
+        raise RuntimeError('Failed to generate a new name in {} attempts, filter is probably full'
+                           .format(self.max_attempts))
+
+    def generate_slug(self, separator='-'):
+        """Generates and returns random name as a slug."""
+        return separator.join(self.generate())
+
+    def generate_many(self, n):
+        """
+        Generates and returns n random names, each as a list of strings.
+
+        Equivalent to calling generate() n times, but faster.
+        """
+        add = self._filter.add
+        results = [x for i, x in self._generator._generate_indexed_many(n, self._pattern) if add(i)]
+        self.count += len(results)
+        # Replace rejected and repeated combinations
+        while len(results) < n:
+            results.append(self.generate())
+        return results
+
+    def generate_slug_many(self, n, separator='-'):
+        """
+        Generates and returns n random names, each as a slug.
+
+        Equivalent to calling generate_slug() n times, but faster.
+        """
+        join = separator.join
+        return [join(x) for x in self.generate_many(n)]
+
+    @property
+    def fill_ratio(self):
+        """Fraction of bits which are set in the filter (0.5 is the optimum for full capacity)."""
+        return self._filter.fill_ratio()
+
+    @property
+    def false_positive_rate(self):
+        """Probability that a combination which was never generated is considered generated."""
+        return self.fill_ratio ** self._filter.hashes
+
+    @property
+    def retry_rate(self):
+        """
+        Probability that a random combination is rejected, either because it was generated before
+        (or false positive), or because of generator constraints (see RandomGenerator.retry_rates).
+
+        When it becomes high, it's time to switch to a longer pattern.
+        """
+        generator = self._generator
+        used = min(1.0, self.count / (generator.get_combinations_count(self._pattern, constrained=True) or 1))
+        accept = (1 - generator.retry_rates[self._pattern]) * (1 - used) * (1 - self.false_positive_rate)
+        return 1 - accept
+
+    def save(self, path):
+        """
+        Saves filter to a file.
+        """
+        with atomic_write(path) as file:
+            file.write(self._header())
+            file.write(self._filter.bits)
+
+    @classmethod
+    def load(cls, generator, path, pattern=None):
+        """
+        Loads filter from a file created by save().
+
+        File is memory-mapped for reading and writing: generated names are added to it
+        as they are generated. Call flush() or close() to make sure that changes are written to disk.
+
+        Raises InitializationError if file is missing, corrupted
+        or was created for a generator with different number of combinations.
+        """
+        try:
+            with open(path, 'r+b') as file:
+                data = mmap.mmap(file.fileno(), 0)
+        except (OSError, ValueError) as ex:
+            raise InitializationError('Failed to read filter {}: {}'.format(path, ex))
+        if len(data) < _FILTER_HEADER.size:
+            data.close()
+            raise InitializationError('Not a coolname filter: {}'.format(path))
+        magic, version, hashes, size, count, length = _FILTER_HEADER.unpack_from(data)
+        error = None
+        if magic != _FILTER_MAGIC:
+            error = 'Not a coolname filter: {}'.format(path)
+        elif version != _FILTER_VERSION:
+            error = 'Unsupported filter version {} (expected {}): {}'.format(version, _FILTER_VERSION, path)
+        elif len(data) != _FILTER_HEADER.size + (size + 7) // 8:
+            error = 'Filter is corrupted (size mismatch): {}'.format(path)
+        elif length != generator._lists[pattern].length:
+            error = 'Filter was created for {} combinations, generator has {}: {}'.format(
+                length, generator._lists[pattern].length, path)
+        if error:
+            data.close()
+            raise InitializationError(error)
+        unique_generator = cls.__new__(cls)
+        unique_generator._init(generator, pattern,
+                               _BloomFilter(memoryview(data)[_FILTER_HEADER.size:], size, hashes), count)
+        unique_generator._mmap = data
+        return unique_generator
+
+    def flush(self):
+        """Writes changes to the file (if filter was loaded from a file)."""
+        if self._mmap is not None:
+            self._mmap[:_FILTER_HEADER.size] = self._header()
+            self._mmap.flush()
+
+    def close(self):
+        """Writes changes and closes the file (if filter was loaded from a file)."""
+        if self._mmap is not None:
+            self.flush()
+            self._filter.bits.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _header(self):
+        return _FILTER_HEADER.pack(_FILTER_MAGIC, _FILTER_VERSION, self._filter.hashes, self._filter.size,
+                                   self.count, self._list.length)
+
+
+_FILTER_MAGIC = b'CNBLOOM\0'
+_FILTER_VERSION = 1
+# magic, version, number of hashes, size in bits, number of generated names, number of combinations
+_FILTER_HEADER = struct.Struct('<8sIIQQQ')
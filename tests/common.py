@@ -3,6 +3,8 @@ import unittest
 from unittest import mock
 from unittest.mock import patch
 
+from coolname import RandomGenerator
+
 TESTS_DIR = op.dirname(op.abspath(__file__))
 PROJECT_DIR = op.abspath(op.join(TESTS_DIR, '..'))
 EXAMPLES_DIR = op.join(PROJECT_DIR, 'examples')
@@ -12,6 +14,16 @@ class TestCase(unittest.TestCase):
     pass
 
 
+def make_generator(**options):
+    """Returns generator of 100 slugs (pairs of digits) with given options of 'all'."""
+    config = {
+        'all': {'type': 'cartesian', 'lists': ['digits', 'digits']},
+        'digits': {'type': 'words', 'words': [str(x) for x in range(10)]}
+    }
+    config['all'].update(options)
+    return RandomGenerator(config)
+
+
 class FakeRandom(object):
     """Generates 0, 1, 2..."""
 
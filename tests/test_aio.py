@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+from coolname import RandomGenerator, use_random
+from coolname import aio
+from coolname.aio import LatencyHistogram, SlugStream
+
+from .common import TestCase, FakeRandom, patch
+
+
+def make_generator():
+    config = {
+        'all': {'type': 'cartesian', 'lists': ['letters', 'digits']},
+        'letters': {'type': 'words', 'words': ['a', 'b', 'c']},
+        'digits': {'type': 'words', 'words': ['1', '2', '3']}
+    }
+    return RandomGenerator(config, FakeRandom(-1))
+
+
+class AioTest(TestCase):
+
+    def test_generate(self):
+        generator = make_generator()
+
+        async def main():
+            return [await aio.generate(generator=generator), await aio.generate_slug(generator=generator)]
+
+        assert asyncio.run(main()) == [['a', '1'], 'a-2']
+        assert isinstance(asyncio.run(aio.generate_slug()), str)
+
+    def test_use_random(self):
+        generator = make_generator()
+
+        async def main():
+            with use_random(FakeRandom(3)):
+                return await aio.generate_slug(generator=generator)
+
+        assert asyncio.run(main()) == 'b-2'
+
+    def test_stream(self):
+        generator = make_generator()
+
+        async def main():
+            async with SlugStream(generator, batch_size=2, buffer_size=4) as stream:
+                result = [await stream.next()]
+                async for slug in stream:
+                    result.append(slug)
+                    if len(result) == 9:
+                        break
+            return result, stream
+
+        result, stream = asyncio.run(main())
+        assert result == ['a-1', 'a-2', 'a-3', 'b-1', 'b-2', 'b-3', 'c-1', 'c-2', 'c-3']
+        assert stream.latency.count == 9
+        with self.assertRaisesRegex(RuntimeError, 'Stream is closed'):
+            asyncio.run(stream.next())
+
+    def test_stream_backpressure(self):
+        generator = make_generator()
+
+        async def main():
+            with patch.object(generator, 'generate_slug_many', wraps=generator.generate_slug_many) as mock:
+                async with SlugStream(generator, batch_size=10, buffer_size=30) as stream:
+                    await stream.next()
+                    await asyncio.sleep(0.2)
+                    # 1 batch is consumed, 3 are in the buffer, 1 is waiting to be put
+                    return mock.call_count
+
+        assert asyncio.run(main()) == 5
+
+    def test_stream_does_not_block_loop(self):
+        generator = make_generator()
+        original = generator.generate_slug_many
+
+        def slow(*args):
+            time.sleep(0.05)
+            return original(*args)
+
+        async def main():
+            ticks = []
+
+            async def heartbeat():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(heartbeat())
+            with patch.object(generator, 'generate_slug_many', slow):
+                async with SlugStream(generator, batch_size=5, buffer_size=5) as stream:
+                    for _ in range(10):
+                        await stream.next()
+            task.cancel()
+            return ticks, stream.latency
+
+        ticks, latency = asyncio.run(main())
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.04
+        # First slug of each batch waited for generation, others didn't
+        assert latency.count == 10
+        assert latency.quantile(1) >= 0.01
+
+    def test_stream_errors(self):
+        with self.assertRaisesRegex(ValueError, 'batch_size must be positive'):
+            SlugStream(batch_size=0)
+        with self.assertRaisesRegex(ValueError, 'buffer_size must be greater or equal to batch_size'):
+            SlugStream(batch_size=10, buffer_size=5)
+        generator = make_generator()
+
+        async def main():
+            async with SlugStream(generator, pattern='missing') as stream:
+                for _ in range(2):
+                    with self.assertRaises(KeyError):
+                        await stream.next()
+
+        asyncio.run(main())
+
+
+class LatencyHistogramTest(TestCase):
+
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.5) == 0.0
+        for latency in (0.0000005, 0.000002, 0.000003, 0.5, 2.0):
+            histogram.add(latency)
+        assert histogram.counts == [1, 2, 0, 0, 0, 0, 1, 1]
+        assert histogram.count == 5
+        assert histogram.max == 2.0
+        assert histogram.quantile(0) == 0.000001
+        assert histogram.quantile(0.5) == 0.00001
+        assert histogram.quantile(0.8) == 1.0
+        assert histogram.quantile(1) == 2.0
+        assert repr(histogram) == '<LatencyHistogram count=5 mean=0.500001 max=2.000000>'
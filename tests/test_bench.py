@@ -0,0 +1,76 @@
+import io
+import json
+import os.path as op
+import tempfile
+import unittest
+
+from coolname import bench
+
+from .common import TestCase, patch
+
+
+def make_results(**values):
+    metrics = {}
+    for name, value in values.items():
+        better = 'higher' if name.startswith('throughput') else 'lower'
+        metrics[name.replace('_', '.', 1)] = bench._metric(value, 'x', better)
+    return {'quick': True, 'metrics': metrics}
+
+
+class BenchTest(TestCase):
+
+    def test_compare(self):
+        baseline = make_results(latency_a=10.0, latency_b=10.0, throughput_a=100.0, throughput_b=100.0, zero_a=0.0)
+        results = make_results(latency_a=10.5, latency_b=12.0, throughput_a=80.0, throughput_b=200.0, zero_a=0.0,
+                               latency_c=1.0)
+        results['metrics']['threads.gil'] = bench._metric(0, '', 'none')
+        baseline['metrics']['threads.gil'] = bench._metric(1, '', 'none')
+        rows = bench.compare(baseline, results, 0.1)
+        assert [x[0] for x in rows] == ['latency.a', 'latency.b', 'throughput.a', 'throughput.b', 'zero.a']
+        assert [x[4] for x in rows] == [False, True, True, False, False]
+        assert [round(x[3], 3) for x in rows] == [0.05, 0.2, 0.2, -1.0, 0.0]
+        assert 'REGRESSION' in bench.format_comparison(rows)
+
+    def test_main_compare(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for i, value in enumerate((10.0, 10.5, 20.0)):
+                paths.append(op.join(temp_dir, '{}.json'.format(i)))
+                with open(paths[-1], 'w') as file:
+                    json.dump(make_results(latency_a=value), file)
+            with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                assert bench.main(['-r', paths[1], '-c', paths[0]]) == 0
+                assert bench.main(['-r', paths[2], '-c', paths[0]]) == 1
+                assert bench.main(['-r', paths[2], '-c', paths[0], '-t', '1.5']) == 0
+            assert '1 metric(s) regressed by more than 10%' in stderr.getvalue()
+
+    def test_main_run(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = op.join(temp_dir, 'results.json')
+            with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                assert bench.main(['-q', '-g', 'latency', '-g', 'fanout', '-o', path]) == 0
+            with open(path) as file:
+                results = json.load(file)
+        assert results['quick'] is True
+        assert 'latency.generate_slug.default.p99' in results['metrics']
+        assert 'fanout.5000' in results['metrics']
+        assert all(x['unit'] == 'us' for x in results['metrics'].values())
+        assert 'fanout.5000' in stderr.getvalue()
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                patch('sys.stderr', new_callable=io.StringIO):
+            assert bench.main(['-q', '-g', 'import']) == 0
+        assert json.loads(stdout.getvalue())['metrics']['import.time']['value'] > 0
+
+    def test_main_registry_rows(self):
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                patch('sys.stderr', new_callable=io.StringIO):
+            assert bench.main(['-q', '-g', 'registry', '--registry-rows', '0,1e3']) == 0
+        assert sorted(json.loads(stdout.getvalue())['metrics']) == ['registry.0', 'registry.1000']
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                bench.main(['--registry-rows', '1e6,x'])
+        assert 'expected comma-separated numbers' in stderr.getvalue()
+
+
+if __name__ == '__main__':
+    unittest.main()
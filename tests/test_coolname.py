@@ -1,16 +1,26 @@
+from collections import Counter
 from functools import partial
+import io
 from itertools import cycle
+import json
+import os.path as op
+import pickle
 import random
 import sys
+import tempfile
+import threading
 import unittest
 import warnings
 
+import pytest
+
 import coolname
 from coolname import RandomGenerator, InitializationError
 from coolname.exceptions import ConfigurationError
+from coolname.impl import _compile
 from coolname.loader import load_config
 
-from .common import patch, TestCase, FakeRandom
+from .common import patch, TestCase, FakeRandom, EXAMPLES_DIR
 
 
 class TestCoolname(TestCase):
@@ -42,6 +52,124 @@ class TestCoolname(TestCase):
                          coolname.get_combinations_count(4),
                          coolname.get_combinations_count())
 
+    def test_lazy_default_generator(self):
+        generator = coolname.impl._get_default()
+        with patch('coolname.impl._default_generator', None), \
+                patch('coolname.impl._create_default_generator', return_value=generator) as create_mock:
+            threads = [threading.Thread(target=coolname.generate_slug) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            coolname.warmup()
+            assert create_mock.call_count == 1
+        assert coolname.impl._default is generator
+        with self.assertRaisesRegex(AttributeError, "module 'coolname.impl' has no attribute 'no_such'"):
+            coolname.impl.no_such
+
+    def test_rand_argument(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'one']},
+            'one': {'type': 'words', 'words': ['one', 'two', 'three']},
+        })
+        slugs = [generator.generate_slug(rand=random.Random(42)) for _ in range(3)]
+        assert len(set(slugs)) == 1
+        assert generator.generate(rand=random.Random(42)) == slugs[0].split('-')
+        assert generator.generate_slug_many(3, rand=random.Random(42)) == \
+            generator.generate_slug_many(3, rand=random.Random(42))
+        assert generator.generate_slug(rand=FakeRandom(-1)) == 'one-one'
+        assert coolname.generate_slug(rand=random.Random(1)) == coolname.generate_slug(rand=random.Random(1))
+        assert coolname.generate_many(5, rand=random.Random(1)) == coolname.generate_many(5, rand=random.Random(1))
+        # Generator's own random is not affected
+        generator.random = FakeRandom(7)
+        assert generator.generate_slug(rand=FakeRandom(-1)) == 'one-one'
+        assert generator.generate_slug() == 'three-three'
+
+    def test_use_random(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'one']},
+            'one': {'type': 'words', 'words': ['one', 'two', 'three']},
+        }, FakeRandom(7))
+        with coolname.use_random(FakeRandom(-1)):
+            assert generator.generate_slug() == 'one-one'
+            assert generator.generate_slug_many(2) == ['one-two', 'one-three']
+            # Explicit argument has priority
+            assert generator.generate_slug(rand=FakeRandom(2)) == 'two-one'
+            # Context variable is not shared with other threads
+            results = []
+            thread = threading.Thread(target=lambda: results.append(generator.generate_slug()))
+            thread.start()
+            thread.join()
+            assert results == ['three-three']
+        assert generator.generate_slug() == 'one-one'
+
+    def test_thread_local_random(self):
+        rand = coolname.ThreadLocalRandom(seed=1)
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'one']},
+            'one': {'type': 'words', 'words': [str(x) for x in range(100)]},
+        }, rand)
+        assert generator.random is rand
+        results = {}
+
+        def target(name):
+            results[name] = [generator.generate_slug() for _ in range(100)]
+            results[name + '_state'] = rand.getstate()
+
+        for name in ('a', 'b'):
+            thread = threading.Thread(target=target, args=(name, ))
+            thread.start()
+            thread.join()
+        # Each thread has its own state, seeded with seed and number of thread
+        assert results['a'] != results['b']
+        assert results['a_state'] != results['b_state']
+        for n, name in enumerate(('a', 'b')):
+            expected_rand = random.Random('1/{}'.format(n))
+            assert results[name] == [generator.generate_slug(rand=expected_rand) for _ in range(100)]
+        assert rand.random() != rand.random()
+
+    def test_pickle(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'two'], 'max_slug_length': 6},
+            'one': {'type': 'words', 'words': [str(x) for x in range(100)]},
+            'two': {'type': 'phrases', 'phrases': ['a b', 'c']},
+        })
+        generator.set_slug_cache(10)
+        generator.generate_slug()
+        copy = pickle.loads(pickle.dumps(generator))
+        assert copy.random is random
+        assert copy._slug_cache.cache_parameters()['maxsize'] == 10
+        rand = random.Random(0)
+        assert copy.generate_slug_many(100, rand=random.Random(1)) == \
+            generator.generate_slug_many(100, rand=random.Random(1))
+        generator.random = rand
+        copy = pickle.loads(pickle.dumps(generator))
+        assert copy.random is not rand
+        assert copy.generate_slug() == generator.generate_slug()
+        generator.random = coolname.ThreadLocalRandom(seed=5)
+        copy = pickle.loads(pickle.dumps(generator))
+        assert copy.random._seed == 5
+        assert copy.generate_slug() == generator.generate_slug()
+
+    def test_generate_parallel(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'one']},
+            'one': {'type': 'words', 'words': [str(x) for x in range(100)]},
+        })
+        chunks = list(generator.generate_parallel(25, workers=2, seed=1, chunk_size=10))
+        assert [len(x) for x in chunks] == [10, 10, 5]
+        # Same seed gives the same result regardless of number of workers
+        assert chunks[0] == generator.generate_slug_many(10, rand=random.Random('1/0'))
+        assert list(generator.generate_parallel(25, workers=1, seed=1, chunk_size=10)) == chunks
+        unordered = list(generator.generate_parallel(25, workers=2, seed=1, chunk_size=10, ordered=False))
+        assert sorted(unordered) == sorted(chunks)
+        assert list(generator.generate_parallel(25, workers=2, seed=2, chunk_size=10)) != chunks
+        assert list(generator.generate_parallel(0, workers=2)) == []
+        with self.assertRaisesRegex(ValueError, 'chunk_size must be positive'):
+            list(generator.generate_parallel(10, chunk_size=0))
+        with self.assertRaises(KeyError):
+            list(generator.generate_parallel(10, pattern='missing'))
+
     @patch('os.path.isdir', return_value=False)
     @patch('os.path.isfile', return_value=False)
     def test_create_from_file_not_found(self, *args):
@@ -89,6 +217,20 @@ class TestCoolname(TestCase):
                                     r"you should remove it from config\.$"):
             RandomGenerator(load_config('dummy'))
 
+    def test_compile(self):
+        # Same as RandomGenerator(load_config(path)), but lists from *.txt files are not validated again
+        with tempfile.TemporaryDirectory() as path:
+            with open(op.join(path, 'config.json'), 'w') as file:
+                json.dump({'all': {'type': 'cartesian', 'lists': ['color', 'animal']}}, file)
+            with open(op.join(path, 'color.txt'), 'w') as file:
+                file.write('max_length = 5\nred\ngreen\n')
+            with open(op.join(path, 'animal.txt'), 'w') as file:
+                file.write('cat\nbig dog\n')
+            expected = RandomGenerator(load_config(path), random.Random(0))
+            with patch('coolname.impl._split_phrase', side_effect=AssertionError):
+                generator = _compile(path, random.Random(0))
+        assert [generator.generate_slug() for _ in range(20)] == [expected.generate_slug() for _ in range(20)]
+
     def test_generate_by_pattern(self):
         generator = RandomGenerator({
             'all': {
@@ -185,6 +327,103 @@ class TestCoolname(TestCase):
             self.assertEqual(generator.generate_slug(), 'one-of-two')
             self.assertEqual(generator.generate_slug(), 'two-of-one')
 
+    def test_retry_rates(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['one', 'two'], 'ensure_unique': True},
+            'one': {'type': 'words', 'words': ['a', 'b', 'c', 'd']},
+            'two': {'type': 'words', 'words': ['a', 'e', 'f', 'g', 'h']},
+        }
+        # 1 of 20 combinations is rejected
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            generator = RandomGenerator(config)
+        assert generator.retry_rates == {None: 0.05}
+        # Result is cached by config
+        with patch('coolname.impl.RandomGenerator.get_combinations_count') as count_mock:
+            assert RandomGenerator(config).retry_rates == {None: 0.05}
+        count_mock.assert_not_called()
+        # Length limit doesn't cause retries
+        config['all']['max_slug_length'] = 3
+        config['one']['words'].append('long')
+        generator = RandomGenerator(config)
+        assert generator.retry_rates == {None: 0.05}
+        # Retries are made among combinations which fit into max_slug_length too
+        with patch.object(generator, '_randrange', side_effect=[0, 1]) as randrange_mock:
+            assert generator.generate_slug() == 'a-e'
+        assert randrange_mock.call_args_list == [((20,),), ((20,),)]
+        # Rates are deterministic
+        config['one']['words'] = ['a', 'e', 'f']
+        for _ in range(3):
+            with self.assertWarnsRegex(UserWarning, r'coolname.generate\(\) may be slow'):
+                generator = RandomGenerator(config)
+            assert generator.retry_rates == {None: 0.2}
+
+    def test_stats(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'two'], 'ensure_unique': True},
+            'one': {'type': 'words', 'words': ['a', 'b']},
+            'two': {'type': 'words', 'words': ['a', 'c', 'd', 'e', 'f']},
+        })
+        with self.assertRaisesRegex(RuntimeError, r'Stats are not enabled, call enable_stats\(\) first'):
+            generator.stats()
+        events = []
+        generator.enable_stats(lambda *args: events.append(args))
+        with patch.object(generator, '_randrange', side_effect=partial(next, iter([0, 0, 1, 7]))):
+            assert generator.generate_slug() == 'a-c'
+            assert generator.generate() == ['b', 'd']
+        assert generator.generate_slug_many(3, rand=FakeRandom(-1)) == ['a-c', 'a-d', 'a-e']
+        assert [x for _, x in generator._generate_indexed_many(2, rand=FakeRandom(-1))] == [['a', 'c'], ['a', 'd']]
+        no_rejections = {'ensure_unique': 0, 'ensure_unique_prefix': 0, 'max_slug_length': 0}
+        assert events == [
+            (None, 1, 3, dict(no_rejections, ensure_unique=2)),
+            (None, 1, 1, no_rejections),
+            (None, 3, 4, dict(no_rejections, ensure_unique=1)),
+            (None, 2, 3, dict(no_rejections, ensure_unique=1)),
+        ]
+        expected = {
+            'calls': 4,
+            'names': 7,
+            'attempts': 11,
+            'rejections': dict(no_rejections, ensure_unique=4),
+            'patterns': {None: 7},
+            'attempts_histogram': {1: 1, 3: 1},
+        }
+        assert generator.stats(reset=True) == expected
+        assert generator.stats() == dict(expected, calls=0, names=0, attempts=0, rejections=no_rejections,
+                                         patterns={}, attempts_histogram={})
+        # Stats are not pickled
+        generator.generate()
+        assert pickle.loads(pickle.dumps(generator))._stats is None
+        generator.disable_stats()
+        with self.assertRaises(RuntimeError):
+            generator.stats()
+
+    def test_stats_constraints(self):
+        # Length limit excludes only 2 of 12 combinations, so they are rejected like others
+        with self.assertWarnsRegex(UserWarning, 'contain repeating prefixes or exceed max_slug_length=5'):
+            generator = RandomGenerator({
+                'all': {'type': 'cartesian', 'lists': ['one', 'two'], 'ensure_unique_prefix': 1,
+                        'max_slug_length': 5},
+                'one': {'type': 'words', 'words': ['ab', 'cd']},
+                'two': {'type': 'words', 'words': ['ax', 'ex', 'fx', 'gx', 'hx', 'longer']},
+            })
+        assert generator.retry_rates == {None: 3 / 12}
+        generator.enable_stats()
+        rand = random.Random(0)
+        for _ in range(200):
+            generator.generate(rand=rand)
+        generator.generate_many(1000, rand=rand)
+        stats = generator.stats()
+        assert stats['calls'] == 201
+        assert stats['names'] == 1200
+        assert stats['attempts_histogram'][1] > 100
+        assert sum(stats['attempts_histogram'].values()) == 200
+        assert stats['rejections']['ensure_unique'] == 0
+        assert stats['rejections']['ensure_unique_prefix'] > 0
+        assert stats['rejections']['max_slug_length'] > 0
+        # No combination violates both constraints
+        assert stats['attempts'] == stats['names'] + sum(stats['rejections'].values())
+
     def test_ensure_unique_error(self):
         config = {
             'all': {'type': 'cartesian', 'lists': ['one', 'one']},
@@ -195,6 +434,21 @@ class TestCoolname(TestCase):
         with self.assertRaisesRegex(ConfigurationError, r'Invalid config: Impossible to generate with ensure_unique'):
             RandomGenerator(config)
 
+    def test_ensure_unique_error_big(self):
+        # Combinations count is only a lower bound (zero here), so combinations are sampled
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['one'] * 7, 'ensure_unique': True},
+            'one': {'type': 'words', 'words': ['a', 'b', 'c', 'd']},
+        }
+        with self.assertRaisesRegex(ConfigurationError, r'Invalid config: Impossible to generate with ensure_unique'):
+            RandomGenerator(config)
+        # 8! of 8^7 combinations are valid
+        config['one']['words'] += ['e', 'f', 'g', 'h']
+        with self.assertWarnsRegex(UserWarning, r'coolname.generate\(\) may be slow'):
+            generator = RandomGenerator(config)
+        assert generator.retry_rates == {None: 1.0}
+        assert len(set(generator.generate())) == 7
+
     def test_ensure_unique_error_on_list(self):
         config = {
             'all': {'type': 'cartesian', 'lists': ['one', 'two']},
@@ -233,9 +487,12 @@ class TestCoolname(TestCase):
         with self.assertRaisesRegex(ConfigurationError, 'Invalid config: Invalid ensure_unique_prefix value: expected a positive integer, got 0'):
             RandomGenerator(config)
 
-        # Now enable unique prefix
+        # Now enable unique prefix (3 of 8 combinations are rejected)
         config['all']['ensure_unique_prefix'] = 4
-        generator = RandomGenerator(config)
+        with self.assertWarnsRegex(UserWarning, r'coolname.generate\(\) may be slow because a significant fraction '
+                                                r'of combinations contain repeating prefixes '
+                                                r'and ensure_unique_prefix is set'):
+            generator = RandomGenerator(config)
         with patch.object(generator, '_randrange',
                           side_effect=partial(next, cycle(iter(range(8))))):
             self.assertEqual(generator.generate_slug(), 'brave-brass')
@@ -246,6 +503,26 @@ class TestCoolname(TestCase):
             self.assertEqual(generator.generate_slug(), 'agile-age')
             self.assertEqual(generator.generate_slug(), 'brave-brass')
 
+    def test_generate_many(self):
+        assert coolname.generate_many(0) == []
+        items = coolname.generate_many(10)
+        assert len(items) == 10
+        assert all(isinstance(x, list) and isinstance(x[0], str) for x in items)
+        slugs = coolname.generate_slug_many(10, 2, separator='_')
+        assert len(slugs) == 10
+        assert all(len(x.split('_')) == 2 for x in slugs)
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_generate_many_ensure_unique(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['one', 'one'], 'ensure_unique': True},
+            'one': {'type': 'words', 'words': ['one', 'two']}
+        })
+        # Half of combinations are rejected, so batch has to be refilled
+        with patch.object(generator, '_randrange',
+                          side_effect=partial(next, cycle(iter(range(4))))):
+            self.assertEqual(generator.generate_slug_many(4), ['one-two', 'two-one', 'one-two', 'two-one'])
+
     def test_configuration_error(self):
         with self.assertRaisesRegex(InitializationError,
                                     "Invalid config: Value at key 'all' is not a dict"):
@@ -368,14 +645,28 @@ class TestCoolname(TestCase):
             })
 
     @patch('warnings.warn')
-    def test_max_slug_length_warning(self, warn_mock):
-        RandomGenerator({
+    def test_max_slug_length_no_retries(self, warn_mock):
+        generator = RandomGenerator({
             'all': {'type': 'cartesian', 'max_slug_length': 3, 'lists': ['one', 'two']},
             'one': {'type': 'words', 'words': ['a']*70 + ['bb']*30},
             'two': {'type': 'words', 'words': ['c']*70 + ['dd']*30},
         })
-        warn_mock.assert_called_with('coolname.generate() may be slow because a significant '
-                                     'fraction of combinations exceed max_slug_length=3')
+        warn_mock.assert_not_called()
+        # Combinations are picked from valid combinations only
+        with patch.object(generator, '_randrange', side_effect=[4899, 0]) as randrange_mock:
+            assert generator.generate_slug() == 'a-c'
+            assert generator.generate_slug() == 'a-c'
+        assert randrange_mock.call_args_list == [((4900,),), ((4900,),)]
+        assert set(generator.generate_slug_many(100)) == {'a-c'}
+        # Combinations are picked uniformly
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'max_slug_length': 4, 'lists': ['one', 'two']},
+            'one': {'type': 'words', 'words': ['a', 'bb', 'ccc']},
+            'two': {'type': 'words', 'words': ['x', 'yy', 'zzz']},
+        })
+        counts = Counter(generator.generate_slug() for _ in range(3000))
+        assert set(counts) == {'a-x', 'a-yy', 'bb-x'}
+        assert min(counts.values()) > 800
 
     def test_configuration_error_too_deep(self):
         config = {
@@ -395,8 +686,7 @@ class TestCoolname(TestCase):
             RandomGenerator(config)
 
 
-    @patch('coolname.impl.randrange', side_effect=partial(next, cycle(iter(range(8)))))
-    def test_configuration_error_cartesian_inside_cartesian(self, mock):
+    def test_configuration_error_cartesian_inside_cartesian(self):
         config = {
             'all': {
                 'type': 'cartesian',
@@ -488,6 +778,75 @@ class TestCoolname(TestCase):
         from coolname.__main__ import main
         main()  # just for the sake of coverage
 
+    def test_command_line_parallel(self):
+        from coolname.__main__ import main
+        output = []
+        for argv in (['coolname', '-n', '5', '-w', '2', '--seed', '1'],
+                     ['coolname', '-n', '5', '-w', '1', '--seed', '1'],
+                     ['coolname', '-n', '2', '--seed', '1'],
+                     ['coolname', '-n', '2', '--seed', '1']):
+            with patch.object(sys, 'argv', argv), patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                main()
+            output.append(stdout.getvalue())
+        assert len(output[0].splitlines()) == 5
+        assert output[0] == output[1]
+        assert output[2] == output[3]
+        # Same seed gives the same output with or without --jobs
+        assert output[0].startswith(output[2])
+
+    def run_command_line(self, *argv):
+        from coolname.__main__ import main
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            main(list(argv))
+        return stdout.getvalue()
+
+    def test_command_line_formats(self):
+        args = ('-n', '3', '--seed', 'x', '-s', '_')
+        slugs = self.run_command_line(*args).splitlines()
+        assert len(slugs) == 3
+        assert self.run_command_line(*args, '-0') == '\0'.join(slugs) + '\0'
+        assert json.loads(self.run_command_line(*args, '-f', 'json')) == slugs
+        assert [json.loads(x) for x in self.run_command_line(*args, '-f', 'ndjson').splitlines()] == slugs
+        assert self.run_command_line(*args, '-f', 'csv').splitlines() == ['slug'] + slugs
+        assert self.run_command_line('-n', '0', '-f', 'json') == '[]\n'
+        assert self.run_command_line('-n', '0') == ''
+
+    def test_command_line_config(self):
+        config_path = op.join(EXAMPLES_DIR, 'russian')
+        slugs = self.run_command_line('-n', '3', '--seed', '1', '-c', config_path).splitlines()
+        generator = RandomGenerator(load_config(config_path))
+        assert all(generator.slug_to_index(x) >= 0 for x in slugs)
+        with tempfile.TemporaryDirectory() as path:
+            snapshot_path = op.join(path, 'russian.cnsnap')
+            generator.save_snapshot(snapshot_path)
+            assert self.run_command_line('-n', '3', '--seed', '1', '-c', snapshot_path).splitlines() == slugs
+
+    def test_command_line_unique(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['digits', 'digits']},
+            'digits': {'type': 'words', 'words': [str(x) for x in range(10)]}
+        }
+        with tempfile.TemporaryDirectory() as path:
+            config_path = op.join(path, 'config.json')
+            with open(config_path, 'w') as file:
+                json.dump(config, file)
+            with patch('coolname.__main__.CHUNK_SIZE', 7):
+                slugs = self.run_command_line('-n', '100', '-u', '-c', config_path).splitlines()
+                assert sorted(slugs) == sorted('{}-{}'.format(x, y) for x in range(10) for y in range(10))
+                with patch('sys.stderr', new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit):
+                    self.run_command_line('-n', '101', '-u', '-c', config_path)
+                assert stderr.getvalue() == 'coolname: error: Only 100 unique slugs can be generated\n'
+
+    def test_command_line_errors(self):
+        for argv, message in ((['5'], 'coolname: error: Invalid pattern: 5'),
+                              (['-c', 'missing.json'], 'coolname: error: File or directory not found')):
+            with patch('sys.stderr', new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit):
+                self.run_command_line(*argv)
+            assert stderr.getvalue().startswith(message)
+        for argv in (['-0', '-f', 'json'], ['-u', '-j', '2'], ['-n', '-1']):
+            with patch('sys.stderr', new_callable=io.StringIO), self.assertRaises(SystemExit):
+                self.run_command_line(*argv)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -5,6 +5,7 @@ import os
 import os.path as op
 import subprocess
 import sys
+import tempfile
 
 from .common import PROJECT_DIR, EXAMPLES_DIR
 
@@ -28,7 +29,8 @@ RUSSIAN_M = [
 ]
 
 
-def generate_slugs(number_of_slugs, data_dir=None, data_module=None, path=None, expect_returncode=0):
+def generate_slugs(number_of_slugs, data_dir=None, data_module=None, path=None, expect_returncode=0,
+                   cache_dir=None):
     env = dict(os.environ)
     env['PYTHONPATH'] = PROJECT_DIR
     if path:
@@ -37,6 +39,8 @@ def generate_slugs(number_of_slugs, data_dir=None, data_module=None, path=None,
         env['COOLNAME_DATA_DIR'] = data_dir
     if data_module:
         env['COOLNAME_DATA_MODULE'] = data_module
+    if cache_dir:
+        env['COOLNAME_CACHE_DIR'] = cache_dir
     process = subprocess.Popen([sys.executable, 'tests/import_coolname_and_print_slugs.py', str(number_of_slugs)],
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE,
@@ -67,3 +71,44 @@ def test_coolname_env():
     # Only COOLNAME_DATA_DIR, and it is invalid
     lines = generate_slugs(1, data_dir='no_such', expect_returncode=1)
     assert lines[-1] == 'ImportError: Configure valid COOLNAME_DATA_DIR and/or COOLNAME_DATA_MODULE'
+
+
+def test_coolname_cache_dir():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for _ in range(2):
+            assert generate_slugs(len(RUSSIAN), data_dir=op.join(EXAMPLES_DIR, 'russian'),
+                                  cache_dir=cache_dir) == RUSSIAN
+            assert len(os.listdir(cache_dir)) == 1
+
+
+def test_import_does_not_create_default_generator():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = PROJECT_DIR
+    output = subprocess.check_output([sys.executable, '-c',
+                                      'import coolname, coolname.impl; '
+                                      'print(coolname.impl._default_generator is None); '
+                                      'coolname.warmup(); '
+                                      'print(coolname.impl._default_generator is None)'],
+                                     cwd=PROJECT_DIR, env=env)
+    assert output.decode('utf8').split() == ['True', 'False']
+
+
+def test_invalid_config_fails_on_first_use():
+    # Import succeeds, error is raised each time default generator is needed
+    script = ('import coolname, coolname.impl\n'
+              'print("imported")\n'
+              'for use in (coolname.generate_slug, lambda: coolname.impl._default, coolname.generate_slug):\n'
+              '    try:\n'
+              '        use()\n'
+              '    except Exception as ex:\n'
+              '        print(type(ex).__name__)\n')
+    with tempfile.TemporaryDirectory() as bad_dir:
+        with open(op.join(bad_dir, 'config.json'), 'w') as file:
+            file.write('{"all": {"type": "words", "words": []}}')
+        for data_dir, error in (('no_such', 'ImportError'), (bad_dir, 'ConfigurationError')):
+            env = dict(os.environ)
+            env['PYTHONPATH'] = PROJECT_DIR
+            env['COOLNAME_DATA_DIR'] = data_dir
+            env.pop('COOLNAME_DATA_MODULE', None)
+            output = subprocess.check_output([sys.executable, '-c', script], cwd=PROJECT_DIR, env=env)
+            assert output.decode('utf8').split() == ['imported', error, error, error]
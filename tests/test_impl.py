@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import io
+import random
 import unittest
 
 import pytest
@@ -7,7 +8,7 @@ import pytest
 from coolname import RandomGenerator, InitializationError
 from coolname.impl import NestedList, CartesianList, Scalar,\
     WordList, PhraseList, WordAsPhraseWrapper,\
-    _create_lists, _to_bytes, _default
+    _create_lists, _to_bytes, _default, _numpy_randrange, _LengthLimit
 
 from .common import TestCase, patch
 
@@ -45,6 +46,25 @@ class TestImplementation(TestCase):
         with self.assertRaises(IndexError):
             nested_list[5]
 
+    def test_nested_list_get_many(self):
+        nested_list = NestedList([[1, 2, 3],
+                                  [4, 5],
+                                  [6, 7, 8, 9]])
+        assert nested_list.get_many([8, 0, 4, 3, 4]) == [5, 6, 1, 9, 1]
+        assert nested_list.get_many([]) == []
+        with self.assertRaises(IndexError):
+            nested_list.get_many([0, 9])
+        # Nested lists of all levels are split at once
+        nested_list = NestedList([[1, 2], NestedList([[3], NestedList([[4, 5, 6], [7]])]), [8, 9, 10]])
+        indices = [9, 0, 5, 5, 2, 8, 1, 3, 7, 4, 6]
+        assert nested_list.get_many(indices) == [nested_list[i] for i in indices]
+
+    def test_nested_list_big_fanout(self):
+        nested_list = NestedList([CartesianList([[i], [0, 1]]) for i in range(1000)])
+        assert nested_list.length == 2000
+        assert [nested_list[i] for i in range(2000)] == [[i // 2, i % 2] for i in range(2000)]
+        assert nested_list.get_many(range(1999, -1, -1)) == [[i // 2, i % 2] for i in range(1999, -1, -1)]
+
     def test_carthesian_list(self):
         cart_list = CartesianList([[1, 2, 3], [4, 5], [6, 7, 8, 9]])
         self.assertEqual(cart_list.length, 24)
@@ -65,6 +85,60 @@ class TestImplementation(TestCase):
         self.assertEqual(cart_list[24], [10, 12])
         self.assertEqual(cart_list[27], [11, 13])
 
+    def test_carthesian_list_decode_many(self):
+        cart_list = CartesianList([[1, 2, 3], [4, 5], [6, 7, 8, 9]])
+        ids = cart_list.decode_many([0, 1, 4, 23])
+        assert [list(x) for x in ids] == [[0, 0, 0], [0, 0, 1], [0, 1, 0], [2, 1, 3]]
+        assert cart_list.get_many([0, 1, 4, 23]) == [[1, 4, 6], [1, 4, 7], [1, 5, 6], [3, 5, 9]]
+        assert cart_list.get_many([]) == []
+
+    @patch('coolname.impl._import_numpy', return_value=None)
+    def test_carthesian_list_decode_many_without_numpy(self, *args):
+        cart_list = CartesianList([[1, 2, 3], [4, 5], [6, 7, 8, 9]])
+        assert cart_list.decode_many([0, 1, 4, 23]) == [[0, 0, 0], [0, 0, 1], [0, 1, 0], [2, 1, 3]]
+        assert cart_list.get_many([0, 1, 4, 23]) == [[1, 4, 6], [1, 4, 7], [1, 5, 6], [3, 5, 9]]
+        assert cart_list.get_many([]) == []
+
+    def test_get_many_default_generator(self):
+        # Squashing must not make get_many() inconsistent with __getitem__
+        for pattern in (None, 2, 3, 4):
+            lst = _default._lists[pattern]
+            indices = [lst.length * i // 1000 for i in range(1000)] + [lst.length - 1]
+            assert lst.get_many(indices) == [lst[i] for i in indices]
+
+    def test_carthesian_list_get_many_phrases(self):
+        cart_list = CartesianList([Scalar('a'), PhraseList(['big cat', 'dog']), WordList(['one', 'two'])])
+        assert cart_list.get_many(range(4)) == [cart_list[i] for i in range(4)]
+        assert cart_list.get_many([3]) == [['a', 'dog', 'two']]
+
+    def test_numpy_generator(self):
+        numpy = pytest.importorskip('numpy')
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['digits', 'digits']},
+            'digits': {'type': 'words', 'words': list(str(x) for x in range(10))}
+        }
+        generator = RandomGenerator(config, numpy.random.default_rng(12))
+        generator.random = numpy.random.default_rng(12)
+        slugs = generator.generate_slug_many(100)
+        assert len(slugs) == 100
+        assert all(len(x) == 3 for x in slugs)
+        # Same seed - same results
+        generator.random = numpy.random.default_rng(12)
+        assert generator.generate_slug_many(100) == slugs
+        assert len(generator.generate_slug()) == 3
+        # NumPy arrays of indices are split between sublists without converting to list
+        nested_list = NestedList([[1, 2], NestedList([[3], NestedList([[4, 5, 6], [7]])]), [8, 9, 10]])
+        indices = [9, 0, 5, 5, 2, 8, 1, 3, 7, 4, 6]
+        assert nested_list.get_many(numpy.array(indices)) == nested_list.get_many(indices)
+        with self.assertRaises(IndexError):
+            nested_list.get_many(numpy.array([0, 10]))
+
+    def test_numpy_randrange_big_numbers(self):
+        numpy = pytest.importorskip('numpy')
+        rand = numpy.random.default_rng(1)
+        assert all(0 <= _numpy_randrange(rand, 2**70) < 2**70 for _ in range(100))
+        assert all(0 <= _numpy_randrange(rand, 2**64 + 1) < 2**64 + 1 for _ in range(100))
+
     @pytest.mark.filterwarnings("ignore::UserWarning")
     def test_phrase_list_squash_optimization(self):
         """PhraseLists should be squashed just like WordLists."""
@@ -108,6 +182,175 @@ class TestImplementation(TestCase):
         assert all_list._lists[0] == sorted(tuples)
         assert 3 <= len(generator.generate()) <= 4
 
+    def test_squash_overlapping_lists(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['outer', 'inner2']},
+            'outer': {'type': 'nested', 'lists': ['inner1', 'inner2']},
+            'inner1': {'type': 'nested', 'lists': ['words1', 'words2']},
+            'inner2': {'type': 'nested', 'lists': ['words2', 'words3']},
+            'words1': {'type': 'words', 'words': ['a', 'b', 'c']},
+            'words2': {'type': 'words', 'words': ['b', 'c', 'd']},
+            'words3': {'type': 'words', 'words': ['d', 'e']},
+        }
+        generator = RandomGenerator(config, random.Random(0))
+        # Common words are merged in 'outer' (which used to break generation), but not in 'inner2'
+        outer, inner2 = [x for x, _ in generator._lists[None]._list_divs]
+        assert outer._lists == [['a', 'b', 'c', 'd'], ['b', 'c', 'd', 'e']]
+        assert generator.get_combinations_count() == 8 * 5
+        slugs = [generator.generate_slug() for _ in range(500)]
+        assert len(set(slugs)) == 5 * 4
+        # Shared list is squashed only once
+        assert outer._lists[1] is generator._lists[None]._lists[1]
+
+    def test_compact_mode(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['a', 'nested', 'nested']},
+            'a': {'type': 'const', 'value': 'a'},
+            'nested': {'type': 'nested', 'lists': ['words', 'phrases']},
+            'words': {'type': 'words', 'words': ['one', 'two']},
+            'phrases': {'type': 'phrases', 'phrases': ['three four', ['five', 'six', 'seven']]},
+        }
+        generator = RandomGenerator(config, random.Random(0))
+        compact_generator = RandomGenerator(config, random.Random(0), compact=True)
+        assert [compact_generator.generate() for _ in range(50)] == [generator.generate() for _ in range(50)]
+        stream = io.StringIO()
+        compact_generator._dump(stream)
+        assert 'PackedWordList' in stream.getvalue()
+        assert 'PackedPhraseList' in stream.getvalue()
+        assert ' WordList' not in stream.getvalue()
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_slug_for(self):
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['words', 'words'], 'ensure_unique': True},
+            'words': {'type': 'words', 'words': ['one', 'two', 'three']},
+        })
+        slugs = [generator.slug_for(key) for key in range(100)]
+        # Deterministic, and doesn't depend on random
+        generator.random = random.Random(0)
+        assert [generator.slug_for(key) for key in range(100)] == slugs
+        assert set(slugs) == {'one-two', 'one-three', 'two-one', 'two-three', 'three-one', 'three-two'}
+        assert generator.slugs_for(range(100)) == slugs
+        assert generator.slugs_for(range(100), separator='_') == [x.replace('-', '_') for x in slugs]
+        assert generator.generate_for(7) == slugs[7].split('-')
+        # Different key types
+        assert generator.slug_for('7') == generator.slug_for(b'7')
+        # int keys and bytes keys don't share encoding (checked on a bigger generator, to avoid coincidence)
+        big_generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['words', 'words', 'words']},
+            'words': {'type': 'words', 'words': ['w' + chr(ord('a') + i) + chr(ord('a') + j)
+                                                 for i in range(26) for j in range(26)]},
+        })
+        assert big_generator.slug_for(1) != big_generator.slug_for(b'\x01')
+        assert big_generator.slug_for(0) != big_generator.slug_for(b'\x00')
+        with self.assertRaisesRegex(TypeError, 'Key must be bytes, str or int, got float'):
+            generator.slug_for(1.5)
+        # Cache
+        generator.set_slug_cache(10)
+        assert [generator.slug_for(key) for key in range(100)] == slugs
+        assert generator._slug_cache.cache_info().currsize == 10
+        generator.set_slug_cache(None)
+        assert generator.slug_for(99) == slugs[99]
+
+    def test_slug_to_index(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['a', 'nested', 'nested']},
+            'a': {'type': 'const', 'value': 'a'},
+            'nested': {'type': 'nested', 'lists': ['words', 'phrases']},
+            'words': {'type': 'words', 'words': ['one', 'two', 'three']},
+            'phrases': {'type': 'phrases', 'phrases': ['three four', ['five', 'six', 'seven']]},
+        }
+        for compact in (False, True):
+            generator = RandomGenerator(config, compact=compact)
+            count = generator.get_combinations_count()
+            slugs = [generator.index_to_slug(i) for i in range(count)]
+            assert len(set(slugs)) == count
+            for i, slug in enumerate(slugs):
+                assert generator.slug_to_index(slug) == i
+            assert list(generator.slugs_to_indices(iter(slugs))) == list(range(count))
+            assert list(generator.indices_to_slugs(iter(range(count)), chunk_size=7)) == slugs
+            assert generator.index_to_slug(0, separator='_') == slugs[0].replace('-', '_')
+            assert generator.slug_to_index(slugs[-1].replace('-', '_'), separator='_') == count - 1
+            assert generator.slug_to_index('a-three-four-three') == slugs.index('a-three-four-three')
+            for slug in ('', 'a', 'a-one', 'a-one-two-three', 'b-one-two', 'a-three-five-six'):
+                with self.assertRaisesRegex(ValueError, 'Slug .* does not match any combination'):
+                    generator.slug_to_index(slug)
+            for i in (-1, count):
+                with self.assertRaisesRegex(IndexError, r'Combination number -?\d+ is out of range \[0, 25\)'):
+                    generator.index_to_slug(i)
+                with self.assertRaises(IndexError):
+                    list(generator.indices_to_slugs([0, i]))
+
+    def test_slug_to_index_default_generator(self):
+        generator = _default
+        slugs = generator.generate_slug_many(100)
+        indices = list(generator.slugs_to_indices(slugs))
+        assert all(0 <= i < generator.get_combinations_count() for i in indices)
+        assert list(generator.indices_to_slugs(indices)) == slugs
+
+    def test_length_limit(self):
+        generator = RandomGenerator({
+            'all': {'type': 'nested', 'lists': ['cartesian', 'phrases']},
+            'cartesian': {'type': 'cartesian', 'lists': ['a', 'words', 'phrases', 'words']},
+            'a': {'type': 'const', 'value': 'a'},
+            'words': {'type': 'words', 'words': ['b', 'cc', 'ddd', 'eeee']},
+            'phrases': {'type': 'phrases', 'phrases': ['x y', 'zz', 'q']},
+        })
+        lst = generator._lists[None]
+        for limit in range(20):
+            length_limit = _LengthLimit(lst, limit)
+            expected = [i for i in range(lst.length) if len('-'.join(lst[i])) + 1 <= limit]
+            assert length_limit.count == len(expected)
+            assert sorted(length_limit(r) for r in range(length_limit.count)) == expected
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_constrained_count(self):
+        config = {
+            'all': {'type': 'nested', 'lists': ['two', 'three']},
+            'two': {'type': 'cartesian', 'lists': ['words', 'nested']},
+            'three': {'type': 'cartesian', 'lists': ['words', 'of', 'phrases']},
+            'of': {'type': 'const', 'value': 'of'},
+            'nested': {'type': 'nested', 'lists': ['words', 'phrases']},
+            'words': {'type': 'words', 'words': ['apple', 'apricot', 'banana', 'cherry', 'of']},
+            'phrases': {'type': 'phrases', 'phrases': ['apple pie', 'cherry cherry', 'big banana']},
+        }
+
+        def brute_force(generator):
+            lst = generator._lists[None]
+            return sum(not generator._is_rejected(lst[i]) for i in range(lst.length))
+
+        for options, exact in [
+            ({}, True),
+            ({'max_slug_length': 14}, True),
+            ({'ensure_unique': True}, False),
+            ({'ensure_unique': True, 'max_slug_length': 16}, False),
+            ({'ensure_unique_prefix': 2}, False),
+            ({'ensure_unique_prefix': 2, 'max_slug_length': 14}, False),
+        ]:
+            generator = RandomGenerator({**config, 'all': {**config['all'], **options}})
+            # Small generators are checked exhaustively
+            assert generator.get_combinations_count(constrained=True) == brute_force(generator), options
+            # Batch check gives the same result as checking one by one
+            batch = generator._lists[None].get_many(range(generator._lists[None].length))
+            assert generator._accept_many(batch) == [not generator._is_rejected(x) for x in batch], options
+            assert generator._accept_many(batch, False) == [not generator._is_not_unique(x) for x in batch], options
+            with patch('coolname.impl._EXACT_COUNT_LIMIT', 0):
+                generator = RandomGenerator({**config, 'all': {**config['all'], **options}})
+                count = generator.get_combinations_count(constrained=True)
+            if exact:
+                assert count == brute_force(generator), options
+            else:
+                assert 0.9 * brute_force(generator) < count <= brute_force(generator), options
+        generator = RandomGenerator(config)
+        assert generator.get_combinations_count(constrained=True) == generator.get_combinations_count()
+
+    def test_constrained_count_default_generator(self):
+        for pattern in (None, 2, 3, 4):
+            count = _default.get_combinations_count(pattern, constrained=True)
+            assert 0.99 * _default.get_combinations_count(pattern) < count < _default.get_combinations_count(pattern)
+        assert _default.get_combinations_count(constrained=True) == sum(
+            _default.get_combinations_count(pattern, constrained=True) for pattern in (2, 3, 4))
+
     def test_scalar(self):
         self.assertTrue(Scalar(10).random(), 10)
 
@@ -91,6 +91,26 @@ class LoaderTest(TestCase):
             ]
         })
 
+    @patch('coolname.loader._BLOCK_SIZE', 8)
+    def test_load_wordlist_blocks(self):
+        # Runs of words and phrases are parsed in bulk, other lines one by one
+        lines = ['# comment', 'number_of_words = 2', '', 'alpha', 'beta', '  gamma  ', 'delta', 'epsilon',
+                 'zeta eta', 'theta iota', 'kappa lambda', 'mu nu', '# comment', 'xi omicron', 'pi rho']
+        wordlist = _load_wordlist('phrases', StringIO('\n'.join(lines)))
+        self.assertEqual(wordlist['phrases'],
+                         [(x, ) for x in ['alpha', 'beta', 'gamma', 'delta', 'epsilon']] +
+                         [tuple(x.split()) for x in lines[8:] if not x.startswith('#')])
+        # Errors are the same as in one-by-one mode
+        lines[11] = 'mu nu xi'
+        with self.assertRaisesRegex(InitializationError,
+                                    r"Invalid config: Phrase has 3 word\(s\) \(while number_of_words=2\) "
+                                    r"at list 'phrases' line 12: 'mu nu xi'"):
+            _load_wordlist('phrases', StringIO('\n'.join(lines)))
+        with self.assertRaisesRegex(InitializationError,
+                                    r"Invalid config: Word is too long "
+                                    r"at list 'words' line 5: 'epsilon'"):
+            _load_wordlist('words', StringIO('max_length = 6\nalpha\nbeta\ngamma\nepsilon\nzeta\n'))
+
     def test_phrase_too_long(self):
         s = StringIO('\n'.join([
             'max_length = 9',
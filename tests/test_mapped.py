@@ -0,0 +1,240 @@
+import itertools
+import json
+import os
+import os.path as op
+import pickle
+import tempfile
+import tracemalloc
+import unittest
+
+import pytest
+
+from coolname import RandomGenerator, InitializationError
+from coolname.loader import load_config
+from coolname.mapped import MappedWordList, map_wordlist, build_index
+from coolname.snapshot import load_cached
+
+from .common import TestCase, FakeRandom, patch
+
+
+def _words(letters, n):
+    """Returns sorted words of up to n given letters."""
+    return sorted(''.join(x) for i in range(1, n + 1) for x in itertools.product(letters, repeat=i))
+
+
+class MappedWordListTest(TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = op.join(self._temp_dir.name, 'nouns.words')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def write(self, text, path=None):
+        with open(path or self.path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def test_map_wordlist(self):
+        self.write('cat\ncow\ndog\neel\n')
+        lst = map_wordlist(self.path)
+        assert isinstance(lst, MappedWordList)
+        assert lst.length == len(lst) == 4
+        assert not lst.multiword
+        assert list(lst) == lst._words() == ['cat', 'cow', 'dog', 'eel']
+        assert lst[3] == 'eel'
+        assert lst.get_many([2, 0]) == ['dog', 'cat']
+        assert str(lst) == "MappedWordList(['cat', 'cow', 'dog', ...], len=4)"
+        with self.assertRaises(IndexError):
+            lst[4]
+        # Last newline is optional
+        self.write('cat\ncow')
+        assert map_wordlist(self.path)._words() == ['cat', 'cow']
+        assert map_wordlist(self.path)[1] == 'cow'
+
+    def test_index(self):
+        self.write('cat\ncow\n')
+        assert build_index(self.path) == 2
+        with patch('coolname.mapped._scan') as scan_mock:
+            assert list(map_wordlist(self.path)) == ['cat', 'cow']
+        scan_mock.assert_not_called()
+        # Index is rebuilt when word file is changed
+        self.write('cat\ncow\ndog\n')
+        assert list(map_wordlist(self.path)) == ['cat', 'cow', 'dog']
+        with patch('coolname.mapped._scan') as scan_mock:
+            assert map_wordlist(self.path).length == 3
+        scan_mock.assert_not_called()
+        # Corrupted index is rebuilt too
+        with open(self.path + '.cnidx', 'r+b') as file:
+            file.truncate(10)
+        assert map_wordlist(self.path).length == 3
+
+    def test_index_not_saved(self):
+        self.write('cat\ncow\n')
+        with patch('coolname.mapped._save_index', side_effect=PermissionError('Permission denied')):
+            with pytest.warns(UserWarning, match='Failed to write index of .*nouns.words: Permission denied'):
+                lst = map_wordlist(self.path)
+        assert list(lst) == ['cat', 'cow']
+        assert not op.exists(self.path + '.cnidx')
+
+    def test_blocks(self):
+        words = ['word' + chr(ord('a') + i // 26) + chr(ord('a') + i % 26) for i in range(200)]
+        self.write('\n'.join(words) + '\n')
+        with patch('coolname.loader._BLOCK_SIZE', 50):
+            lst = map_wordlist(self.path)
+            assert list(lst) == words
+            assert lst._longest == 0
+            self.write('\n'.join(words[:100] + words[99:]) + '\n')
+            with self.assertRaisesRegex(InitializationError, r'not sorted \(or not unique\) in .* line 101: '
+                                                             r"'worddv'"):
+                map_wordlist(self.path)
+
+    def test_errors(self):
+        for text, message in (
+                ('', 'Word file is empty: '),
+                ('cat\n\ncow\n', r"Invalid syntax in .*nouns.words line 2: ''"),
+                ('cat\nbig cow\n', r"Invalid syntax in .*nouns.words line 2: 'big cow'"),
+                ('cat\r\ncow\r\n', r"Invalid syntax in .*nouns.words line 1: 'cat\\r'"),
+                ('cat\nкот\n', r"Invalid syntax in .*nouns.words line 2: 'кот'"),
+                ('cat\ncow1\n', r"Invalid syntax in .*nouns.words line 2: 'cow1'"),
+                ('Cat\ncow\n', r"Invalid syntax in .*nouns.words line 1: 'Cat'"),
+                ('cat\ncow_dog\n', r"Invalid syntax in .*nouns.words line 2: 'cow_dog'"),
+                ('cow\ncat\n', r"not sorted \(or not unique\) in .*nouns.words line 2: 'cat'"),
+                ('cat\ncat\n', r"not sorted \(or not unique\) in .*nouns.words line 2: 'cat'"),
+        ):
+            self.write(text)
+            with self.assertRaisesRegex(InitializationError, message):
+                map_wordlist(self.path)
+        with open(self.path, 'wb') as file:
+            file.write(b'cat\n\xff\n')
+        with self.assertRaisesRegex(InitializationError, 'Invalid UTF-8 in .*nouns.words line 2'):
+            map_wordlist(self.path)
+        with self.assertRaisesRegex(InitializationError, 'Failed to read word file .*missing.words'):
+            map_wordlist(op.join(self._temp_dir.name, 'missing.words'))
+
+    def test_config(self):
+        self.write('cat\ncow\ndog\n')
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['adjective', 'noun']},
+            'adjective': {'type': 'words', 'words': ['big', 'small']},
+            'noun': {'type': 'nested', 'lists': ['animal', 'phrase']},
+            'animal': {'type': 'words', 'file': self.path, 'max_length': 3},
+            'phrase': {'type': 'phrases', 'phrases': ['brown bear']},
+        }
+        generator = RandomGenerator(config, FakeRandom(-1))
+        assert generator.get_combinations_count() == 8
+        assert [generator.generate_slug() for _ in range(3)] == ['big-cat', 'big-cow', 'big-dog']
+        assert {generator.generate_slug() for _ in range(100)} == \
+            {'{}-{}'.format(x, y) for x in ('big', 'small') for y in ('cat', 'cow', 'dog', 'brown-bear')}
+        assert generator.index_to_slug(generator.slug_to_index('small-dog')) == 'small-dog'
+        assert generator.index_to_slug(generator.slug_to_index('big-brown-bear')) == 'big-brown-bear'
+        with self.assertRaisesRegex(ValueError, 'does not match any combination'):
+            generator.slug_to_index('small-cod')
+        # Pickled by path
+        assert len(pickle.dumps(generator._lists[None])) < 1000
+        assert pickle.loads(pickle.dumps(generator)).index_to_slug(3) == generator.index_to_slug(3)
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_retry_rates(self):
+        # Rates are cached by config, which includes size and mtime of word file
+        self.write('aa\nab\nba\n')
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['words', 'words'], 'ensure_unique_prefix': 1},
+            'words': {'type': 'words', 'file': self.path},
+        }
+        assert RandomGenerator(config).retry_rates == {None: 5 / 9}
+        self.write('aa\nab\nba\nca\n')
+        assert RandomGenerator(config).retry_rates == {None: 6 / 16}
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_constrained_count(self):
+        # Same as for words loaded into memory
+        a_path = op.join(self._temp_dir.name, 'a.words')
+        b_path = op.join(self._temp_dir.name, 'b.words')
+        self.write('\n'.join(_words('abc', 3)) + '\n', a_path)
+        self.write('\n'.join(_words('bcd', 3)) + '\n', b_path)
+        for lists, options in (
+                (['a', 'b'], {'ensure_unique': True}),
+                (['a', 'a'], {'ensure_unique': True, 'max_slug_length': 5}),
+                (['a', 'a', 'b'], {'ensure_unique_prefix': 2}),
+                (['b', 'nested', 'inline'], {'ensure_unique_prefix': 1, 'max_slug_length': 8}),
+        ):
+            config = {
+                'all': {'type': 'cartesian', 'lists': lists, **options},
+                'nested': {'type': 'nested', 'lists': ['a', 'inline', 'phrases']},
+                'inline': {'type': 'words', 'words': ['ab', 'ba', 'dd']},
+                'phrases': {'type': 'phrases', 'phrases': ['bc ab']},
+            }
+            with patch('coolname.impl._EXACT_COUNT_LIMIT', 0):
+                counts = []
+                for a, b in (({'file': a_path}, {'file': b_path}), ({'words': _words('abc', 3)},
+                                                                    {'words': _words('bcd', 3)})):
+                    generator = RandomGenerator({**config, 'a': {'type': 'words', **a}, 'b': {'type': 'words', **b}})
+                    counts.append(generator.get_combinations_count(constrained=True))
+            assert counts[0] == counts[1] > 0, (lists, options)
+
+    def test_large(self):
+        # Tables for max_slug_length and ensure_unique are not built in memory
+        self.write('\n'.join(_words('abcdefghijklmnopqrstuvwxyz', 4)) + '\n')
+        build_index(self.path)
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['prefix', 'words', 'words'],
+                    'max_slug_length': 9, 'ensure_unique': True},
+            'prefix': {'type': 'words', 'words': ['a', 'b', 'xyz']},
+            'words': {'type': 'words', 'file': self.path},
+        }
+        tracemalloc.start()
+        try:
+            generator = RandomGenerator(config)
+            generator.get_combinations_count(constrained=True)
+            generator.generate_slug()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        lst = generator._lists[None]
+        assert lst.length == 3 * 475254 ** 2
+        assert peak < 5 << 20
+        assert {len(generator.generate_slug()) for _ in range(100)} <= set(range(5, 10))
+        assert 0 < generator.retry_rates[None] < 0.01
+
+    def test_config_errors(self):
+        self.write('cat\ncows\n')
+        with self.assertRaisesRegex(InitializationError, "Config at key 'all' has invalid word 'cows' "
+                                                         r'\(longer than 3 characters\)'):
+            RandomGenerator({'all': {'type': 'words', 'file': self.path, 'max_length': 3}})
+        with self.assertRaisesRegex(InitializationError, "Config at key 'all' has both 'words' and 'file'"):
+            RandomGenerator({'all': {'type': 'words', 'file': self.path, 'words': ['cat']}})
+        with self.assertRaisesRegex(InitializationError, "Config at key 'all' has invalid 'file'"):
+            RandomGenerator({'all': {'type': 'words', 'file': 1}})
+
+    def test_load_config(self):
+        # Path to word file is relative to the config
+        os.mkdir(op.join(self._temp_dir.name, 'data'))
+        self.write('cat\ncow\n', op.join(self._temp_dir.name, 'data', 'nouns.words'))
+        with open(op.join(self._temp_dir.name, 'data', 'config.json'), 'w') as file:
+            json.dump({'all': {'type': 'words', 'file': 'nouns.words'}}, file)
+        with open(op.join(self._temp_dir.name, 'config.json'), 'w') as file:
+            json.dump({'all': {'type': 'words', 'file': op.join('data', 'nouns.words')}}, file)
+        for path in ('data', op.join('data', 'config.json'), 'config.json'):
+            config = load_config(op.join(self._temp_dir.name, path))
+            assert RandomGenerator(config).generate_slug() in ('cat', 'cow')
+
+    def test_snapshot(self):
+        self.write('cat\ncow\n')
+        generator = RandomGenerator({'all': {'type': 'words', 'file': self.path}})
+        snapshot_path = op.join(self._temp_dir.name, 'test.cnsnap')
+        generator.save_snapshot(snapshot_path)
+        loaded = RandomGenerator.from_snapshot(snapshot_path)
+        assert {loaded.generate_slug() for _ in range(100)} == {'cat', 'cow'}
+        # Word files are not copied to compile cache
+        config_path = op.join(self._temp_dir.name, 'config.json')
+        with open(config_path, 'w') as file:
+            json.dump({'all': {'type': 'words', 'file': 'nouns.words'}}, file)
+        cache_dir = op.join(self._temp_dir.name, 'cache')
+        generator = load_cached(config_path, cache_dir=cache_dir)
+        assert isinstance(generator._lists[None]._list, MappedWordList)
+        assert not op.exists(cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import os.path as op
+import unittest
+
+from coolname import RandomGenerator
+from coolname.loader import load_config
+from coolname.profile import ConstructionProfile
+
+from .common import TestCase, EXAMPLES_DIR
+
+
+class ConstructionProfileTest(TestCase):
+
+    def test_profile(self):
+        with ConstructionProfile() as profile:
+            config = load_config(op.join(EXAMPLES_DIR, 'russian'))
+            config['all']['max_slug_length'] = 50
+            RandomGenerator(config, compact=True)
+        # Nothing is recorded outside of the context
+        RandomGenerator(config)
+        assert [x.name for x in profile.entries] == ['load_config', 'RandomGenerator']
+        load_entry, generator_entry = profile.entries
+        assert sorted((x.kind, x.name) for x in load_entry.children) == [('node', 'animal'), ('node', 'color')]
+        assert [x.name for x in generator_entry.children] == \
+            ['validate_config', 'create_lists', 'squash', 'compact', 'check_not_hanging', 'self_test']
+        create_entry = generator_entry.children[1]
+        assert [(x.kind, x.name) for x in create_entry.children] == [('node', 'all')]
+        # Word lists are created by validate_config, not by create_lists
+        assert create_entry.children[0].children == []
+        for entry in profile.entries:
+            assert entry.time >= sum(x.time for x in entry.children)
+        phases = profile.phases()
+        assert set(phases) == {'load_config', 'RandomGenerator', 'validate_config', 'create_lists', 'squash',
+                               'compact', 'check_not_hanging', 'self_test'}
+        assert phases['RandomGenerator'] == generator_entry.time
+        assert profile.as_dict()[1]['children'][1]['children'][0]['name'] == 'all'
+        stream = io.StringIO()
+        profile._dump(stream)
+        lines = stream.getvalue().splitlines()
+        assert lines[0].startswith('load_config: ')
+        assert lines[0].endswith(' blocks')
+        assert any(x.startswith("  node 'animal': ") for x in lines)
+        assert repr(load_entry).startswith("<ProfileEntry phase 'load_config' time=")
+
+    def test_nested(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['a', 'a']},
+            'a': {'type': 'words', 'words': ['x', 'y']},
+        }
+        with ConstructionProfile() as outer:
+            with ConstructionProfile() as inner:
+                RandomGenerator(config)
+            RandomGenerator(config)
+        assert len(inner.entries) == 1
+        assert len(outer.entries) == 1
+        assert 'check_not_hanging' not in outer.phases()
+
+
+if __name__ == '__main__':
+    unittest.main()
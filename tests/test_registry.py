@@ -0,0 +1,113 @@
+import os.path as op
+import tempfile
+import unittest
+
+import pytest
+
+from coolname import RandomGenerator, InitializationError
+from coolname.registry import SlugRegistry
+
+from .common import TestCase, make_generator
+
+
+class SlugRegistryTest(TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = op.join(self._temp_dir.name, 'registry.db')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_no_repeats(self):
+        generator = make_generator()
+        with SlugRegistry(generator, self.path, block_size=7) as registry:
+            slugs = [registry.generate_slug() for _ in range(10)] + registry.generate_slug_many(20, separator='-')
+            slugs += ['-'.join(x) for x in registry.generate_many(5)]
+            assert all(registry.is_issued(x) for x in slugs)
+            assert not registry.is_issued('hello')
+        # Names reserved by another registry (or before restart) are not issued again
+        with SlugRegistry(generator, self.path, block_size=7) as registry:
+            slugs += registry.generate_slug_many(30)
+        with SlugRegistry(generator, self.path, block_size=7) as registry:
+            while True:
+                try:
+                    slugs.append(registry.generate_slug())
+                except RuntimeError as ex:
+                    assert 'namespace is probably exhausted' in str(ex)
+                    break
+        assert len(slugs) == len(set(slugs))
+        # Up to 2 blocks were reserved but not handed out
+        assert len(slugs) >= 100 - 2 * 7
+
+    def test_reserve(self):
+        generator = make_generator()
+        registry = SlugRegistry(generator, self.path, block_size=10)
+        registry.reserve(100)
+        assert sorted(registry.generate_slug_many(100)) == \
+            sorted('{}-{}'.format(x, y) for x in range(10) for y in range(10))
+        # All names are issued
+        with self.assertRaisesRegex(RuntimeError, 'Failed to reserve new names in 100 attempts'):
+            registry.reserve(1)
+        registry.close()
+        registry = SlugRegistry(generator, op.join(self._temp_dir.name, 'other.db'), block_size=10)
+        registry.reserve(95)
+        # Reserves the rest, even though there are less than needed
+        with self.assertRaisesRegex(RuntimeError, 'Only 100 new names left'):
+            registry.generate_many(101)
+        assert registry._connection.execute('SELECT COUNT(*) FROM coolname_issued').fetchone() == (100, )
+        assert len(registry.generate_many(100)) == 100
+        registry.close()
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_constraints(self):
+        with SlugRegistry(make_generator(ensure_unique=True), self.path, table='unique_names') as registry:
+            slugs = registry.generate_slug_many(90)
+            assert len(set(slugs)) == 90
+            assert all(x[0] != x[2] for x in slugs)
+
+    def test_errors(self):
+        generator = make_generator()
+        with self.assertRaisesRegex(ValueError, 'block_size must be positive'):
+            SlugRegistry(generator, self.path, block_size=0)
+        with self.assertRaisesRegex(ValueError, "Invalid table name: 'names; DROP TABLE x'"):
+            SlugRegistry(generator, self.path, table='names; DROP TABLE x')
+        huge = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['digits'] * 20},
+            'digits': {'type': 'words', 'words': [str(x) for x in range(10)]}
+        })
+        with self.assertRaisesRegex(ValueError, 'Too many combinations to store in SQLite'):
+            SlugRegistry(huge, self.path)
+        with self.assertRaisesRegex(InitializationError, 'Failed to open registry'):
+            SlugRegistry(generator, op.join(self.path, 'missing', 'registry.db'))
+
+    def test_patterns(self):
+        # Numbers of combinations mean different names for different patterns,
+        # so a table can be used only for one pattern (and one config)
+        config = {
+            'all': {'type': 'nested', 'lists': ['2', '3']},
+            '2': {'type': 'cartesian', 'lists': ['digits', 'digits']},
+            '3': {'type': 'cartesian', 'lists': ['digits', 'digits', 'digits']},
+            'digits': {'type': 'words', 'words': [str(x) for x in range(10)]}
+        }
+        generator = RandomGenerator(config)
+        with SlugRegistry(generator, self.path, pattern=2) as registry:
+            slug = registry.generate_slug()
+        with self.assertRaisesRegex(InitializationError, "Registry table 'coolname_issued' was created for "
+                                                         "pattern 2 with 100 combinations, "
+                                                         "not for pattern None with 1100 combinations"):
+            SlugRegistry(generator, self.path)
+        with SlugRegistry(generator, self.path, table='all_issued') as registry:
+            assert not registry.is_issued(slug)
+            assert registry.generate_slug_many(1100)
+        with SlugRegistry(generator, self.path, pattern=2) as registry:
+            assert registry.is_issued(slug)
+        # Same number of combinations, but different words
+        config['digits']['words'][0] = 'zero'
+        with self.assertRaisesRegex(InitializationError, "Registry table 'coolname_issued' was created for "
+                                                         "another config"):
+            SlugRegistry(RandomGenerator(config), self.path, pattern=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import os.path as op
+import random
+import shutil
+import tempfile
+import unittest
+
+from coolname import RandomGenerator, InitializationError
+from coolname.impl import _default, PackedWordList, PackedPhraseList
+from coolname.snapshot import compile_snapshot, save_snapshot, load_snapshot, load_cached
+
+from .common import TestCase, EXAMPLES_DIR, FakeRandom, patch
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = op.join(self._temp_dir.name, 'test.cnsnap')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_default_generator(self):
+        save_snapshot(_default, self.path)
+        generator = RandomGenerator.from_snapshot(self.path)
+        for pattern in (None, 2, 3, 4):
+            lst = _default._lists[pattern]
+            assert generator.get_combinations_count(pattern) == _default.get_combinations_count(pattern)
+            indices = [random.randrange(lst.length) for _ in range(1000)] + [0, lst.length - 1]
+            assert generator._lists[pattern].get_many(indices) == [lst[i] for i in indices]
+        assert generator._ensure_unique
+        assert generator._check_prefix == 4
+        assert generator._max_slug_length == 50
+
+    def test_compile_from_path(self):
+        compile_snapshot(op.join(EXAMPLES_DIR, 'russian'), self.path)
+        generator = RandomGenerator.from_snapshot(self.path, FakeRandom(-1))
+        assert [generator.generate_slug() for _ in range(3)] == ['белая-корова', 'белая-кошка', 'белая-собака']
+
+    def test_phrases_and_consts(self):
+        config = {
+            'all': {'type': 'cartesian', 'lists': ['a', 'nested'], 'ensure_unique': True},
+            'a': {'type': 'const', 'value': 'a'},
+            'nested': {'type': 'nested', 'lists': ['words', 'phrases']},
+            'words': {'type': 'words', 'words': ['one', 'two']},
+            'phrases': {'type': 'phrases', 'phrases': ['three four', ['five', 'six', 'seven']]},
+        }
+        generator = RandomGenerator(config)
+        generator.save_snapshot(self.path)
+        loaded = RandomGenerator.from_snapshot(self.path)
+        assert loaded._ensure_unique
+        assert [loaded._lists[None][i] for i in range(4)] == [generator._lists[None][i] for i in range(4)]
+        assert sorted(loaded.generate_slug() for _ in range(100))[0] == 'a-five-six-seven'
+
+    def test_top_level_words(self):
+        RandomGenerator({'all': {'type': 'words', 'words': ['one', 'two']}}).save_snapshot(self.path)
+        generator = RandomGenerator.from_snapshot(self.path)
+        assert generator.generate_slug() in ('one', 'two')
+        assert generator.generate_many(2, None)[0][0] in ('one', 'two')
+
+    def test_not_compact(self):
+        compile_snapshot(op.join(EXAMPLES_DIR, 'russian'), self.path)
+        generator = RandomGenerator.from_snapshot(self.path, FakeRandom(-1), compact=False)
+        assert [generator.generate_slug() for _ in range(3)] == ['белая-корова', 'белая-кошка', 'белая-собака']
+        assert not any(isinstance(x, (PackedWordList, PackedPhraseList)) for x, _ in generator._lists[None]._list_divs)
+
+    def test_packed_lists(self):
+        words = PackedWordList.pack(['one', 'два', 'three'])
+        assert words.length == 3
+        assert list(words) == ['one', 'два', 'three']
+        assert words.get_many([2, 1]) == ['three', 'два']
+        assert str(words) == "PackedWordList(['one', 'два', 'three'], len=3)"
+        with self.assertRaises(IndexError):
+            words[3]
+        assert words.unpack() == ['one', 'два', 'three']
+        assert PackedWordList.pack(['one', 'two']).unpack() == ['one', 'two']
+        phrases = PackedPhraseList.pack([('one', ), ('two', 'three'), ('four', 'five', 'six')])
+        assert phrases.length == 3
+        assert phrases.multiword
+        assert list(phrases) == [('one', ), ('two', 'three'), ('four', 'five', 'six')]
+        assert phrases.unpack() == [('one', ), ('two', 'three'), ('four', 'five', 'six')]
+        assert phrases.unpack().multiword
+        with self.assertRaises(IndexError):
+            phrases[3]
+
+    def test_errors(self):
+        with self.assertRaisesRegex(InitializationError, 'Failed to read snapshot'):
+            load_snapshot(self.path)
+        with open(self.path, 'wb') as file:
+            file.write(b'not a snapshot at all, definitely')
+        with self.assertRaisesRegex(InitializationError, 'Not a coolname snapshot'):
+            load_snapshot(self.path)
+        RandomGenerator({'all': {'type': 'words', 'words': ['one', 'two']}}).save_snapshot(self.path)
+        with open(self.path, 'rb') as file:
+            data = bytearray(file.read())
+        # Corrupt the last byte
+        data[-1] ^= 0xff
+        with open(self.path, 'wb') as file:
+            file.write(data)
+        with self.assertRaisesRegex(InitializationError, r'Snapshot is corrupted \(checksum mismatch\)'):
+            load_snapshot(self.path)
+        # Wrong version
+        data[8] = 99
+        with open(self.path, 'wb') as file:
+            file.write(data)
+        with self.assertRaisesRegex(InitializationError, r'Unsupported snapshot version 99 \(expected 1\)'):
+            load_snapshot(self.path)
+
+
+class CacheTest(TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.config_dir = op.join(self._temp_dir.name, 'russian')
+        shutil.copytree(op.join(EXAMPLES_DIR, 'russian'), self.config_dir)
+        self.cache_dir = op.join(self._temp_dir.name, 'cache')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def load(self):
+        generator = load_cached(self.config_dir, FakeRandom(-1), self.cache_dir)
+        return [generator.generate_slug() for _ in range(3)]
+
+    def test_cache(self):
+        expected = ['белая-корова', 'белая-кошка', 'белая-собака']
+        assert self.load() == expected
+        cache_files = os.listdir(self.cache_dir)
+        assert len(cache_files) == 1
+        assert cache_files[0].startswith('russian-')
+        # Second time, config is not loaded
+        with patch('coolname.loader.load_config') as load_mock:
+            assert self.load() == expected
+            load_mock.assert_not_called()
+            # Cache dir from environment
+            with patch.dict(os.environ, {'COOLNAME_CACHE_DIR': self.cache_dir}):
+                assert load_cached(self.config_dir).generate_slug() in (
+                    '{}-{}'.format(x, y) for x in ('белая', 'чёрная') for y in ('корова', 'кошка', 'собака'))
+            load_mock.assert_not_called()
+        # Changed config is loaded again, and old snapshot is deleted
+        # (but not temporary files which other processes are writing)
+        temp_path = op.join(self.cache_dir, cache_files[0] + 'abc123.tmp')
+        open(temp_path, 'wb').close()
+        with open(op.join(self.config_dir, 'color.txt'), 'a', encoding='utf-8') as file:
+            file.write('\nзелёная\n')
+        assert self.load() == expected
+        os.unlink(temp_path)
+        new_cache_files = os.listdir(self.cache_dir)
+        assert len(new_cache_files) == 1
+        assert new_cache_files != cache_files
+        assert load_cached(self.config_dir, cache_dir=self.cache_dir).get_combinations_count() == 9
+        # Corrupted snapshot is rebuilt
+        with open(op.join(self.cache_dir, new_cache_files[0]), 'r+b') as file:
+            file.seek(-1, os.SEEK_END)
+            file.write(b'?')
+        assert self.load() == expected
+        load_snapshot(op.join(self.cache_dir, new_cache_files[0]))
+
+    def test_no_cache(self):
+        with patch.dict(os.environ, {'COOLNAME_CACHE_DIR': ''}):
+            assert load_cached(self.config_dir).get_combinations_count() == 6
+        assert not op.exists(self.cache_dir)
+        # Errors are the same as load_config
+        with self.assertRaisesRegex(InitializationError, 'File or directory not found'):
+            load_cached(op.join(self._temp_dir.name, 'missing'), cache_dir=self.cache_dir)
+        # Failed to write cache
+        with open(self.cache_dir, 'w'):
+            pass
+        with self.assertWarnsRegex(UserWarning, 'Failed to write coolname cache'):
+            assert load_cached(self.config_dir, cache_dir=self.cache_dir).get_combinations_count() == 6
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import os.path as op
+import tempfile
+import unittest
+
+import pytest
+
+from coolname import RandomGenerator, InitializationError
+from coolname.unique import _FeistelPermutation, _BloomFilter, UniqueGenerator
+
+from .common import TestCase, make_generator
+
+
+class FeistelPermutationTest(TestCase):
+
+    def test_bijection(self):
+        for length in (1, 2, 3, 4, 5, 16, 17, 100, 1000, 1025):
+            for key in ('key', b'key', 12345, -1):
+                permutation = _FeistelPermutation(length, key)
+                assert sorted(permutation(i) for i in range(length)) == list(range(length))
+
+    def test_keys(self):
+        values = [_FeistelPermutation(1000, 'key')(i) for i in range(100)]
+        assert values == [_FeistelPermutation(1000, 'key')(i) for i in range(100)]
+        assert values != [_FeistelPermutation(1000, 'other key')(i) for i in range(100)]
+        assert values != list(range(100))
+
+    def test_errors(self):
+        permutation = _FeistelPermutation(10, 'key')
+        with self.assertRaises(IndexError):
+            permutation(10)
+        with self.assertRaises(IndexError):
+            permutation(-1)
+        with self.assertRaisesRegex(TypeError, 'Key must be bytes, str or int, got float'):
+            _FeistelPermutation(10, 1.0)
+
+
+class UniqueSequenceTest(TestCase):
+
+    def test_all_combinations(self):
+        sequence = make_generator().unique_sequence('key')
+        slugs = list(sequence.next_slug() for _ in range(100))
+        assert sorted(slugs) == sorted('{}-{}'.format(x, y) for x in range(10) for y in range(10))
+        assert sequence.position == 100
+        with self.assertRaises(StopIteration):
+            sequence.next_slug()
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_constraints(self):
+        sequence = make_generator(ensure_unique=True).unique_sequence('key')
+        slugs = list('-'.join(x) for x in sequence)
+        assert len(slugs) == 90
+        assert len(set(slugs)) == 90
+        assert all(x[0] != x[2] for x in slugs)
+
+    def test_resume(self):
+        generator = make_generator()
+        sequence = generator.unique_sequence('key')
+        first = [sequence.next_slug() for _ in range(30)]
+        resumed = generator.unique_sequence('key', start=sequence.position)
+        rest = list('-'.join(x) for x in resumed)
+        assert len(rest) == 70
+        assert sorted(first + rest) == sorted('{}-{}'.format(x, y) for x in range(10) for y in range(10))
+        assert first + rest == list('-'.join(x) for x in generator.unique_sequence('key'))
+
+    def test_split(self):
+        generator = make_generator()
+        sequence = generator.unique_sequence(b'key')
+        next(sequence)
+        parts = sequence.split(3)
+        assert [(x.position, x.stop) for x in parts] == [(1, 34), (34, 67), (67, 100)]
+        results = [list(x) for x in parts]
+        assert sum(results, []) == list(sequence)
+
+    def test_invalid_range(self):
+        with self.assertRaisesRegex(ValueError, r'Invalid range \[10, 101\) for 100 combinations'):
+            make_generator().unique_sequence('key', start=10, stop=101)
+
+
+class UniqueGeneratorTest(TestCase):
+
+    def test_bloom_filter(self):
+        size, hashes = _BloomFilter.optimal_parameters(1000, 0.01)
+        assert (size, hashes) == (9586, 7)
+        bloom_filter = _BloomFilter(bytearray((size + 7) // 8), size, hashes)
+        # Rarely, new item is a false positive
+        assert sum(bloom_filter.add(x) for x in range(1000)) > 990
+        assert not any(bloom_filter.add(x) for x in range(1000))
+        assert all(x in bloom_filter for x in range(1000))
+        assert sum(x in bloom_filter for x in range(1000, 11000)) < 200
+        assert 0.4 < bloom_filter.fill_ratio() < 0.6
+
+    def test_no_repeats(self):
+        generator = make_generator()
+        unique_generator = UniqueGenerator(generator, 100, error_rate=0.0001)
+        slugs = [unique_generator.generate_slug() for _ in range(30)] + unique_generator.generate_slug_many(30)
+        slugs += ['-'.join(x) for x in unique_generator.generate_many(30)]
+        assert len(set(slugs)) == 90
+        assert unique_generator.count == 90
+        assert 0 < unique_generator.fill_ratio < 1
+        assert unique_generator.retry_rate > 0.9
+        with self.assertRaisesRegex(RuntimeError, 'Failed to generate a new name in 10000 attempts'):
+            for _ in range(11):
+                unique_generator.generate()
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_constraints(self):
+        unique_generator = UniqueGenerator(make_generator(ensure_unique=True), 1000)
+        slugs = unique_generator.generate_slug_many(80, separator='_')
+        assert len(set(slugs)) == 80
+        assert all(x[0] != x[2] for x in slugs)
+        assert unique_generator.retry_rate > 0.8
+        generator = RandomGenerator({
+            'all': {'type': 'cartesian', 'lists': ['words', 'words'], 'max_slug_length': 3},
+            'words': {'type': 'words', 'words': ['a', 'bbbb']}
+        })
+        unique_generator = UniqueGenerator(generator, 1000)
+        assert unique_generator.generate() == ['a', 'a']
+        with self.assertRaises(RuntimeError):
+            unique_generator.generate()
+
+    def test_save_load(self):
+        generator = make_generator()
+        unique_generator = UniqueGenerator(generator, 100)
+        assert unique_generator.fill_ratio == 0
+        assert unique_generator.retry_rate == 0
+        first = unique_generator.generate_slug_many(50)
+        with tempfile.TemporaryDirectory() as path:
+            path = op.join(path, 'filter')
+            unique_generator.save(path)
+            with UniqueGenerator.load(generator, path) as loaded:
+                assert loaded.count == 50
+                assert loaded.fill_ratio == unique_generator.fill_ratio
+                second = loaded.generate_slug_many(20)
+            # Changes are written to the file
+            with UniqueGenerator.load(generator, path) as loaded:
+                assert loaded.count == 70
+                third = [loaded.generate_slug() for _ in range(10)]
+                loaded.flush()
+                loaded.close()
+            assert len(set(first + second + third)) == 80
+            # Errors
+            with self.assertRaisesRegex(InitializationError, 'Filter was created for 100 combinations, generator has 10'):
+                UniqueGenerator.load(RandomGenerator({'all': {'type': 'words', 'words': list('0123456789')}}), path)
+            with open(path, 'r+b') as file:
+                file.truncate(100)
+            with self.assertRaisesRegex(InitializationError, 'Filter is corrupted'):
+                UniqueGenerator.load(generator, path)
+            with open(path, 'wb') as file:
+                file.write(b'hello')
+            with self.assertRaisesRegex(InitializationError, 'Not a coolname filter'):
+                UniqueGenerator.load(generator, path)
+            with self.assertRaisesRegex(InitializationError, 'Failed to read filter'):
+                UniqueGenerator.load(generator, path + '.missing')
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, 'capacity must be positive'):
+            UniqueGenerator(make_generator(), 0)
+        with self.assertRaisesRegex(ValueError, 'error_rate must be between 0 and 1'):
+            UniqueGenerator(make_generator(), 10, error_rate=1)
+
+
+if __name__ == '__main__':
+    unittest.main()